@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import anyio.to_thread
+
+from app.adapters.repositories import (
+    DeckQuery,
+    DeckRepository,
+    SessionStore,
+    UserRecord,
+    UserRepository,
+)
+from app.domain.models import Deck
+
+
+class _AsyncAdapter:
+    """Async-обёртка над синхронным хранилищем.
+
+    Хранилища в памяти (`blocking = False`) вызываются прямо в event loop —
+    без переключения в поток и без ожидания свободного воркера. Хранилища с
+    I/O (`blocking = True`) выполняются в threadpool anyio, и event loop
+    продолжает обслуживать другие запросы.
+    """
+
+    def __init__(self, backend: Any):
+        self._backend = backend
+        self._blocking = bool(getattr(backend, "blocking", False))
+
+    @property
+    def backend(self) -> Any:
+        return self._backend
+
+    @property
+    def blocking(self) -> bool:
+        return self._blocking
+
+    async def _call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        if not self._blocking:
+            return func(*args, **kwargs)
+        return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs))
+
+
+class AsyncUserRepository(_AsyncAdapter):
+    def __init__(self, backend: UserRepository):
+        super().__init__(backend)
+
+    async def get_by_email(self, email: str) -> Optional[UserRecord]:
+        return await self._call(self._backend.get_by_email, email)
+
+    async def get_by_id(self, user_id: str) -> Optional[UserRecord]:
+        return await self._call(self._backend.get_by_id, user_id)
+
+    async def create_user(
+        self,
+        *,
+        email: str,
+        password: str,
+        role: str,
+        locale: str,
+        proficiency_level: str,
+    ) -> UserRecord:
+        return await self._call(
+            self._backend.create_user,
+            email=email,
+            password=password,
+            role=role,
+            locale=locale,
+            proficiency_level=proficiency_level,
+        )
+
+
+class AsyncSessionStore(_AsyncAdapter):
+    def __init__(self, backend: SessionStore):
+        super().__init__(backend)
+
+    async def create(self, user_id: str) -> str:
+        return await self._call(self._backend.create, user_id)
+
+    async def get_user_id(self, token: str) -> Optional[str]:
+        return await self._call(self._backend.get_user_id, token)
+
+
+class AsyncDeckRepository(_AsyncAdapter):
+    def __init__(self, backend: DeckRepository):
+        super().__init__(backend)
+
+    async def save(self, deck: Deck, expected_revision: Optional[int] = None) -> Deck:
+        return await self._call(self._backend.save, deck, expected_revision)
+
+    async def get(self, deck_id: str) -> Optional[Deck]:
+        return await self._call(self._backend.get, deck_id)
+
+    async def list_all(self) -> List[Deck]:
+        return await self._call(self._backend.list_all)
+
+    async def delete(self, deck_id: str) -> None:
+        await self._call(self._backend.delete, deck_id)
+
+    async def get_many(self, deck_ids: Iterable[str]) -> Dict[str, Deck]:
+        return await self._call(self._backend.get_many, deck_ids)
+
+    async def save_many(
+        self, decks: List[Deck], expected_revisions: Optional[Dict[str, int]] = None
+    ) -> List[Deck]:
+        return await self._call(self._backend.save_many, decks, expected_revisions)
+
+    async def delete_many(self, deck_ids: Iterable[str]) -> List[Deck]:
+        return await self._call(self._backend.delete_many, deck_ids)
+
+    async def suggest(
+        self, prefix: str, limit: int, owner_id: Optional[str] = None
+    ) -> List[Deck]:
+        return await self._call(self._backend.suggest, prefix, limit, owner_id)
+
+    async def query(self, query: DeckQuery) -> Tuple[List[Deck], int]:
+        return await self._call(self._backend.query, query)
+
+    async def version(self, owner_id: Optional[str] = None) -> int:
+        return await self._call(self._backend.version, owner_id)
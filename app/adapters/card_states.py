@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import compress
+from typing import Dict, Iterator, List, MutableSequence, Optional
+from uuid import UUID
+
+from app.domain.models import UserCardState
+
+_EPOCH = datetime(1970, 1, 1)
+# Отсутствующая дата (например, next_review_at у новой карточки).
+NO_TIME = -(2**63)
+_EMPTY = -1
+_MIN_SLOTS = 8
+
+# Байтовая колонка дня повторения: 0 — базовый день и раньше, 1..253 — дни
+# после базового, _DUE_FAR — позже, _DUE_NEVER — даты нет.
+_DAY = 86_400_000_000
+_DUE_FAR = 254
+_DUE_NEVER = 255
+# При пересчёте базы столько дней остаётся до дня запроса.
+_DUE_PAST_DAYS = 64
+
+FLOAT_COLUMNS = ("stability", "retrievability", "ease_factor")
+INT_COLUMNS = ("interval", "review_count", "success_count", "lapses_count")
+TIME_COLUMNS = ("next_review_at", "last_review_at")
+
+
+def to_micros(value: Optional[datetime]) -> int:
+    """Наивное UTC-время в микросекунды от эпохи; aware-время приводится к UTC."""
+    if value is None:
+        return NO_TIME
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(value: int) -> Optional[datetime]:
+    if value == NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class ColumnarCardStateStore:
+    """Состояния карточек пользователей в параллельных колонках `array`.
+
+    Строка — одно состояние: числа лежат в типизированных массивах, id
+    состояния — 16 байт в общем bytearray, пользователи, карточки и статусы —
+    коды в таблицах значений. Индекс (user, card) → строка — открытая
+    адресация поверх `array('i')`, ключи берутся из колонок кодов, так что
+    на строку не создаётся ни одного Python-объекта.
+
+    Для одиночного доступа `get`/`upsert` работают с `UserCardState`;
+    `columns()` отдаёт сырые колонки для векторного кода.
+
+    Рядом с next_review_at хранится байт дня повторения относительно базового
+    дня: `due_rows` отбирает строки по нему через bytes.translate и
+    itertools.compress, не превращая int64 каждой строки в объект Python, и
+    точно сравнивает только строки из дня самого запроса.
+    """
+
+    def __init__(self):
+        self._ids = bytearray()
+        self._user_col = array("I")
+        self._card_col = array("I")
+        self._status_col = array("B")
+        self._floats = {name: array("d") for name in FLOAT_COLUMNS}
+        self._ints = {name: array("i") for name in INT_COLUMNS}
+        self._times = {name: array("q") for name in TIME_COLUMNS}
+        self._due_days = bytearray()
+        self._due_base: Optional[int] = None
+
+        self._users: List[str] = []
+        self._user_codes: Dict[str, int] = {}
+        self._cards: List[str] = []
+        self._card_codes: Dict[str, int] = {}
+        self._statuses: List[str] = []
+        self._status_codes: Dict[str, int] = {}
+
+        self._slots = array("i", [_EMPTY]) * _MIN_SLOTS
+
+    def __len__(self) -> int:
+        return len(self._user_col)
+
+    def __iter__(self) -> Iterator[UserCardState]:
+        for row in range(len(self)):
+            yield self.row(row)
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {
+            "card_states.columns": self.columns(),
+            "card_states.ids": self._ids,
+            "card_states.due_days": self._due_days,
+            "card_states.index": self._slots,
+            "card_states.users": self._user_codes,
+            "card_states.cards": self._card_codes,
+        }
+
+    # --- доступ к записям ---
+
+    def get(self, user_id: str, card_id: str) -> Optional[UserCardState]:
+        row = self.find(user_id, card_id)
+        return None if row is None else self.row(row)
+
+    def find(self, user_id: str, card_id: str) -> Optional[int]:
+        user_code = self._user_codes.get(user_id)
+        card_code = self._card_codes.get(card_id)
+        if user_code is None or card_code is None:
+            return None
+        slot = self._probe(user_code, card_code)
+        row = self._slots[slot]
+        return None if row == _EMPTY else row
+
+    def row(self, row: int) -> UserCardState:
+        offset = row * 16
+        return UserCardState(
+            id=str(UUID(bytes=bytes(self._ids[offset : offset + 16]))),
+            user_id=self._users[self._user_col[row]],
+            card_id=self._cards[self._card_col[row]],
+            status=self._statuses[self._status_col[row]],
+            **{name: column[row] for name, column in self._floats.items()},
+            **{name: column[row] for name, column in self._ints.items()},
+            **{name: from_micros(column[row]) for name, column in self._times.items()},
+        )
+
+    def upsert(self, state: UserCardState) -> int:
+        """Вставляет или перезаписывает состояние; возвращает номер строки."""
+        state_id = UUID(state.id)
+        if str(state_id) != state.id:
+            raise ValueError("state id must be a canonical UUID string")
+        status = self._status_code(state.status)
+        user_code = _code(self._user_codes, self._users, state.user_id)
+        card_code = _code(self._card_codes, self._cards, state.card_id)
+
+        slot = self._probe(user_code, card_code)
+        row = self._slots[slot]
+        if row == _EMPTY:
+            row = len(self)
+            self._ids += state_id.bytes
+            self._user_col.append(user_code)
+            self._card_col.append(card_code)
+            self._status_col.append(status)
+            for name, column in self._floats.items():
+                column.append(getattr(state, name))
+            for name, column in self._ints.items():
+                column.append(getattr(state, name))
+            for name, column in self._times.items():
+                column.append(to_micros(getattr(state, name)))
+            self._due_days.append(self._due_day(self._times["next_review_at"][row]))
+            self._slots[slot] = row
+            if len(self) * 2 > len(self._slots):
+                self._rehash(len(self._slots) * 2)
+            return row
+
+        self._ids[row * 16 : row * 16 + 16] = state_id.bytes
+        self._status_col[row] = status
+        for name, column in self._floats.items():
+            column[row] = getattr(state, name)
+        for name, column in self._ints.items():
+            column[row] = getattr(state, name)
+        for name, column in self._times.items():
+            column[row] = to_micros(getattr(state, name))
+        self._due_days[row] = self._due_day(self._times["next_review_at"][row])
+        return row
+
+    def delete(self, user_id: str, card_id: str) -> bool:
+        """Удаляет строку, перенося на её место последнюю (порядок строк не хранится)."""
+        row = self.find(user_id, card_id)
+        if row is None:
+            return False
+        last = len(self) - 1
+        self._remove_slot(self._probe(self._user_col[row], self._card_col[row]))
+        if row != last:
+            last_slot = self._probe(self._user_col[last], self._card_col[last])
+            self._slots[last_slot] = row
+            self._ids[row * 16 : row * 16 + 16] = self._ids[last * 16 :]
+            for column in self._all_columns():
+                column[row] = column[last]
+        del self._ids[last * 16 :]
+        for column in self._all_columns():
+            column.pop()
+        return True
+
+    # --- векторный доступ ---
+
+    def columns(self) -> Dict[str, array]:
+        """Сырые колонки (без копирования). Коды расшифровываются через
+        `users()`, `cards()`, `statuses()`; даты — микросекунды или NO_TIME."""
+        return {
+            "user": self._user_col,
+            "card": self._card_col,
+            "status": self._status_col,
+            **self._floats,
+            **self._ints,
+            **self._times,
+        }
+
+    def users(self) -> List[str]:
+        return list(self._users)
+
+    def cards(self) -> List[str]:
+        return list(self._cards)
+
+    def statuses(self) -> List[str]:
+        return list(self._statuses)
+
+    def due_rows(
+        self, now: datetime, user_id: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[int]:
+        """Строки с next_review_at <= now (по возрастанию номера строки)."""
+        cutoff = to_micros(now)
+        due = self._times["next_review_at"]
+        if user_id is not None:
+            user_code = self._user_codes.get(user_id)
+            if user_code is None:
+                return []
+            rows = [
+                row
+                for row in compress(
+                    range(len(due)), map(user_code.__eq__, self._user_col)
+                )
+                if NO_TIME < due[row] <= cutoff
+            ]
+            return rows if limit is None else rows[:limit]
+        if self._due_base is None:
+            return []
+
+        day = self._due_day(cutoff)
+        if day in (0, _DUE_FAR) and self._due_days.count(day) * 4 > len(self):
+            # День запроса ушёл за пределы колонки: сдвигаем базу к нему.
+            self._rebase_due_days(cutoff // _DAY - _DUE_PAST_DAYS)
+            day = self._due_day(cutoff)
+        days = self._due_days
+        # Строки до дня запроса включительно — кандидаты; точно сравниваются
+        # только строки из самого этого дня, лишние снимаются с маски.
+        mask = bytearray(days.translate(_DUE_UP_TO[day]))
+        row = days.find(day)
+        while row != -1:
+            if due[row] > cutoff:
+                mask[row] = 0
+            row = days.find(day, row + 1)
+        rows = list(compress(range(len(days)), mask))
+        return rows if limit is None else rows[:limit]
+
+    # --- внутреннее ---
+
+    def _due_day(self, micros: int) -> int:
+        if micros == NO_TIME:
+            return _DUE_NEVER
+        if self._due_base is None:
+            self._due_base = micros // _DAY - _DUE_PAST_DAYS
+        return min(max(micros // _DAY - self._due_base, 0), _DUE_FAR)
+
+    def _rebase_due_days(self, base: int) -> None:
+        self._due_base = base
+        self._due_days = bytearray(map(self._due_day, self._times["next_review_at"]))
+
+    def _all_columns(self) -> List[MutableSequence[int]]:
+        return [
+            self._due_days,
+            self._user_col,
+            self._card_col,
+            self._status_col,
+            *self._floats.values(),
+            *self._ints.values(),
+            *self._times.values(),
+        ]
+
+    def _status_code(self, status: str) -> int:
+        code = self._status_codes.get(status)
+        if code is None:
+            if len(self._statuses) >= 256:
+                raise ValueError("too many distinct statuses")
+            code = _code(self._status_codes, self._statuses, status)
+        return code
+
+    def _probe(self, user_code: int, card_code: int) -> int:
+        """Слот с ключом (user, card) либо первый пустой слот на его пути."""
+        slots = self._slots
+        mask = len(slots) - 1
+        slot = _hash(user_code, card_code) & mask
+        while True:
+            row = slots[slot]
+            if row == _EMPTY or (
+                self._user_col[row] == user_code and self._card_col[row] == card_code
+            ):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _remove_slot(self, slot: int) -> None:
+        # Удаление без «надгробий»: сдвигаем назад следующие элементы кластера.
+        slots = self._slots
+        mask = len(slots) - 1
+        slots[slot] = _EMPTY
+        current = (slot + 1) & mask
+        while slots[current] != _EMPTY:
+            row = slots[current]
+            home = _hash(self._user_col[row], self._card_col[row]) & mask
+            if (current - home) & mask >= (current - slot) & mask:
+                slots[slot] = row
+                slots[current] = _EMPTY
+                slot = current
+            current = (current + 1) & mask
+
+    def _rehash(self, size: int) -> None:
+        slots = array("i", [_EMPTY]) * size
+        mask = size - 1
+        for row, (user_code, card_code) in enumerate(
+            zip(self._user_col, self._card_col)
+        ):
+            slot = _hash(user_code, card_code) & mask
+            while slots[slot] != _EMPTY:
+                slot = (slot + 1) & mask
+            slots[slot] = row
+        self._slots = slots
+
+
+# Таблицы bytes.translate: 1 для дней не позже дня запроса.
+_DUE_UP_TO = [bytes(value <= day for value in range(256)) for day in range(_DUE_NEVER)]
+
+
+def _hash(user_code: int, card_code: int) -> int:
+    # Перемешивание в духе Fibonacci hashing: соседние коды не слипаются.
+    return ((user_code * 0x9E3779B1) ^ (card_code * 0x85EBCA77)) >> 7 ^ card_code
+
+
+def _code(codes: Dict[str, int], values: List[str], value: str) -> int:
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
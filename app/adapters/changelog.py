@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from itertools import count
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.shared.concurrency import StripedLock
+
+# Сущности с одинаковым id в разных коллекциях не должны сливаться.
+ChangeKey = Tuple[str, str]
+
+
+class SyncExpiredError(Exception):
+    """Запрошенная позиция старше сохранённого журнала: нужна полная синхронизация."""
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    seq: int
+    entity: str
+    entity_id: str
+    # Текущее состояние сущности; None — надгробие удаления.
+    data: Optional[Any]
+    at: float
+
+    @property
+    def op(self) -> str:
+        return "delete" if self.data is None else "upsert"
+
+
+class _UserLog:
+    """Изменения одного пользователя в порядке seq.
+
+    Для каждой сущности актуальна только последняя запись (`latest`), более
+    ранние считаются устаревшими и выбрасываются при уплотнении. Надгробия
+    живут ограниченное время; удалённое надгробие поднимает `floor` —
+    клиенты, синхронизированные раньше него, должны начать заново.
+    """
+
+    __slots__ = ("seqs", "entries", "latest", "tombstones", "floor", "head", "stale")
+
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.entries: List[Change] = []
+        self.latest: Dict[ChangeKey, int] = {}
+        self.tombstones: Deque[Change] = deque()
+        self.floor = 0
+        self.head = 0
+        self.stale = 0
+
+    def append(self, change: Change) -> None:
+        key = (change.entity, change.entity_id)
+        if key in self.latest:
+            self.stale += 1
+        self.latest[key] = change.seq
+        self.head = change.seq
+        self.seqs.append(change.seq)
+        self.entries.append(change)
+        if change.data is None:
+            self.tombstones.append(change)
+
+    def is_live(self, change: Change) -> bool:
+        return self.latest.get((change.entity, change.entity_id)) == change.seq
+
+    def expire_tombstones(self, before: float, keep: int) -> None:
+        tombstones = self.tombstones
+        while tombstones:
+            oldest = tombstones[0]
+            if not self.is_live(oldest):
+                tombstones.popleft()  # сущность уже пересоздана
+                continue
+            if oldest.at >= before and len(tombstones) <= keep:
+                break
+            tombstones.popleft()
+            del self.latest[(oldest.entity, oldest.entity_id)]
+            self.floor = max(self.floor, oldest.seq)
+            self.stale += 1
+
+    def compact(self) -> None:
+        self.entries = [change for change in self.entries if self.is_live(change)]
+        self.seqs = [change.seq for change in self.entries]
+        self.stale = 0
+
+    def read(self, since: int, limit: int) -> Tuple[List[Change], int, bool]:
+        changes: List[Change] = []
+        entries = self.entries
+        for index in range(bisect_right(self.seqs, since), len(entries)):
+            change = entries[index]
+            if not self.is_live(change):
+                continue
+            if len(changes) == limit:
+                return changes, changes[-1].seq, True
+            changes.append(change)
+        # Всё актуальное отдано: клиент догнал журнал до head, даже если
+        # последние записи уже уплотнены.
+        return changes, max(since, self.head), False
+
+
+class ChangeLog:
+    """Журнал изменений по пользователям для дельта-синхронизации клиентов.
+
+    Номера изменений берутся из общего монотонного счётчика, поэтому у
+    каждого пользователя они строго возрастают. Клиент хранит номер
+    последнего полученного изменения и запрашивает только более новые:
+    чтение — бинарный поиск плюс проход по изменившимся записям, без
+    обхода всей коллекции. `since=0` отдаёт текущее состояние целиком.
+    """
+
+    def __init__(
+        self,
+        *,
+        tombstone_ttl: float,
+        max_tombstones: int,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._tombstone_ttl = tombstone_ttl
+        self._max_tombstones = max_tombstones
+        self._clock = clock
+        self._logs: Dict[str, _UserLog] = {}
+        self._sequence = count(1)
+        self._locks = StripedLock()
+
+    def record(
+        self, user_id: str, entity: str, entity_id: str, data: Optional[Any]
+    ) -> int:
+        """Записывает новое состояние сущности (None — удаление); возвращает seq."""
+        with self._locks.for_key(user_id):
+            log = self._logs.get(user_id)
+            if log is None:
+                log = self._logs[user_id] = _UserLog()
+            change = Change(
+                next(self._sequence), entity, entity_id, data, self._clock()
+            )
+            log.append(change)
+            self._maintain(log)
+        return change.seq
+
+    def since(
+        self, user_id: str, since: int, limit: int
+    ) -> Tuple[List[Change], int, bool]:
+        """Актуальные изменения с seq > since (не больше limit), позиция для
+        следующего запроса и флаг «есть ещё».
+
+        SyncExpiredError — если часть удалений после `since` уже уплотнена
+        или `since` впереди журнала: счётчик начинается заново при каждом
+        запуске процесса, и позиция, выданная до перезапуска, иначе молча
+        пропустила бы изменения 1..since.
+        """
+        with self._locks.for_key(user_id):
+            log = self._logs.get(user_id)
+            if log is None:
+                if since > 0:
+                    raise SyncExpiredError(f"position {since} is ahead of the log")
+                return [], since, False
+            self._maintain(log)
+            if since > log.head:
+                raise SyncExpiredError(f"position {since} is ahead of {log.head}")
+            if 0 < since < log.floor:
+                raise SyncExpiredError(f"changes before {log.floor} were compacted")
+            return log.read(since, limit)
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {"changelog.logs": self._logs}
+
+    def _maintain(self, log: _UserLog) -> None:
+        log.expire_tombstones(self._clock() - self._tombstone_ttl, self._max_tombstones)
+        # Уплотнение амортизировано: список переписывается, только когда
+        # устаревших записей не меньше половины.
+        if log.stale >= 64 and log.stale * 2 >= len(log.entries):
+            log.compact()
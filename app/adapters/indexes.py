@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Iterator, List, Tuple
+
+Entry = Tuple[Any, str]
+
+
+def normalize_title(title: str) -> str:
+    """Приводит название колоды к виду для поиска: casefold и схлопывание пробелов."""
+    return " ".join(title.casefold().split())
+
+
+def normalize_prefix(prefix: str) -> str:
+    """Нормализует введённый префикс так же, как названия.
+
+    Завершающий пробел сохраняется: «my » не должен находить «mydeck».
+    """
+    normalized = normalize_title(prefix)
+    if normalized and prefix[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+class SortedKeyIndex:
+    """Отсортированный индекс пар (key, item_id).
+
+    Хранится как список небольших отсортированных блоков: вставка и удаление
+    стоят O(log n + load) вместо сдвига всего массива, а поиск по префиксу и
+    постраничный обход не трогают остальные элементы.
+
+    Изменения сериализуются внутренним локом и не трогают опубликованные
+    списки на месте: изменённый блок заменяется копией, а при делении или
+    удалении блока публикуется новая пара (blocks, maxes). Читатели берут
+    пару одним чтением атрибута и обходят её без блокировок.
+    """
+
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._lock = threading.Lock()
+        self._tree: Tuple[List[List[Entry]], List[Entry]] = ([], [])
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Any, item_id: str) -> None:
+        entry = (key, item_id)
+        with self._lock:
+            blocks, maxes = self._tree
+            self._len += 1
+            if not blocks:
+                self._tree = ([[entry]], [entry])
+                return
+            pos = bisect_left(maxes, entry)
+            if pos == len(maxes):
+                pos -= 1
+            block = list(blocks[pos])
+            insort(block, entry)
+            if len(block) <= 2 * self._load:
+                # Сначала блок, потом максимум: читатель может увидеть новый
+                # блок со старым максимумом, но не наоборот.
+                blocks[pos] = block
+                maxes[pos] = block[-1]
+                return
+            half = block[self._load :]
+            del block[self._load :]
+            self._tree = (
+                blocks[:pos] + [block, half] + blocks[pos + 1 :],
+                maxes[:pos] + [block[-1], half[-1]] + maxes[pos + 1 :],
+            )
+
+    def remove(self, key: Any, item_id: str) -> bool:
+        entry = (key, item_id)
+        with self._lock:
+            blocks, maxes = self._tree
+            pos = bisect_left(maxes, entry)
+            if pos == len(maxes):
+                return False
+            block = blocks[pos]
+            idx = bisect_left(block, entry)
+            if idx == len(block) or block[idx] != entry:
+                return False
+            self._len -= 1
+            if len(block) == 1:
+                self._tree = (
+                    blocks[:pos] + blocks[pos + 1 :],
+                    maxes[:pos] + maxes[pos + 1 :],
+                )
+                return True
+            block = block[:idx] + block[idx + 1 :]
+            blocks[pos] = block
+            maxes[pos] = block[-1]
+            return True
+
+    def __iter__(self) -> Iterator[Entry]:
+        for block in self._tree[0]:
+            yield from block
+
+    def __reversed__(self) -> Iterator[Entry]:
+        for block in reversed(self._tree[0]):
+            yield from reversed(block)
+
+    def iter_from(self, start: int = 0, *, reverse: bool = False) -> Iterator[Entry]:
+        """Обходит индекс начиная с позиции `start`, пропуская целые блоки."""
+        blocks = self._tree[0]
+        for block in reversed(blocks) if reverse else iter(blocks):
+            if start >= len(block):
+                start -= len(block)
+                continue
+            if reverse:
+                yield from reversed(block[: len(block) - start])
+            else:
+                yield from block[start:]
+            start = 0
+
+    def prefix(self, prefix: str, limit: int) -> List[str]:
+        """Возвращает до `limit` item_id, чьи ключи начинаются с `prefix`."""
+        result: List[str] = []
+        if limit <= 0:
+            return result
+        blocks, maxes = self._tree
+        probe = (prefix,)
+        pos = bisect_left(maxes, probe)
+        for block in blocks[pos:]:
+            for key, item_id in block[bisect_left(block, probe) :]:
+                if not key.startswith(prefix):
+                    return result
+                result.append(item_id)
+                if len(result) >= limit:
+                    return result
+        return result
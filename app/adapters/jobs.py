@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from app.domain.models import Job
+
+_COLUMNS = (
+    "id, owner_id, kind, params, priority, status, progress, attempts, "
+    "max_attempts, result, error, created_at, updated_at"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_unfinished ON jobs (status)
+    WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (owner_id, updated_at)
+    WHERE status NOT IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (updated_at)
+    WHERE status NOT IN ('queued', 'running');
+"""
+
+
+class SQLiteJobStore:
+    """Таблица фоновых задач в SQLite.
+
+    Путь ":memory:" — без сохранения между перезапусками (нет APP_DATA_DIR).
+    Файловая база открывается в режиме WAL: запись статуса или прогресса
+    не блокирует чтение GET /api/v1/jobs/{id}. Соединение одно на процесс,
+    обращения сериализуются локом.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> Job:
+        row = (
+            job.id,
+            job.owner_id,
+            job.kind,
+            json.dumps(job.params, separators=(",", ":")),
+            job.priority,
+            job.status,
+            job.progress,
+            job.attempts,
+            job.max_attempts,
+            None if job.result is None else json.dumps(job.result),
+            job.error,
+            job.created_at.isoformat(),
+            job.updated_at.isoformat(),
+        )
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else _to_job(row)
+
+    def unfinished(self) -> List[Job]:
+        """Задачи, прерванные перезапуском, в порядке постановки."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [_to_job(row) for row in rows]
+
+    def prune(
+        self,
+        owner_id: str,
+        keep: Optional[int] = None,
+        before: Optional[datetime] = None,
+    ) -> int:
+        """Удаляет завершённые задачи: всех владельцев — старше `before`,
+        у `owner_id` — сверх `keep` последних. Возвращает число удалённых."""
+        deleted = 0
+        with self._lock:
+            if before is not None:
+                deleted += self._db.execute(
+                    "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') "
+                    "AND updated_at < ?",
+                    (before.isoformat(),),
+                ).rowcount
+            if keep is not None:
+                deleted += self._db.execute(
+                    "DELETE FROM jobs WHERE owner_id = ? "
+                    "AND status NOT IN ('queued', 'running') AND id NOT IN ("
+                    "SELECT id FROM jobs WHERE owner_id = ? "
+                    "AND status NOT IN ('queued', 'running') "
+                    "ORDER BY updated_at DESC, rowid DESC LIMIT ?)",
+                    (owner_id, owner_id, keep),
+                ).rowcount
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _to_job(row: tuple) -> Job:
+    return Job(
+        id=row[0],
+        owner_id=row[1],
+        kind=row[2],
+        params=json.loads(row[3]),
+        priority=row[4],
+        status=row[5],
+        progress=row[6],
+        attempts=row[7],
+        max_attempts=row[8],
+        result=None if row[9] is None else json.loads(row[9]),
+        error=row[10],
+        created_at=datetime.fromisoformat(row[11]),
+        updated_at=datetime.fromisoformat(row[12]),
+    )
@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import repeat
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from app.domain.models import intern_value
+
+if TYPE_CHECKING:
+    from app.adapters.repositories import SessionStore, UserRecord, UserRepository
+
+logger = logging.getLogger("app.journal")
+
+USER_CREATED = 1
+SESSION_CREATED = 2
+
+# Запись WAL: длина полезной нагрузки, crc32 (вида и нагрузки), вид записи.
+_RECORD = struct.Struct("<IIB")
+_FIELD = struct.Struct("<I")
+# Снимок: магия, поколение WAL, с которого нужно доигрывать, число пользователей
+# и сессий. Дальше секции колонок и crc32 всего файла в конце.
+_SNAPSHOT_MAGIC = b"DSOSNAP3"
+_SNAPSHOT_HEADER = struct.Struct("<8sQII")
+_SECTION = struct.Struct("<cQ")
+_CRC = struct.Struct("<I")
+
+USER_COLUMNS = (
+    "id",
+    "email",
+    "role",
+    "locale",
+    "proficiency_level",
+    "password_hash",
+    "password_salt",
+)
+_INTERNED_COLUMNS = ("role", "locale", "proficiency_level")
+SNAPSHOT_FILE = "snapshot.bin"
+# Файлы журнала содержат хэши паролей и сессий: читать их может только владелец.
+_FILE_MODE = 0o600
+SESSION_KEY_SIZE = hashlib.sha256().digest_size
+
+
+def session_key(token: str) -> bytes:
+    """Ключ сессии в памяти и на диске: sha256 токена, сам токен не хранится."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+@dataclass(frozen=True)
+class RecoveryStats:
+    users: int
+    sessions: int
+    wal_records: int
+    snapshot_seconds: float
+    replay_seconds: float
+
+
+class Journal:
+    """WAL и снимки пользователей и сессий.
+
+    Каждая мутация сначала дописывается в текущий файл `wal-<поколение>.log`,
+    затем применяется в памяти — под одним локом журнала, так что порядок
+    в файле совпадает с порядком применения. Снимок переключает WAL на новое
+    поколение, копирует состояние и атомарно заменяет `snapshot.bin`; старые
+    файлы WAL после этого удаляются. Повторное применение записей идемпотентно,
+    поэтому запись, попавшая и в снимок, и в новый WAL, не мешает.
+
+    При старте пользователи читаются из снимка колонками, а сессии не
+    загружаются вовсе: SessionStore ищет их в отсортированной таблице снимка
+    через mmap (см. MappedSessions). Затем доигрывается хвост WAL; оборванная
+    последняя запись (crc не сошёлся) отрезается.
+
+    Сессии пишутся sha256-ключами (`session_key`), а не токенами: копия
+    каталога данных не даёт войти. Файлы создаются с правами 0600.
+
+    Без fsync запись в WAL — write в буфер страниц, единицы микросекунд; она
+    выполняется прямо в event loop, потому что переход в threadpool стоит
+    дороже самой записи. С fsync репозитории объявляют себя блокирующими
+    (`blocking = True`), и async-адаптер уводит их вызовы в threadpool.
+    """
+
+    def __init__(self, directory: str, *, fsync: bool = False, snapshot_every: int = 0):
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._generation = 0
+        self._since_snapshot = 0
+        self._wal = None
+        self._users: Optional["UserRepository"] = None
+        self._sessions: Optional["SessionStore"] = None
+        os.makedirs(directory, exist_ok=True)
+
+    # --- запись ---
+
+    @contextmanager
+    def append(self, kind: int, *fields: str) -> Iterator[None]:
+        """Пишет запись в WAL и держит лок журнала, пока вызывающий её применяет."""
+        payload = b"".join(
+            _FIELD.pack(len(data)) + data
+            for data in (value.encode("utf-8") for value in fields)
+        )
+        crc = zlib.crc32(payload, kind)
+        record = _RECORD.pack(len(payload), crc, kind) + payload
+        with self._lock:
+            if self._wal is None:
+                raise RuntimeError("journal is closed")
+            self._wal.write(record)
+            self._wal.flush()
+            if self.fsync:
+                os.fsync(self._wal.fileno())
+            yield
+            self._since_snapshot += 1
+            start_snapshot = (
+                self.snapshot_every and self._since_snapshot >= self.snapshot_every
+            )
+        if start_snapshot:
+            self._snapshot_in_background()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+
+    # --- восстановление ---
+
+    def recover(
+        self, users: "UserRepository", sessions: "SessionStore"
+    ) -> RecoveryStats:
+        """Загружает снимок и WAL в репозитории и открывает WAL на запись."""
+        started = perf_counter()
+        # Миллион новых объектов без циклов: сборщик мусора здесь только
+        # многократно обходит растущие поколения.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            generation, records, mapped = self._load_snapshot()
+            users.restore(records)
+            if mapped is not None:
+                sessions.use_snapshot(mapped)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        snapshot_seconds = perf_counter() - started
+
+        started = perf_counter()
+        replayed = 0
+        wal_files = self._wal_files()
+        for index, (wal_generation, path) in enumerate(wal_files):
+            if wal_generation < generation:
+                continue
+            last = index == len(wal_files) - 1
+            for kind, fields in _read_wal(path, truncate=last):
+                if kind == USER_CREATED:
+                    users.restore([_user_record(fields)])
+                elif kind == SESSION_CREATED:
+                    sessions.restore({bytes.fromhex(fields[0]): fields[1]})
+                replayed += 1
+        replay_seconds = perf_counter() - started
+
+        self._users = users
+        self._sessions = sessions
+        self._since_snapshot = replayed
+        current = max([generation] + [gen for gen, _ in wal_files])
+        with self._lock:
+            self._open_wal(current)
+        stats = RecoveryStats(
+            users=len(records),
+            sessions=len(mapped) if mapped is not None else 0,
+            wal_records=replayed,
+            snapshot_seconds=snapshot_seconds,
+            replay_seconds=replay_seconds,
+        )
+        logger.info(
+            "journal recovered",
+            extra={
+                "snapshot_users": stats.users,
+                "snapshot_sessions": stats.sessions,
+                "wal_records": replayed,
+                "snapshot_ms": round(snapshot_seconds * 1000, 1),
+                "replay_ms": round(replay_seconds * 1000, 1),
+            },
+        )
+        return stats
+
+    # --- снимки ---
+
+    def snapshot(self) -> str:
+        """Пишет снимок текущего состояния; возвращает путь к файлу."""
+        if self._users is None or self._sessions is None:
+            raise RuntimeError("journal is not attached to repositories")
+        with self._snapshot_lock:
+            with self._lock:
+                # Всё, что применено до переключения, уже в памяти; всё, что
+                # после, — в новом WAL. Копировать можно без лока журнала.
+                generation = self._generation + 1
+                self._open_wal(generation)
+                self._since_snapshot = 0
+            pending = self._sessions.tokens()
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            _write_snapshot(
+                path,
+                generation,
+                self._users.records(),
+                self._sessions.snapshot,
+                pending,
+            )
+            _, _, mapped = _read_snapshot(path, users=False)
+            self._sessions.use_snapshot(mapped, flushed=pending)
+            for wal_generation, wal_path in self._wal_files():
+                if wal_generation < generation:
+                    os.remove(wal_path)
+        return path
+
+    def _snapshot_in_background(self) -> None:
+        if self._snapshot_lock.locked():
+            return
+
+        def run() -> None:
+            try:
+                self.snapshot()
+            except Exception:  # noqa: BLE001 - журнал продолжает работать без снимка
+                logger.exception("journal snapshot failed")
+
+        threading.Thread(target=run, name="journal-snapshot", daemon=True).start()
+
+    def _load_snapshot(
+        self,
+    ) -> Tuple[int, List["UserRecord"], Optional["MappedSessions"]]:
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return 0, [], None
+        return _read_snapshot(path)
+
+    # --- файлы WAL ---
+
+    def _open_wal(self, generation: int) -> None:
+        if self._wal is not None:
+            self._wal.close()
+        self._generation = generation
+        fd = os.open(
+            self._wal_path(generation),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            _FILE_MODE,
+        )
+        self._wal = os.fdopen(fd, "ab")
+
+    def _wal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"wal-{generation:08d}.log")
+
+    def _wal_files(self) -> List[Tuple[int, str]]:
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith("wal-") and name.endswith(".log"):
+                files.append((int(name[4:-4]), os.path.join(self.directory, name)))
+        return sorted(files)
+
+
+class MappedSessions:
+    """Сессии снимка: отсортированные записи фиксированной ширины
+    (sha256 токена и код пользователя), читаемые прямо из mmap.
+
+    Поиск — бинарный по файлу, так что миллионы токенов не превращаются
+    в объекты Python ни при старте, ни потом. Отображение живёт, пока на
+    него есть ссылки: читатель, успевший взять старый снимок, дочитает его.
+    """
+
+    def __init__(self, data: mmap.mmap, offset: int, count: int, users: List[str]):
+        self._data = data
+        self._offset = offset
+        self._count = count
+        self._size = SESSION_KEY_SIZE + _FIELD.size
+        self._users = users
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, key: bytes) -> Optional[str]:
+        pos = self.find(key)
+        if pos == self._count or self.key_at(pos) != key:
+            return None
+        start = self._offset + pos * self._size + SESSION_KEY_SIZE
+        return self._users[_FIELD.unpack_from(self._data, start)[0]]
+
+    def users(self) -> List[str]:
+        return self._users
+
+    def find(self, key: bytes) -> int:
+        """Первая позиция, ключ в которой не меньше `key`."""
+        data, offset, size = self._data, self._offset, self._size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = offset + mid * size
+            if data[start : start + SESSION_KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def key_at(self, pos: int) -> bytes:
+        start = self._offset + pos * self._size
+        return self._data[start : start + SESSION_KEY_SIZE]
+
+    def raw(self, start: int, stop: int) -> bytes:
+        return self._data[
+            self._offset + start * self._size : self._offset + stop * self._size
+        ]
+
+    def items(self) -> Iterator[Tuple[bytes, str]]:
+        for pos in range(self._count):
+            start = self._offset + pos * self._size
+            (code,) = _FIELD.unpack_from(self._data, start + SESSION_KEY_SIZE)
+            yield self._data[start : start + SESSION_KEY_SIZE], self._users[code]
+
+
+def user_fields(record: "UserRecord") -> Tuple[str, ...]:
+    return tuple(getattr(record, name) for name in USER_COLUMNS)
+
+
+def _user_record(fields: List[str]) -> "UserRecord":
+    from app.adapters.repositories import UserRecord
+
+    return UserRecord(*fields)
+
+
+def _read_wal(path: str, *, truncate: bool) -> Iterator[Tuple[int, List[str]]]:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    offset = 0
+    end = len(data)
+    while offset + _RECORD.size <= end:
+        length, crc, kind = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        payload = data[start : start + length]
+        if len(payload) != length or zlib.crc32(payload, kind) != crc:
+            break
+        fields = []
+        pos = 0
+        while pos < length:
+            (size,) = _FIELD.unpack_from(payload, pos)
+            pos += _FIELD.size
+            fields.append(payload[pos : pos + size].decode("utf-8"))
+            pos += size
+        yield kind, fields
+        offset = start + length
+    if offset != end:
+        logger.warning("journal: dropping torn WAL tail", extra={"path": path})
+        if truncate:
+            with open(path, "r+b") as fh:
+                fh.truncate(offset)
+
+
+def _pack_strings(values: List[str]) -> bytes:
+    """Колонка строк: через NUL, если он не встречается, иначе с длинами."""
+    count = _FIELD.pack(len(values))
+    if not any("\x00" in value for value in values):
+        return _section(b"S", count + "\x00".join(values).encode("utf-8"))
+    encoded = [value.encode("utf-8") for value in values]
+    lengths = array("I", map(len, encoded))
+    return _section(b"L", count + lengths.tobytes() + b"".join(encoded))
+
+
+def _section(flag: bytes, data: bytes) -> bytes:
+    return _SECTION.pack(flag, len(data)) + data
+
+
+def _session_parts(
+    mapped: Optional[MappedSessions], pending: Dict[bytes, str]
+) -> Tuple[List[str], int, List[bytes]]:
+    """Таблица пользователей, число записей и байты таблицы сессий.
+
+    Старые коды пользователей сохраняются, поэтому новые записи (их столько,
+    сколько сессий появилось с прошлого снимка) вклеиваются между нетронутыми
+    байтовыми диапазонами старой таблицы без разбора её записей.
+    """
+    users = list(mapped.users()) if mapped is not None else []
+    codes = {user_id: code for code, user_id in enumerate(users)}
+    new = sorted(
+        (key, codes.setdefault(user_id, len(codes))) for key, user_id in pending.items()
+    )
+    users.extend(list(codes)[len(users) :])
+    if mapped is None:
+        return users, len(new), [key + _FIELD.pack(code) for key, code in new]
+
+    parts = []
+    count = len(mapped)
+    previous = 0
+    for key, code in new:
+        pos = mapped.find(key)
+        if pos < len(mapped) and mapped.key_at(pos) == key:
+            continue  # уже в снимке: запись доиграна из WAL повторно
+        parts.append(mapped.raw(previous, pos))
+        parts.append(key + _FIELD.pack(code))
+        previous = pos
+        count += 1
+    parts.append(mapped.raw(previous, len(mapped)))
+    return users, count, parts
+
+
+def _write_snapshot(
+    path: str,
+    generation: int,
+    records: List["UserRecord"],
+    mapped: Optional[MappedSessions],
+    pending: Dict[bytes, str],
+) -> None:
+    users, session_count, session_parts = _session_parts(mapped, pending)
+    session_size = sum(map(len, session_parts))
+    parts = [
+        _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, generation, len(records), session_count)
+    ]
+    for name in USER_COLUMNS:
+        parts.append(_pack_strings([getattr(record, name) for record in records]))
+    parts.append(_pack_strings(users))
+    parts.append(_SECTION.pack(b"T", session_size))
+    parts.extend(session_parts)
+    crc = 0
+    for part in parts:
+        crc = zlib.crc32(part, crc)
+
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, _FILE_MODE)
+    with os.fdopen(fd, "wb") as fh:
+        for part in parts:
+            fh.write(part)
+        fh.write(_CRC.pack(crc))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(
+    path: str, *, users: bool = True
+) -> Tuple[int, List["UserRecord"], MappedSessions]:
+    """Читает снимок; с `users=False` колонки пользователей пропускаются."""
+    with open(path, "rb") as fh:
+        data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        body_end = len(data) - _CRC.size
+        (expected,) = _CRC.unpack_from(data, body_end)
+        with memoryview(data) as view:
+            valid = zlib.crc32(view[:body_end]) == expected
+        if not valid:
+            raise ValueError(f"snapshot {path} is corrupted")
+        magic, generation, user_count, session_count = _SNAPSHOT_HEADER.unpack_from(
+            data, 0
+        )
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        reader = _SectionReader(data, _SNAPSHOT_HEADER.size)
+        columns = [reader.strings(parse=users) for _ in USER_COLUMNS]
+        table = reader.strings()
+        flag, offset, length = reader.next()
+        if flag != b"T" or length != session_count * (SESSION_KEY_SIZE + _FIELD.size):
+            raise ValueError(f"snapshot {path} is inconsistent")
+        if users and any(len(column) != user_count for column in columns):
+            raise ValueError(f"snapshot {path} is inconsistent")
+    except Exception:
+        data.close()
+        raise
+
+    records = _build_records(columns) if users else []
+    if users:
+        # Id из таблицы сессий заменяем теми же объектами, что в записях.
+        known = dict(zip(columns[0], columns[0]))
+        table = [known.get(user_id, user_id) for user_id in table]
+    mapped = MappedSessions(data, offset, session_count, table)
+    return generation, records, mapped
+
+
+def _build_records(columns: List[List[str]]) -> List["UserRecord"]:
+    """Массовое создание записей из колонок снимка.
+
+    Поля ставятся дескрипторами слотов поколоночно (циклы map идут в C),
+    минуя __init__ и __post_init__ frozen-датакласса — на миллионе записей
+    это в несколько раз быстрее. Интернирование делается здесь же.
+    """
+    from app.adapters.repositories import UserRecord
+
+    records = list(map(object.__new__, repeat(UserRecord, len(columns[0]))))
+    for name, column in zip(USER_COLUMNS, columns):
+        values = map(intern_value, column) if name in _INTERNED_COLUMNS else column
+        deque(map(UserRecord.__dict__[name].__set__, records, values), maxlen=0)
+    return records
+
+
+class _SectionReader:
+    def __init__(self, data: mmap.mmap, offset: int):
+        self._data = data
+        self._offset = offset
+
+    def next(self) -> Tuple[bytes, int, int]:
+        """Флаг, смещение и длина очередной секции."""
+        flag, length = _SECTION.unpack_from(self._data, self._offset)
+        start = self._offset + _SECTION.size
+        self._offset = start + length
+        return flag, start, length
+
+    def strings(self, *, parse: bool = True) -> List[str]:
+        flag, start, length = self.next()
+        if not parse:
+            return []
+        raw = self._data[start : start + length]
+        (count,) = _FIELD.unpack_from(raw, 0)
+        if not count:
+            return []
+        if flag == b"S":
+            return raw[_FIELD.size :].decode("utf-8").split("\x00")
+        lengths = array("I")
+        lengths.frombytes(raw[_FIELD.size : _FIELD.size + count * lengths.itemsize])
+        pos = _FIELD.size + count * lengths.itemsize
+        values = []
+        for size in lengths:
+            values.append(raw[pos : pos + size].decode("utf-8"))
+            pos += size
+        return values
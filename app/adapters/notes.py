@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from app.domain.models import Card, Note
+from app.shared.concurrency import StripedLock
+
+
+class _Layer:
+    """Заметки и карточки одной колоды поверх слоя исходной колоды (у клона)."""
+
+    __slots__ = ("base", "notes", "cards", "note_cards")
+
+    def __init__(self, base: Optional["_Layer"] = None):
+        self.base = base
+        # None — надгробие: заметка базы удалена в этой колоде.
+        self.notes: Dict[str, Optional[Note]] = {}
+        self.cards: Dict[str, Card] = {}
+        self.note_cards: Dict[str, List[str]] = {}
+
+    def chain(self) -> List["_Layer"]:
+        """Слои от корневой колоды до этой."""
+        layers = []
+        layer: Optional[_Layer] = self
+        while layer is not None:
+            layers.append(layer)
+            layer = layer.base
+        layers.reverse()
+        return layers
+
+    def find(self, note_id: str) -> Optional[Note]:
+        layer: Optional[_Layer] = self
+        while layer is not None:
+            if note_id in layer.notes:
+                return layer.notes[note_id]
+            layer = layer.base
+        return None
+
+    def note_cards_of(self, note_id: str) -> List[Card]:
+        """Карточки заметки из ближайшего слоя, где они записаны."""
+        layer: Optional[_Layer] = self
+        while layer is not None:
+            card_ids = layer.note_cards.get(note_id)
+            if card_ids is not None:
+                return [layer.cards[card_id] for card_id in card_ids]
+            layer = layer.base
+        return []
+
+
+class InMemoryNoteRepository:
+    """Заметки и карточки колод в памяти; клоны копируют заметки при записи.
+
+    Клон колоды — пустой слой со ссылкой на слой исходной колоды, поэтому
+    клонирование O(1) по времени и памяти. Заметки, которые подписчик не
+    менял, читаются из исходной колоды (и видят правки её автора). Изменённая
+    заметка копируется в слой клона с тем же id вместе с её карточками (те же
+    объекты и id, так что UserCardState подписчика продолжает на них
+    ссылаться, а удаление заметки в исходной колоде копию не задевает).
+    Удалённая в клоне заметка закрывается надгробием.
+
+    Слой удалённой колоды освобождается сборщиком мусора, когда на него
+    не ссылается ни один клон. Записи в колоду сериализуются локом из полосы
+    по её id; чтения идут без локов.
+    """
+
+    def __init__(self):
+        self._layers: Dict[str, _Layer] = {}
+        self._deck_locks = StripedLock()
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {"notes.layers": self._layers}
+
+    def fork(self, source_deck_id: str, deck_id: str) -> None:
+        """Делает колоду `deck_id` клоном `source_deck_id`."""
+        with self._deck_locks.for_key(source_deck_id):
+            base = self._layers.setdefault(source_deck_id, _Layer())
+        with self._deck_locks.for_key(deck_id):
+            self._layers[deck_id] = _Layer(base)
+
+    def drop(self, deck_id: str) -> None:
+        with self._deck_locks.for_key(deck_id):
+            self._layers.pop(deck_id, None)
+
+    def get(self, deck_id: str, note_id: str) -> Optional[Note]:
+        layer = self._layers.get(deck_id)
+        return None if layer is None else layer.find(note_id)
+
+    def save(self, deck_id: str, note: Note, cards: Iterable[Card] = ()) -> Note:
+        """Записывает заметку в слой колоды; для заметки клона это и есть копия."""
+        with self._deck_locks.for_key(deck_id):
+            layer = self._layers.setdefault(deck_id, _Layer())
+            if note.id not in layer.notes and layer.base is not None:
+                # Первая копия заметки базы: карточки копируются вместе с ней.
+                for card in layer.base.note_cards_of(note.id):
+                    layer.cards[card.id] = card
+                    layer.note_cards.setdefault(note.id, []).append(card.id)
+            layer.notes[note.id] = note
+            for card in cards:
+                layer.cards[card.id] = card
+                layer.note_cards.setdefault(note.id, []).append(card.id)
+        return note
+
+    def delete(self, deck_id: str, note_id: str) -> bool:
+        with self._deck_locks.for_key(deck_id):
+            layer = self._layers.get(deck_id)
+            if layer is None or layer.find(note_id) is None:
+                return False
+            for card_id in layer.note_cards.pop(note_id, ()):
+                del layer.cards[card_id]
+            if layer.base is not None and layer.base.find(note_id) is not None:
+                layer.notes[note_id] = None
+            else:
+                del layer.notes[note_id]
+            return True
+
+    def notes(self, deck_id: str) -> List[Note]:
+        return [note for note in self._merged(deck_id).values() if note is not None]
+
+    def cards(self, deck_id: str) -> List[Card]:
+        layer = self._layers.get(deck_id)
+        if layer is None:
+            return []
+        notes = self._merged(deck_id)
+        merged: Dict[str, Card] = {}
+        for each in layer.chain():
+            merged.update(each.cards)
+        return [card for card in merged.values() if notes.get(card.note_id) is not None]
+
+    def _merged(self, deck_id: str) -> Dict[str, Optional[Note]]:
+        # Слои накладываются от корня: перезапись ключа сохраняет его место,
+        # так что копия заметки стоит там же, где оригинал.
+        layer = self._layers.get(deck_id)
+        merged: Dict[str, Optional[Note]] = {}
+        for each in layer.chain() if layer is not None else ():
+            merged.update(each.notes)
+        return merged
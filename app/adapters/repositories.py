@@ -1,16 +1,32 @@
 from __future__ import annotations
 
 import secrets
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from itertools import count, islice
+from operator import attrgetter
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple, Union
 from uuid import uuid4
 
-from app.domain.models import Deck, User
+from app.adapters.indexes import SortedKeyIndex, normalize_title
+from app.adapters.journal import (
+    SESSION_CREATED,
+    USER_CREATED,
+    Journal,
+    MappedSessions,
+    session_key,
+    user_fields,
+)
+from app.domain.models import Deck, User, intern_fields
+from app.metrics import timed
+from app.shared.concurrency import StripedLock
 from app.shared.errors import ApiError
 from app.shared.security import hash_password
+from app.tracing import traced
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UserRecord:
     id: str
     email: str
@@ -20,6 +36,9 @@ class UserRecord:
     password_hash: str
     password_salt: str
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "role", "locale", "proficiency_level")
+
     def to_user(self) -> User:
         return User(
             id=self.id,
@@ -31,16 +50,48 @@ class UserRecord:
 
 
 class UserRepository:
-    def __init__(self):
+    """Пользователи в памяти.
+
+    Чтение — одиночные `dict.get` без локов (записи неизменяемы); создание
+    сериализуется только для одного и того же email. С журналом каждое
+    создание сначала пишется в WAL.
+    """
+
+    # Вызовы не ждут I/O: async-адаптер выполняет их прямо в event loop.
+    blocking = False
+
+    def __init__(self, journal: Optional[Journal] = None):
         self._by_id: Dict[str, UserRecord] = {}
         self._by_email: Dict[str, UserRecord] = {}
+        self._email_locks = StripedLock()
+        self._journal = journal
+        if journal is not None and journal.fsync:
+            self.blocking = True
+
+    def records(self) -> List[UserRecord]:
+        return list(self._by_id.values())
+
+    def restore(self, records: Iterable[UserRecord]) -> None:
+        """Загружает записи из снимка или WAL, минуя проверки и журнал."""
+        records = list(records)
+        self._by_id.update(zip(map(attrgetter("id"), records), records))
+        self._by_email.update(zip(map(attrgetter("email"), records), records))
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {"users.by_id": self._by_id, "users.by_email": self._by_email}
 
+    @timed("users", "get_by_email")
+    @traced("users.get_by_email")
     def get_by_email(self, email: str) -> Optional[UserRecord]:
         return self._by_email.get(email.lower())
 
+    @timed("users", "get_by_id")
+    @traced("users.get_by_id")
     def get_by_id(self, user_id: str) -> Optional[UserRecord]:
         return self._by_id.get(user_id)
 
+    @timed("users", "create_user")
+    @traced("users.create_user")
     def create_user(
         self,
         *,
@@ -54,6 +105,7 @@ class UserRepository:
         if self.get_by_email(normalized_email) is not None:
             raise ApiError(code="conflict", message="user already exists", status=409)
 
+        # Хэширование пароля — самая дорогая часть, оно идёт вне лока.
         salt = secrets.token_hex(16)
         password_hash = hash_password(password, salt)
         record = UserRecord(
@@ -65,26 +117,101 @@ class UserRepository:
             password_hash=password_hash,
             password_salt=salt,
         )
-        self._by_id[record.id] = record
-        self._by_email[record.email] = record
+        with self._email_locks.for_key(normalized_email):
+            if normalized_email in self._by_email:
+                raise ApiError(
+                    code="conflict", message="user already exists", status=409
+                )
+            with _journaled(self._journal, USER_CREATED, *user_fields(record)):
+                self._by_id[record.id] = record
+                self._by_email[record.email] = record
         return record
 
 
 class SessionStore:
-    def __init__(self):
-        self._tokens: Dict[str, str] = {}
+    blocking = False
+
+    def __init__(self, journal: Optional[Journal] = None):
+        # Ключ — sha256 токена (session_key): токены не хранятся ни в памяти,
+        # ни в журнале.
+        self._tokens: Dict[bytes, str] = {}
+        self._journal = journal
+        # Сессии из снимка журнала ищутся в нём через mmap, в словаре — только
+        # созданные после снимка.
+        self.snapshot: Optional[MappedSessions] = None
+        if journal is not None and journal.fsync:
+            self.blocking = True
+
+    def __len__(self) -> int:
+        return len(self._tokens) + (len(self.snapshot) if self.snapshot else 0)
+
+    def tokens(self) -> Dict[bytes, str]:
+        """Сессии (по ключам), ещё не попавшие в снимок."""
+        return dict(self._tokens)
 
+    def restore(
+        self, tokens: Union[Dict[bytes, str], Iterable[Tuple[bytes, str]]]
+    ) -> None:
+        self._tokens.update(tokens)
+
+    def use_snapshot(
+        self, snapshot: MappedSessions, flushed: Optional[Dict[bytes, str]] = None
+    ) -> None:
+        """Переключает чтение на новый снимок и убирает попавшие в него сессии."""
+        self.snapshot = snapshot
+        for key in flushed or ():
+            self._tokens.pop(key, None)
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {"sessions.tokens": self._tokens}
+
+    @timed("sessions", "create")
+    @traced("sessions.create")
     def create(self, user_id: str) -> str:
         token = secrets.token_urlsafe(32)
-        self._tokens[token] = user_id
+        key = session_key(token)
+        with _journaled(self._journal, SESSION_CREATED, key.hex(), user_id):
+            self._tokens[key] = user_id
         return token
 
+    @timed("sessions", "get_user_id")
+    @traced("sessions.get_user_id")
     def get_user_id(self, token: str) -> Optional[str]:
-        return self._tokens.get(token)
+        key = session_key(token)
+        user_id = self._tokens.get(key)
+        if user_id is None and self.snapshot is not None:
+            user_id = self.snapshot.get(key)
+        return user_id
+
+
+@dataclass(frozen=True)
+class DeckQuery:
+    """Параметры выборки колод: фильтры, сортировка и страница.
+
+    `sort` — имя поля (`created_at`, `updated_at`, `title`), с префиксом `-`
+    для убывания; None сохраняет порядок добавления.
+    """
+
+    owner_id: Optional[str] = None
+    source_lang: Optional[str] = None
+    target_lang: Optional[str] = None
+    title_contains: Optional[str] = None
+    sort: Optional[str] = None
+    limit: int = 20
+    offset: int = 0
+
+
+def stale_revision() -> ApiError:
+    return ApiError(code="precondition_failed", message="deck was modified", status=412)
 
 
 class DeckRepository:
-    def save(self, deck: Deck) -> Deck:
+    # True для хранилищ с I/O: async-адаптер уводит их вызовы в threadpool.
+    blocking = False
+
+    def save(self, deck: Deck, expected_revision: Optional[int] = None) -> Deck:
+        """Сохраняет колоду. С `expected_revision` запись атомарно проверяет,
+        что сохранённая колода всё ещё этой ревизии (If-Match), иначе 412."""
         raise NotImplementedError
 
     def get(self, deck_id: str) -> Optional[Deck]:
@@ -96,20 +223,361 @@ class DeckRepository:
     def delete(self, deck_id: str) -> None:
         raise NotImplementedError
 
+    def get_many(self, deck_ids: Iterable[str]) -> Dict[str, Deck]:
+        """Найденные колоды по id; отсутствующих в словаре нет."""
+        found = {}
+        for deck_id in deck_ids:
+            deck = self.get(deck_id)
+            if deck is not None:
+                found[deck_id] = deck
+        return found
+
+    def save_many(
+        self, decks: List[Deck], expected_revisions: Optional[Dict[str, int]] = None
+    ) -> List[Deck]:
+        """Сохраняет колоды; колоды, чья ревизия разошлась с
+        `expected_revisions`, пропускаются и в результат не попадают."""
+        expected_revisions = expected_revisions or {}
+        saved = []
+        for deck in decks:
+            try:
+                saved.append(self.save(deck, expected_revisions.get(deck.id)))
+            except ApiError as exc:
+                if exc.code != "precondition_failed":
+                    raise
+        return saved
+
+    def delete_many(self, deck_ids: Iterable[str]) -> List[Deck]:
+        """Удаляет колоды; возвращает те, что действительно были."""
+        found = self.get_many(deck_ids)
+        for deck_id in found:
+            self.delete(deck_id)
+        return list(found.values())
+
+    def suggest(
+        self, prefix: str, limit: int, owner_id: Optional[str] = None
+    ) -> List[Deck]:
+        raise NotImplementedError
+
+    def query(self, query: "DeckQuery") -> Tuple[List[Deck], int]:
+        raise NotImplementedError
+
+    def version(self, owner_id: Optional[str] = None) -> int:
+        """Счётчик изменений колод владельца (или всех колод, если None)."""
+        raise NotImplementedError
+
 
 class InMemoryDeckRepository(DeckRepository):
+    """Колоды в памяти со вторичными индексами.
+
+    Записи одной колоды сериализуются локом из полосы по id, изменения
+    индексов владельца и языка — локами по их ключу, сортированные индексы
+    защищены своими локами. Общего лока нет. Читатели не блокируются: они
+    обходят неизменяемые блоки индексов и снимки множеств, сделанные одной
+    C-операцией, а колоды, удалённые во время чтения, просто пропускают.
+    """
+
     def __init__(self):
         self._storage: Dict[str, Deck] = {}
+        self._version = 0
+        self._owner_versions: Dict[str, int] = {}
+        self._titles: Dict[str, str] = {}
+        self._inserted: Dict[str, int] = {}
+        self._sequence = count()
+        self._by_owner: Dict[str, Dict[str, None]] = {}
+        self._by_source_lang: Dict[str, Set[str]] = {}
+        self._by_target_lang: Dict[str, Set[str]] = {}
+        self._title_index = SortedKeyIndex()
+        self._owner_title_index: Dict[str, SortedKeyIndex] = {}
+        self._sort_indexes: Dict[str, SortedKeyIndex] = {
+            "inserted": SortedKeyIndex(),
+            "created_at": SortedKeyIndex(),
+            "updated_at": SortedKeyIndex(),
+            "title": self._title_index,
+        }
+        self._deck_locks = StripedLock()
+        self._owner_locks = StripedLock()
+        self._lang_locks = StripedLock(16)
+        self._version_lock = threading.Lock()
 
-    def save(self, deck: Deck) -> Deck:
-        self._storage[deck.id] = deck
+    @timed("decks", "save")
+    @traced("decks.save")
+    def save(self, deck: Deck, expected_revision: Optional[int] = None) -> Deck:
+        with self._deck_locks.for_key(deck.id):
+            if self._is_stale(deck.id, expected_revision):
+                raise stale_revision()
+            deck = self._store(deck)
+            self._bump_versions([deck.owner_id])
         return deck
 
+    @timed("decks", "save_many")
+    @traced("decks.save_many")
+    def save_many(
+        self, decks: List[Deck], expected_revisions: Optional[Dict[str, int]] = None
+    ) -> List[Deck]:
+        # Версии поднимаются один раз на пачку: кэш списков и ETag'и
+        # инвалидируются одним шагом, а не тысячей.
+        expected_revisions = expected_revisions or {}
+        stored = []
+        for deck in decks:
+            with self._deck_locks.for_key(deck.id):
+                if not self._is_stale(deck.id, expected_revisions.get(deck.id)):
+                    stored.append(self._store(deck))
+        self._bump_versions({deck.owner_id: None for deck in stored})
+        return stored
+
+    @timed("decks", "get")
+    @traced("decks.get")
     def get(self, deck_id: str) -> Optional[Deck]:
         return self._storage.get(deck_id)
 
+    def get_many(self, deck_ids: Iterable[str]) -> Dict[str, Deck]:
+        storage = self._storage
+        found = {}
+        for deck_id in deck_ids:
+            deck = storage.get(deck_id)
+            if deck is not None:
+                found[deck_id] = deck
+        return found
+
+    @timed("decks", "list_all")
+    @traced("decks.list_all")
     def list_all(self) -> List[Deck]:
         return list(self._storage.values())
 
+    @timed("decks", "delete")
+    @traced("decks.delete")
     def delete(self, deck_id: str) -> None:
-        self._storage.pop(deck_id, None)
+        with self._deck_locks.for_key(deck_id):
+            deck = self._remove(deck_id)
+            if deck is not None:
+                self._bump_versions([deck.owner_id])
+
+    @timed("decks", "delete_many")
+    @traced("decks.delete_many")
+    def delete_many(self, deck_ids: Iterable[str]) -> List[Deck]:
+        deleted = []
+        for deck_id in deck_ids:
+            with self._deck_locks.for_key(deck_id):
+                deck = self._remove(deck_id)
+            if deck is not None:
+                deleted.append(deck)
+        self._bump_versions({deck.owner_id: None for deck in deleted})
+        return deleted
+
+    def memory_stores(self) -> Dict[str, object]:
+        return {
+            "decks.storage": self._storage,
+            "decks.titles": self._titles,
+            "decks.by_owner": self._by_owner,
+            "decks.by_source_lang": self._by_source_lang,
+            "decks.by_target_lang": self._by_target_lang,
+            "decks.sort_indexes": self._sort_indexes,
+            "decks.owner_title_index": self._owner_title_index,
+        }
+
+    def version(self, owner_id: Optional[str] = None) -> int:
+        if owner_id is None:
+            return self._version
+        return self._owner_versions.get(owner_id, 0)
+
+    @timed("decks", "suggest")
+    @traced("decks.suggest")
+    def suggest(
+        self, prefix: str, limit: int, owner_id: Optional[str] = None
+    ) -> List[Deck]:
+        if owner_id is None:
+            index = self._title_index
+        else:
+            index = self._owner_title_index.get(owner_id)
+            if index is None:
+                return []
+        return self._fetch(index.prefix(prefix, limit))
+
+    @timed("decks", "query")
+    @traced("decks.query")
+    def query(self, query: DeckQuery) -> Tuple[List[Deck], int]:
+        sort_key = query.sort.lstrip("-") if query.sort else "inserted"
+        reverse = bool(query.sort) and query.sort.startswith("-")
+        order = self._sort_indexes[sort_key]
+
+        candidates = self._candidates(query)
+        if candidates is None:
+            total = len(self._storage)
+            page = islice(order.iter_from(query.offset, reverse=reverse), query.limit)
+            return self._fetch(deck_id for _, deck_id in page), total
+
+        total = len(candidates)
+        window = query.offset + query.limit
+        # Обход индекса по порядку окупается, пока ожидаемое число шагов до
+        # конца страницы меньше, чем сортировка самой выборки.
+        if total and window * len(order) <= total * total * 4:
+            matches = (
+                deck_id
+                for _, deck_id in (reversed(order) if reverse else iter(order))
+                if deck_id in candidates
+            )
+            page_ids = list(islice(matches, query.offset, window))
+        else:
+            keyed = []
+            for deck_id in tuple(candidates):
+                value = self._sort_value(sort_key, deck_id)
+                if value is not None:  # колоду удалили во время чтения
+                    keyed.append((value, deck_id))
+            keyed.sort(reverse=reverse)
+            page_ids = [deck_id for _, deck_id in keyed[query.offset : window]]
+        return self._fetch(page_ids), total
+
+    def _fetch(self, deck_ids: Iterable[str]) -> List[Deck]:
+        storage = self._storage
+        return [deck for deck in map(storage.get, deck_ids) if deck is not None]
+
+    def _candidates(self, query: DeckQuery) -> Optional[Collection[str]]:
+        """Пересекает вторичные индексы; None означает «все колоды»."""
+        sources: List[Collection[str]] = []
+        if query.owner_id is not None:
+            sources.append(self._by_owner.get(query.owner_id, {}))
+        if query.source_lang is not None:
+            sources.append(self._by_source_lang.get(query.source_lang, set()))
+        if query.target_lang is not None:
+            sources.append(self._by_target_lang.get(query.target_lang, set()))
+        if not sources and not query.title_contains:
+            return None
+
+        candidates: Collection[str]
+        if len(sources) == 1:
+            candidates = sources[0]
+        elif sources:
+            sources.sort(key=len)
+            candidates = set(sources[0]).intersection(*sources[1:])
+        else:
+            candidates = self._titles
+        if query.title_contains:
+            needle = normalize_title(query.title_contains)
+            titles = self._titles
+            # tuple() снимает копию за одну C-операцию: параллельная запись не
+            # изменит множество посреди обхода.
+            candidates = {
+                deck_id
+                for deck_id in tuple(candidates)
+                if needle in titles.get(deck_id, "")
+            }
+        return candidates
+
+    def _sort_value(self, sort_key: str, deck_id: str):
+        if sort_key == "inserted":
+            return self._inserted.get(deck_id)
+        if sort_key == "title":
+            return self._titles.get(deck_id)
+        deck = self._storage.get(deck_id)
+        return None if deck is None else getattr(deck, sort_key)
+
+    def _is_stale(self, deck_id: str, expected_revision: Optional[int]) -> bool:
+        """Ревизия колоды разошлась с ожидаемой; вызывается под локом колоды."""
+        if expected_revision is None:
+            return False
+        previous = self._storage.get(deck_id)
+        return previous is None or previous.revision != expected_revision
+
+    def _store(self, deck: Deck) -> Deck:
+        """Запись колоды и индексов; вызывается под локом колоды.
+
+        Возвращает сохранённую колоду со следующим номером ревизии.
+        """
+        previous = self._storage.get(deck.id)
+        deck = replace(deck, revision=previous.revision + 1 if previous else 1)
+        self._storage[deck.id] = deck
+        if previous is None:
+            seq = next(self._sequence)
+            self._inserted[deck.id] = seq
+            self._sort_indexes["inserted"].add(seq, deck.id)
+            with self._owner_locks.for_key(deck.owner_id):
+                self._by_owner.setdefault(deck.owner_id, {})[deck.id] = None
+            self._index(deck)
+        else:
+            self._reindex(previous, deck)
+        return deck
+
+    def _remove(self, deck_id: str) -> Optional[Deck]:
+        """Удаление колоды и её индексов; вызывается под локом колоды."""
+        deck = self._storage.pop(deck_id, None)
+        if deck is None:
+            return None
+        self._unindex(deck)
+        seq = self._inserted.pop(deck_id)
+        self._sort_indexes["inserted"].remove(seq, deck_id)
+        with self._owner_locks.for_key(deck.owner_id):
+            _discard_key(self._by_owner, deck.owner_id, deck_id)
+        return deck
+
+    def _bump_versions(self, owner_ids: Iterable[str]) -> None:
+        # Версии идут в ETag, поэтому инкремент не должен теряться.
+        with self._version_lock:
+            self._version += 1
+            for owner_id in owner_ids:
+                self._owner_versions[owner_id] = (
+                    self._owner_versions.get(owner_id, 0) + 1
+                )
+
+    def _index(self, deck: Deck) -> None:
+        title = normalize_title(deck.title)
+        self._titles[deck.id] = title
+        self._title_index.add(title, deck.id)
+        with self._owner_locks.for_key(deck.owner_id):
+            self._owner_title_index.setdefault(deck.owner_id, SortedKeyIndex()).add(
+                title, deck.id
+            )
+        self._sort_indexes["created_at"].add(deck.created_at, deck.id)
+        self._sort_indexes["updated_at"].add(deck.updated_at, deck.id)
+        with self._lang_locks.for_key(deck.source_lang):
+            self._by_source_lang.setdefault(deck.source_lang, set()).add(deck.id)
+        with self._lang_locks.for_key(deck.target_lang):
+            self._by_target_lang.setdefault(deck.target_lang, set()).add(deck.id)
+
+    def _unindex(self, deck: Deck) -> None:
+        title = self._titles.pop(deck.id)
+        self._title_index.remove(title, deck.id)
+        with self._owner_locks.for_key(deck.owner_id):
+            owner_index = self._owner_title_index.get(deck.owner_id)
+            if owner_index is not None:
+                owner_index.remove(title, deck.id)
+                if not len(owner_index):
+                    del self._owner_title_index[deck.owner_id]
+        self._sort_indexes["created_at"].remove(deck.created_at, deck.id)
+        self._sort_indexes["updated_at"].remove(deck.updated_at, deck.id)
+        with self._lang_locks.for_key(deck.source_lang):
+            _discard(self._by_source_lang, deck.source_lang, deck.id)
+        with self._lang_locks.for_key(deck.target_lang):
+            _discard(self._by_target_lang, deck.target_lang, deck.id)
+
+    def _reindex(self, previous: Deck, deck: Deck) -> None:
+        if previous.owner_id != deck.owner_id:
+            with self._owner_locks.for_key(previous.owner_id):
+                _discard_key(self._by_owner, previous.owner_id, deck.id)
+            with self._owner_locks.for_key(deck.owner_id):
+                self._by_owner.setdefault(deck.owner_id, {})[deck.id] = None
+        self._unindex(previous)
+        self._index(deck)
+
+
+def _journaled(journal: Optional[Journal], kind: int, *fields: str):
+    """Контекст записи в WAL; без журнала ничего не делает."""
+    if journal is None:
+        return nullcontext()
+    return journal.append(kind, *fields)
+
+
+def _discard(index: Dict[str, Set[str]], key: str, deck_id: str) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(deck_id)
+        if not ids:
+            del index[key]
+
+
+def _discard_key(index: Dict[str, Dict[str, None]], key: str, deck_id: str) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.pop(deck_id, None)
+        if not ids:
+            del index[key]
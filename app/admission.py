@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Callable, Dict, FrozenSet, Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.errors import problem_response
+from app.metrics import REGISTRY
+
+# Доля лимита, доступная классу запросов: при перегрузке первыми
+# отсекаются загрузки и пакетные запросы, затем записи, и только потом
+# чтения авторизованных пользователей.
+PRIORITY_SHARES: Dict[str, float] = {"read": 1.0, "write": 0.75, "bulk": 0.5}
+
+# Тело больше этого считается загрузкой.
+UPLOAD_MIN_BYTES = 64 * 1024
+
+ADMISSION_SHED = REGISTRY.counter(
+    "admission_shed_total",
+    "Requests rejected with 503 by admission control.",
+    ("priority",),
+)
+
+
+class AdaptiveLimit:
+    """Лимит одновременных запросов по алгоритму AIMD.
+
+    Запрос быстрее `target_latency` увеличивает лимит на 1/limit (примерно +1
+    за «окно» из limit запросов), медленный или завершившийся 5xx — умножает
+    его на `backoff`, но не чаще раза за `target_latency`, чтобы одна волна
+    медленных ответов не обрушила лимит до минимума. Лимит растёт, только
+    когда занят хотя бы наполовину: при слабой нагрузке задержка ничего не
+    говорит о пропускной способности.
+
+    Вызывается только из event loop, поэтому без блокировок.
+    """
+
+    def __init__(
+        self,
+        initial: int = 64,
+        *,
+        min_limit: int = 4,
+        max_limit: int = 1024,
+        target_latency: float = 0.25,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = perf_counter,
+    ):
+        if not 0 < min_limit <= initial <= max_limit:
+            raise ValueError("expected 0 < min_limit <= initial <= max_limit")
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._min = float(min_limit)
+        self._max = float(max_limit)
+        self._target = target_latency
+        self._backoff = backoff
+        self._clock = clock
+        self._last_decrease = float("-inf")
+
+    def try_acquire(self, share: float = 1.0) -> bool:
+        if self.in_flight >= max(1, int(self.limit * share)):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        busy = self.in_flight * 2 >= self.limit
+        self.in_flight -= 1
+        if failed or latency > self._target:
+            now = self._clock()
+            if now - self._last_decrease >= self._target:
+                self.limit = max(self._min, self.limit * self._backoff)
+                self._last_decrease = now
+        elif busy:
+            self.limit = min(self._max, self.limit + 1 / self.limit)
+
+
+def request_priority(scope: Scope) -> str:
+    path = scope["path"]
+    headers = Headers(scope=scope)
+    if path.endswith(":bulk") or path == "/api/v1/batch":
+        return "bulk"
+    if headers.get("content-type", "").startswith("multipart/"):
+        return "bulk"
+    length = headers.get("content-length", "")
+    if length.isdigit() and int(length) > UPLOAD_MIN_BYTES:
+        return "bulk"
+    if scope["method"] in ("GET", "HEAD") and "authorization" in headers:
+        return "read"
+    return "write"
+
+
+class AdmissionMiddleware:
+    """ASGI-middleware адаптивного контроля допуска.
+
+    Запрос сверх доли лимита своего приоритета сразу получает 503 с
+    Retry-After вместо ожидания в очереди threadpool: под перегрузкой часть
+    клиентов быстро получает отказ, остальные — обычную задержку. Пути из
+    `exempt` (health-check, метрики, долгие SSE-соединения, профилировщик)
+    не учитываются.
+
+    Задержка для AIMD — до начала ответа: время отправки тела медленному
+    клиенту не говорит о загрузке сервера. Слот держится до конца ответа.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: AdaptiveLimit,
+        *,
+        retry_after: int = 1,
+        exempt: Iterable[str] = (),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.retry_after = retry_after
+        self.exempt: FrozenSet[str] = frozenset(exempt)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+        priority = request_priority(scope)
+        if not self.limiter.try_acquire(PRIORITY_SHARES[priority]):
+            ADMISSION_SHED.inc((priority,))
+            response = problem_response(
+                request=Request(scope),
+                status_code=503,
+                title="Service overloaded",
+                detail="server is overloaded, retry later",
+                type_="error:overloaded",
+                code="overloaded",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        latency: Optional[float] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, latency
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                latency = perf_counter() - started
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if latency is None:
+                latency = perf_counter() - started
+            self.limiter.release(latency, failed=status_code >= 500)
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote, urlsplit
+
+import anyio
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.types import ASGIApp, Message, Scope
+
+from app.errors import build_problem
+
+logger = logging.getLogger("app.batch")
+
+# Методы без побочных эффектов выполняются параллельно; остальные — барьеры.
+SAFE_METHODS = frozenset({"GET"})
+# Заголовки родительского запроса, которые не переносятся в подзапросы: тело
+# у подзапроса своё, а сжатие ответа для него бессмысленно.
+_DROPPED_HEADERS = frozenset(
+    {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding"}
+)
+# Ключ в request.state подзапроса с уже аутентифицированным пользователем.
+BATCH_USER_STATE = "batch_user"
+# Символы строки запроса, которые передаются как есть; остальное (пробелы,
+# не-ASCII) кодируется процентами, как это сделал бы клиент.
+_QUERY_SAFE = "!$%&'()*+,/:;=?@[]~"
+
+
+def route_path(path: str) -> str:
+    """Путь подзапроса в том виде, в каком его сопоставит роутер."""
+    return unquote(urlsplit(path).path)
+
+
+@dataclass(frozen=True)
+class SubRequest:
+    id: Optional[str]
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: Optional[bytes]
+
+
+@dataclass(frozen=True)
+class SubResponse:
+    id: Optional[str]
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+class BatchDispatcher:
+    """Выполняет подзапросы пакета внутри процесса, прямо на роутере приложения.
+
+    Подзапрос не проходит внешние middleware (CORS, gzip, журнал, метрики):
+    всё это уже сделано один раз для самого пакета. Обработчики исключений
+    приложения подключены, поэтому ошибки подзапросов возвращаются тем же
+    RFC 7807-телом, что и у обычного запроса. Пользователь, определённый для
+    пакета, передаётся подзапросам через request.state.
+
+    Подряд идущие GET выполняются конкурентно, запись ждёт завершения
+    предыдущих подзапросов и сама выполняется до следующих — порядок записей
+    и чтений относительно них сохраняется.
+
+    Подзапрос ограничен по времени (`timeout`, иначе 504) и по размеру тела
+    ответа (`max_body_bytes`, иначе 502). Потоковый ответ (text/event-stream)
+    в пакете не имеет конца: подзапрос отключается сразу и получает 502.
+    """
+
+    def __init__(
+        self, app: ASGIApp, timeout: float = 10.0, max_body_bytes: int = 4 * 1024 * 1024
+    ):
+        self._app = app
+        self._timeout = timeout
+        self._max_body_bytes = max_body_bytes
+        self._inner: Optional[ASGIApp] = None
+
+    async def run(
+        self, scope: Scope, user: Any, requests: List[SubRequest]
+    ) -> List[SubResponse]:
+        responses: List[Optional[SubResponse]] = [None] * len(requests)
+
+        async def run_one(index: int) -> None:
+            responses[index] = await self._dispatch(scope, user, requests[index])
+
+        for group in _groups(requests):
+            if len(group) == 1:
+                await run_one(group[0])
+                continue
+            async with anyio.create_task_group() as tasks:
+                for index in group:
+                    tasks.start_soon(run_one, index)
+        return responses
+
+    async def _dispatch(
+        self, parent: Scope, user: Any, request: SubRequest
+    ) -> SubResponse:
+        try:
+            scope = _scope(parent, user, request)
+        except UnicodeEncodeError:
+            return _problem(
+                request,
+                400,
+                "Bad request",
+                "sub-request headers must be latin-1",
+                "invalid_batch",
+            )
+        body = request.body or b""
+        sent = False
+        finished = anyio.Event()
+        status = 500
+        response_headers: List[Tuple[str, str]] = []
+        chunks: List[bytes] = []
+        size = 0
+        # Код ошибки, из-за которой ответ подзапроса отброшен.
+        aborted: Optional[str] = None
+
+        async def receive() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Подзапрос «отключается» только после того, как ответ отправлен.
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        def abort(code: str) -> None:
+            nonlocal aborted
+            aborted = code
+            chunks.clear()
+            # Отключение клиента: потоковый ответ останавливается сам.
+            finished.set()
+
+        async def send(message: Message) -> None:
+            nonlocal status, size
+            if aborted is not None:
+                return
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.extend(
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", ())
+                    if name != b"content-length"
+                )
+                for name, value in response_headers:
+                    if name == "content-type" and value.startswith("text/event-stream"):
+                        abort("streaming_not_supported")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > self._max_body_bytes:
+                    abort("response_too_large")
+                    return
+                chunks.append(chunk)
+                if not message.get("more_body", False):
+                    finished.set()
+
+        try:
+            with anyio.fail_after(self._timeout):
+                await self._stack()(scope, receive, send)
+        except TimeoutError:
+            return _problem(request, 504, "Gateway timeout", "sub-request timed out")
+        except Exception:  # noqa: BLE001 - сбой одного подзапроса не роняет пакет
+            logger.exception(
+                "batch sub-request failed",
+                extra={"method": request.method, "path": scope["path"]},
+            )
+            return _problem(request, 500, "Internal error", "sub-request failed")
+        finally:
+            finished.set()
+        if aborted == "streaming_not_supported":
+            return _problem(
+                request,
+                502,
+                "Bad gateway",
+                "streaming responses cannot be batched",
+                aborted,
+            )
+        if aborted == "response_too_large":
+            return _problem(
+                request,
+                502,
+                "Bad gateway",
+                f"response exceeds {self._max_body_bytes} bytes",
+                aborted,
+            )
+        return SubResponse(
+            id=request.id,
+            status=status,
+            headers=response_headers,
+            body=b"".join(chunks),
+        )
+
+    def _stack(self) -> ASGIApp:
+        # Роутер с обработчиками исключений приложения — внутренняя часть
+        # стека Starlette, без пользовательских middleware. Собирается при
+        # первом пакете, когда все обработчики уже зарегистрированы.
+        if self._inner is None:
+            self._inner = ExceptionMiddleware(
+                self._app.router, handlers=self._app.exception_handlers
+            )
+        return self._inner
+
+
+def _scope(parent: Scope, user: Any, request: SubRequest) -> Scope:
+    """ASGI-scope подзапроса: заголовки родителя, поверх них — свои."""
+    url = urlsplit(request.path)
+    headers = [
+        (name, value)
+        for name, value in parent["headers"]
+        if name not in _DROPPED_HEADERS
+    ]
+    for name, value in request.headers.items():
+        key = name.lower().encode("latin-1")
+        if key not in _DROPPED_HEADERS:
+            headers = [item for item in headers if item[0] != key]
+            headers.append((key, value.encode("latin-1")))
+    body = request.body or b""
+    if request.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    return {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": request.method,
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": route_path(request.path),
+        "raw_path": url.path.encode("utf-8"),
+        "query_string": quote(url.query, safe=_QUERY_SAFE).encode("ascii"),
+        "headers": headers,
+        "app": parent["app"],
+        "state": {**parent.get("state", {}), BATCH_USER_STATE: user},
+    }
+
+
+_CODES = {500: "internal_error", 504: "timeout"}
+
+
+def _problem(
+    request: SubRequest,
+    status: int,
+    title: str,
+    detail: str,
+    code: Optional[str] = None,
+) -> SubResponse:
+    problem = build_problem(
+        status_code=status,
+        title=title,
+        detail=detail,
+        instance=request.path,
+        code=code or _CODES[status],
+    )
+    return SubResponse(
+        id=request.id,
+        status=status,
+        headers=[("content-type", "application/json")],
+        body=json.dumps(problem).encode("utf-8"),
+    )
+
+
+def merge_headers(headers: List[Tuple[str, str]]) -> Dict[str, Union[str, List[str]]]:
+    """Заголовки ответа словарём; повторяющиеся (Set-Cookie) — списком."""
+    merged: Dict[str, Union[str, List[str]]] = {}
+    for name, value in headers:
+        previous = merged.get(name)
+        if previous is None:
+            merged[name] = value
+        elif isinstance(previous, list):
+            previous.append(value)
+        else:
+            merged[name] = [previous, value]
+    return merged
+
+
+def dump_batch_envelope(responses: List[SubResponse]) -> bytes:
+    """JSON-тело `BatchEnvelope`; JSON-ответы вставляются как есть, без
+    повторного разбора и кодирования."""
+    items = []
+    for response in responses:
+        headers = merge_headers(response.headers)
+        content_type = headers.get("content-type", "")
+        if isinstance(content_type, list):
+            content_type = content_type[0]
+        if not response.body:
+            body = b"null"
+        elif _is_json(content_type):
+            body = response.body
+        else:
+            body = json.dumps(response.body.decode("utf-8", "replace")).encode("utf-8")
+        head = json.dumps(
+            {"id": response.id, "status": response.status, "headers": headers},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        items.append(head[:-1] + b',"body":' + body + b"}")
+    return b'{"responses":[' + b",".join(items) + b"]}"
+
+
+def _is_json(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def _groups(requests: List[SubRequest]) -> List[List[int]]:
+    """Разбивает пакет на группы: серии чтений и одиночные записи."""
+    groups: List[List[int]] = []
+    for index, request in enumerate(requests):
+        if request.method in SAFE_METHODS and groups:
+            last = groups[-1]
+            if requests[last[0]].method in SAFE_METHODS:
+                last.append(index)
+                continue
+        groups.append([index])
+    return groups
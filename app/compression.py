@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.shared.etag import gzip_etag
+
+# Уже сжатые или потоковые форматы, которые повторно не жмём.
+SKIP_CONTENT_TYPES: Tuple[str, ...] = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "text/event-stream",
+)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Проверяет Accept-Encoding с учётом явного отказа `gzip;q=0`.
+
+    Явно названный gzip важнее `*`, независимо от порядка: `*;q=0, gzip`
+    разрешает сжатие, `gzip;q=0, *` — нет.
+    """
+    if not accept_encoding:
+        return False
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.replace(" ", "").lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    quality = qualities.get("gzip", qualities.get("*", 0.0))
+    return quality > 0
+
+
+def gzip_bytes(body: bytes, level: int) -> bytes:
+    # mtime=0 делает результат детерминированным для одинаковых тел.
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class GzipMiddleware:
+    """ASGI-middleware сжатия ответов gzip по Accept-Encoding.
+
+    Маленькие тела (меньше `minimum_size`), ответы с уже заданным
+    Content-Encoding и сжатые медиатипы проходят как есть. Потоковые ответы
+    сжимаются по частям с Z_SYNC_FLUSH, чтобы клиент получал данные сразу.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not accepts_gzip(
+            Headers(scope=scope).get("accept-encoding")
+        ):
+            await self.app(scope, receive, send)
+            return
+        responder = _GzipResponder(send, self.minimum_size, self.compresslevel)
+        await self.app(scope, receive, responder.send)
+
+
+class _GzipResponder:
+    def __init__(self, send: Send, minimum_size: int, compresslevel: int):
+        self._send = send
+        self._minimum_size = minimum_size
+        self._compresslevel = compresslevel
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or _skip_media(headers.get("content-type", ""))
+            )
+            if not self._passthrough:
+                MutableHeaders(raw=message["headers"]).add_vary_header(
+                    "Accept-Encoding"
+                )
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            await self._first_body(start, message)
+            return
+        if self._compressor is None:
+            await self._send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        chunks: List[bytes] = [self._compressor.compress(message.get("body", b""))]
+        chunks.append(
+            self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        )
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": b"".join(chunks),
+                "more_body": more_body,
+            }
+        )
+
+    async def _first_body(self, start: Message, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._passthrough or (not more_body and len(body) < self._minimum_size):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = "gzip"
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # Сжатое тело — другое представление: сильный ETag у него свой.
+            headers["ETag"] = gzip_etag(etag)
+        if not more_body:
+            compressed = gzip_bytes(body, self._compresslevel)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        del headers["Content-Length"]
+        self._compressor = zlib.compressobj(self._compresslevel, zlib.DEFLATED, 31)
+        chunk = self._compressor.compress(body) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        await self._send(start)
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": True}
+        )
+
+
+def _skip_media(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return any(content_type.startswith(prefix) for prefix in SKIP_CONTENT_TYPES)
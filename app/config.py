@@ -35,6 +35,143 @@ class Settings:
         "text/csv",
         "application/json",
     )
+    response_cache_max_entries: int = field(
+        default_factory=lambda: int(os.getenv("APP_RESPONSE_CACHE_MAX_ENTRIES", "4096"))
+    )
+    response_cache_max_bytes: int = field(
+        default_factory=lambda: int(
+            os.getenv("APP_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+        )
+    )
+    gzip_minimum_size: int = field(
+        default_factory=lambda: int(os.getenv("APP_GZIP_MINIMUM_SIZE", "1024"))
+    )
+    gzip_compresslevel: int = field(
+        default_factory=lambda: int(os.getenv("APP_GZIP_COMPRESSLEVEL", "6"))
+    )
+    trace_slow_ms: float = field(
+        default_factory=lambda: float(os.getenv("APP_TRACE_SLOW_MS", "250"))
+    )
+    trace_file: str = field(default_factory=lambda: os.getenv("APP_TRACE_FILE", ""))
+    request_profiling_enabled: bool = field(
+        default_factory=lambda: os.getenv("APP_REQUEST_PROFILING", "").lower()
+        in ("1", "true", "yes")
+    )
+    # Значение X-Profile, при котором запрос профилируется; пусто — никогда.
+    request_profiling_secret: str = field(
+        default_factory=lambda: os.getenv("APP_REQUEST_PROFILING_SECRET", "")
+    )
+    # Максимум элементов в одном запросе /api/v1/decks:bulk.
+    bulk_max_items: int = field(
+        default_factory=lambda: int(os.getenv("APP_BULK_MAX_ITEMS", "1000"))
+    )
+    # Максимум подзапросов в одном POST /api/v1/batch.
+    batch_max_requests: int = field(
+        default_factory=lambda: int(os.getenv("APP_BATCH_MAX_REQUESTS", "20"))
+    )
+    # Время и размер тела ответа одного подзапроса пакета.
+    batch_sub_request_timeout_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("APP_BATCH_SUB_REQUEST_TIMEOUT_SECONDS", "10")
+        )
+    )
+    batch_max_response_bytes: int = field(
+        default_factory=lambda: int(
+            os.getenv("APP_BATCH_MAX_RESPONSE_BYTES", str(4 * 1024 * 1024))
+        )
+    )
+    # Журнал изменений для /api/v1/sync: сколько хранить надгробия удалений.
+    sync_tombstone_ttl_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("APP_SYNC_TOMBSTONE_TTL_SECONDS", str(30 * 24 * 3600))
+        )
+    )
+    sync_max_tombstones: int = field(
+        default_factory=lambda: int(os.getenv("APP_SYNC_MAX_TOMBSTONES", "10000"))
+    )
+    # Интервал пинга простаивающих SSE-соединений.
+    sse_heartbeat_seconds: float = field(
+        default_factory=lambda: float(os.getenv("APP_SSE_HEARTBEAT_SECONDS", "15"))
+    )
+    # Адаптивный лимит одновременных запросов (AIMD по задержке).
+    admission_initial_limit: int = field(
+        default_factory=lambda: int(os.getenv("APP_ADMISSION_INITIAL_LIMIT", "64"))
+    )
+    admission_min_limit: int = field(
+        default_factory=lambda: int(os.getenv("APP_ADMISSION_MIN_LIMIT", "4"))
+    )
+    admission_max_limit: int = field(
+        default_factory=lambda: int(os.getenv("APP_ADMISSION_MAX_LIMIT", "1024"))
+    )
+    admission_target_latency_ms: float = field(
+        default_factory=lambda: float(
+            os.getenv("APP_ADMISSION_TARGET_LATENCY_MS", "250")
+        )
+    )
+    admission_retry_after_seconds: int = field(
+        default_factory=lambda: int(os.getenv("APP_ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    )
+    # Лимиты на вход и регистрацию в формате "запросов/секунд".
+    rate_limit_login_per_ip: str = field(
+        default_factory=lambda: os.getenv("APP_RATE_LIMIT_LOGIN_PER_IP", "60/60")
+    )
+    rate_limit_login_per_email: str = field(
+        default_factory=lambda: os.getenv("APP_RATE_LIMIT_LOGIN_PER_EMAIL", "10/60")
+    )
+    rate_limit_register_per_ip: str = field(
+        default_factory=lambda: os.getenv("APP_RATE_LIMIT_REGISTER_PER_IP", "20/3600")
+    )
+    # Максимум отслеживаемых ключей на один лимит (LRU).
+    rate_limit_max_keys: int = field(
+        default_factory=lambda: int(os.getenv("APP_RATE_LIMIT_MAX_KEYS", "100000"))
+    )
+    # Сколько ждать чужого одинакового чтения, прежде чем выполнить своё.
+    singleflight_timeout_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("APP_SINGLEFLIGHT_TIMEOUT_SECONDS", "5")
+        )
+    )
+    # Фоновые задачи (/api/v1/jobs): воркеры, лимиты на пользователя, повторы.
+    jobs_workers: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_WORKERS", "2"))
+    )
+    jobs_per_user: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_PER_USER", "1"))
+    )
+    jobs_max_unfinished_per_user: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_MAX_UNFINISHED_PER_USER", "20"))
+    )
+    # Завершённые задачи с результатами: сколько хранить и как долго.
+    jobs_max_finished_per_user: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_MAX_FINISHED_PER_USER", "50"))
+    )
+    jobs_finished_ttl_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("APP_JOBS_FINISHED_TTL_SECONDS", "86400")
+        )
+    )
+    jobs_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_MAX_ATTEMPTS", "3"))
+    )
+    jobs_retry_delay_seconds: float = field(
+        default_factory=lambda: float(os.getenv("APP_JOBS_RETRY_DELAY_SECONDS", "1"))
+    )
+    jobs_max_import_items: int = field(
+        default_factory=lambda: int(os.getenv("APP_JOBS_MAX_IMPORT_ITEMS", "100000"))
+    )
+    # Отрисованные стороны карточек в LRU по (версия заметки, шаблон).
+    render_cache_max_entries: int = field(
+        default_factory=lambda: int(os.getenv("APP_RENDER_CACHE_MAX_ENTRIES", "65536"))
+    )
+    # Каталог WAL и снимков пользователей/сессий; пусто — хранение только в памяти.
+    data_dir: str = field(default_factory=lambda: os.getenv("APP_DATA_DIR", ""))
+    wal_fsync: bool = field(
+        default_factory=lambda: os.getenv("APP_WAL_FSYNC", "").lower()
+        in ("1", "true", "yes")
+    )
+    snapshot_every: int = field(
+        default_factory=lambda: int(os.getenv("APP_SNAPSHOT_EVERY", "100000"))
+    )
 
     def __repr__(self) -> str:
         """Маскирует секреты в строковом представлении."""
@@ -44,7 +181,45 @@ class Settings:
             f"admin_email='***', "
             f"cors_origins={self.cors_origins}, "
             f"max_upload_size_bytes={self.max_upload_size_bytes}, "
-            f"allowed_upload_content_types={self.allowed_upload_content_types}"
+            f"allowed_upload_content_types={self.allowed_upload_content_types}, "
+            f"response_cache_max_entries={self.response_cache_max_entries}, "
+            f"response_cache_max_bytes={self.response_cache_max_bytes}, "
+            f"gzip_minimum_size={self.gzip_minimum_size}, "
+            f"gzip_compresslevel={self.gzip_compresslevel}, "
+            f"request_profiling_enabled={self.request_profiling_enabled}, "
+            f"request_profiling_secret='***', "
+            f"trace_slow_ms={self.trace_slow_ms}, "
+            f"trace_file={self.trace_file!r}, "
+            f"data_dir={self.data_dir!r}, "
+            f"wal_fsync={self.wal_fsync}, "
+            f"snapshot_every={self.snapshot_every}, "
+            f"bulk_max_items={self.bulk_max_items}, "
+            f"batch_max_requests={self.batch_max_requests}, "
+            f"batch_sub_request_timeout_seconds="
+            f"{self.batch_sub_request_timeout_seconds}, "
+            f"batch_max_response_bytes={self.batch_max_response_bytes}, "
+            f"sync_tombstone_ttl_seconds={self.sync_tombstone_ttl_seconds}, "
+            f"sync_max_tombstones={self.sync_max_tombstones}, "
+            f"sse_heartbeat_seconds={self.sse_heartbeat_seconds}, "
+            f"admission_initial_limit={self.admission_initial_limit}, "
+            f"admission_min_limit={self.admission_min_limit}, "
+            f"admission_max_limit={self.admission_max_limit}, "
+            f"admission_target_latency_ms={self.admission_target_latency_ms}, "
+            f"admission_retry_after_seconds={self.admission_retry_after_seconds}, "
+            f"rate_limit_login_per_ip={self.rate_limit_login_per_ip!r}, "
+            f"rate_limit_login_per_email={self.rate_limit_login_per_email!r}, "
+            f"rate_limit_register_per_ip={self.rate_limit_register_per_ip!r}, "
+            f"rate_limit_max_keys={self.rate_limit_max_keys}, "
+            f"singleflight_timeout_seconds={self.singleflight_timeout_seconds}, "
+            f"jobs_workers={self.jobs_workers}, "
+            f"jobs_per_user={self.jobs_per_user}, "
+            f"jobs_max_unfinished_per_user={self.jobs_max_unfinished_per_user}, "
+            f"jobs_max_finished_per_user={self.jobs_max_finished_per_user}, "
+            f"jobs_finished_ttl_seconds={self.jobs_finished_ttl_seconds}, "
+            f"jobs_max_attempts={self.jobs_max_attempts}, "
+            f"jobs_retry_delay_seconds={self.jobs_retry_delay_seconds}, "
+            f"jobs_max_import_items={self.jobs_max_import_items}, "
+            f"render_cache_max_entries={self.render_cache_max_entries}"
             f")"
         )
 
@@ -2,10 +2,38 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
+# Общие экземпляры строк из intern_value. Не sys.intern: значения приходят
+# от клиентов, а интернированные строки на 3.12 не освобождаются никогда.
+_INTERNED: Dict[str, str] = {}
+INTERNED_MAX = 4096
 
-@dataclass(frozen=True)
+
+def intern_value(value: str) -> str:
+    """Общий экземпляр строки; когда таблица заполнена, новые значения
+    возвращаются как есть."""
+    shared = _INTERNED.get(value)
+    if shared is not None:
+        return shared
+    if len(_INTERNED) >= INTERNED_MAX:
+        return value
+    return _INTERNED.setdefault(value, value)
+
+
+def intern_fields(obj: object, *names: str) -> None:
+    """Интернирует строковые поля с малым числом значений (язык, роль, статус).
+
+    Строки из разобранного JSON — новые объекты на каждый запрос; после
+    интернирования все записи ссылаются на один экземпляр.
+    """
+    for name in names:
+        value = getattr(obj, name)
+        if type(value) is str:
+            object.__setattr__(obj, name, intern_value(value))
+
+
+@dataclass(frozen=True, slots=True)
 class User:
     id: str
     email: str
@@ -13,8 +41,11 @@ class User:
     locale: str
     proficiency_level: str
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "role", "locale", "proficiency_level")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Deck:
     id: str
     owner_id: str
@@ -24,9 +55,16 @@ class Deck:
     target_lang: str
     created_at: datetime
     updated_at: datetime
+    # У клона — колода, чьи заметки и карточки он разделяет.
+    source_deck_id: Optional[str] = None
+    # Номер сохранения: репозиторий увеличивает его при каждой записи колоды.
+    revision: int = 0
+
+    def __post_init__(self) -> None:
+        intern_fields(self, "source_lang", "target_lang")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Note:
     id: str
     deck_id: str
@@ -37,7 +75,7 @@ class Note:
     updated_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Card:
     id: str
     note_id: str
@@ -46,8 +84,11 @@ class Card:
     template_id: str
     created_at: datetime
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "card_type", "template_id")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class UserCardState:
     id: str
     user_id: str
@@ -62,3 +103,53 @@ class UserCardState:
     review_count: int
     success_count: int
     lapses_count: int
+
+    def __post_init__(self) -> None:
+        intern_fields(self, "status")
+
+
+@dataclass(frozen=True, slots=True)
+class CardTemplate:
+    """Шаблон сторон карточки; `{{Поле}}` подставляет поле заметки."""
+
+    id: str
+    front: str
+    back: str
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedCard:
+    id: str
+    note_id: str
+    template_id: str
+    front: str
+    back: str
+
+
+# Статусы фоновой задачи; последние три — конечные.
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+JOB_FINISHED = frozenset(JOB_STATUSES[2:])
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    id: str
+    owner_id: str
+    kind: str
+    params: Dict[str, Any]
+    priority: int
+    status: str
+    progress: float
+    attempts: int
+    max_attempts: int
+    result: Any
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    def __post_init__(self) -> None:
+        intern_fields(self, "kind", "status")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_FINISHED
@@ -90,6 +90,7 @@ def problem_response(
     code: Optional[str] = None,
     correlation_id: Optional[str] = None,
     extra: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
 ) -> JSONResponse:
     """Возвращает JSONResponse с объектом ошибки в формате problem details.
 
@@ -105,4 +106,4 @@ def problem_response(
         correlation_id=correlation_id,
         extra=extra,
     )
-    return JSONResponse(status_code=status_code, content=body)
+    return JSONResponse(status_code=status_code, content=body, headers=headers)
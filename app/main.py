@@ -2,43 +2,119 @@ from __future__ import annotations
 
 import json
 import logging
-import time
-from uuid import uuid4
-
-from fastapi import Depends, FastAPI, HTTPException, Request, Security, status
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import anyio
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.adapters.async_repositories import (
+    AsyncDeckRepository,
+    AsyncSessionStore,
+    AsyncUserRepository,
+)
+from app.adapters.changelog import ChangeLog, SyncExpiredError
+from app.adapters.jobs import SQLiteJobStore
+from app.adapters.journal import Journal
+from app.adapters.notes import InMemoryNoteRepository
 from app.adapters.repositories import (
+    DeckQuery,
     InMemoryDeckRepository,
     SessionStore,
     UserRepository,
+    stale_revision,
 )
+from app.admission import AdaptiveLimit, AdmissionMiddleware
+from app.batch import (
+    BATCH_USER_STATE,
+    BatchDispatcher,
+    SubRequest,
+    dump_batch_envelope,
+    route_path,
+)
+from app.compression import GzipMiddleware, accepts_gzip, gzip_bytes
 from app.config import settings
-from app.domain.models import Deck, User
+from app.domain.models import Deck, Job, User
 from app.errors import problem_response
+from app.memory import allocation_tracker, store_report
+from app.metrics import REGISTRY, MetricsMiddleware
+from app.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware
+from app.profiling import (
+    ProfilerBusyError,
+    ProfilingRoute,
+    collapse,
+    request_profiles,
+    sampling_profiler,
+)
 from app.schemas import (
+    BatchEnvelope,
+    BatchPayload,
+    DeckBulkCreatePayload,
+    DeckBulkDeletePayload,
+    DeckBulkEnvelope,
+    DeckBulkUpdatePayload,
     DeckCreatePayload,
     DeckEnvelope,
     DeckListEnvelope,
-    DeckListResponse,
+    DeckSuggestEnvelope,
+    DeckSuggestion,
     DeckUpdatePayload,
+    JobCreatePayload,
+    JobEnvelope,
     LoginPayload,
     RegisterPayload,
+    RenderedCardListEnvelope,
+    SyncEnvelope,
     TokenResponse,
     UserEnvelope,
     UserResponse,
-    deck_to_response,
 )
-from app.services.auth import AuthService
-from app.services.decks import DeckService
+from app.serialization import (
+    BulkResult,
+    dump_deck_bulk_envelope,
+    dump_deck_envelope,
+    dump_deck_list_envelope,
+    dump_job_envelope,
+    dump_rendered_cards_envelope,
+    dump_sync_envelope,
+)
+from app.services.auth import AsyncAuthService
+from app.services.decks import AsyncDeckService, DeckService
+from app.services.jobs import JobRunner, TooManyJobs, deck_job_kinds
+from app.services.notifications import sse_stream
+from app.services.rendering import BUILTIN_TEMPLATES, CardRenderer
+from app.shared.cache import ResponseCache
 from app.shared.errors import ApiError
+from app.shared.etag import (
+    deck_etag,
+    gzip_etag,
+    if_match,
+    if_none_match,
+    list_etag,
+    not_modified_etag,
+)
+from app.shared.pubsub import PubSub
+from app.shared.ratelimit import TokenBucketLimiter, parse_rate
+from app.tracing import span, tracer
 
 app = FastAPI(title="SecDev Course App", version="0.1.0")
+app.router.route_class = ProfilingRoute
 
 logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("app")
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,6 +123,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    GzipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compresslevel,
+)
 
 
 @app.exception_handler(ApiError)
@@ -58,6 +139,7 @@ async def api_error_handler(request: Request, exc: ApiError):
         detail=exc.message,
         type_=f"error:{exc.code}",
         code=exc.code,
+        headers=exc.headers,
     )
 
 
@@ -88,53 +170,194 @@ async def request_validation_handler(request: Request, exc: RequestValidationErr
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
-@app.middleware("http")
-async def request_logging_middleware(request: Request, call_next):
-    request_id = request.headers.get("X-Request-Id", str(uuid4()))
-    started = time.time()
-    response = await call_next(request)
-    duration_ms = int((time.time() - started) * 1000)
-    response.headers["X-Request-Id"] = request_id
-    logger.info(
-        json.dumps(
-            {
-                "ts": time.time(),
-                "level": "INFO",
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status": response.status_code,
-                "duration_ms": duration_ms,
-            }
-        )
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
     )
-    return response
 
 
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "no-referrer"
-    return response
+app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
 
 
-user_repo = UserRepository()
-session_store = SessionStore()
-auth_service = AuthService(user_repo=user_repo, sessions=session_store)
+EVENTS_PATH = "/api/v1/events"
+SAMPLING_PROFILE_PATH = "/api/v1/admin/profile"
+
+# Контроль допуска стоит перед остальными middleware: отказ под перегрузкой
+# не тратит время на логирование, трейсинг и заголовки.
+admission = AdaptiveLimit(
+    settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    target_latency=settings.admission_target_latency_ms / 1000,
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    limiter=admission,
+    retry_after=settings.admission_retry_after_seconds,
+    # Профилировщик держит запрос до минуты и обрушил бы лимит.
+    exempt=("/health", "/metrics", EVENTS_PATH, SAMPLING_PROFILE_PATH),
+)
+REGISTRY.callback_gauge(
+    "admission_limit",
+    "Current adaptive concurrency limit.",
+    lambda: [((), admission.limit)],
+)
+REGISTRY.callback_gauge(
+    "admission_in_flight",
+    "Requests admitted and not yet finished.",
+    lambda: [((), admission.in_flight)],
+)
+
+# Добавлен последним, значит внешний: учитывает время всех middleware.
+app.add_middleware(MetricsMiddleware)
+
+
+journal = (
+    Journal(
+        settings.data_dir,
+        fsync=settings.wal_fsync,
+        snapshot_every=settings.snapshot_every,
+    )
+    if settings.data_dir
+    else None
+)
+user_repo = UserRepository(journal=journal)
+session_store = SessionStore(journal=journal)
+if journal is not None:
+    journal.recover(user_repo, session_store)
+    app.router.add_event_handler("shutdown", journal.close)
+# Endpoint'ы асинхронные: хранилища в памяти отвечают прямо в event loop,
+# без диспетчеризации в threadpool и его лимита на число воркеров.
+auth_service = AsyncAuthService(
+    user_repo=AsyncUserRepository(user_repo),
+    sessions=AsyncSessionStore(session_store),
+)
 
 deck_repo = InMemoryDeckRepository()
-deck_service = DeckService(deck_repo=deck_repo)
+note_repo = InMemoryNoteRepository()
+card_renderer = CardRenderer(
+    BUILTIN_TEMPLATES, max_entries=settings.render_cache_max_entries
+)
+deck_service = AsyncDeckService(
+    deck_repo=AsyncDeckRepository(deck_repo),
+    flight_timeout=settings.singleflight_timeout_seconds,
+    note_repo=note_repo,
+    renderer=card_renderer,
+)
+# Синхронный сервис для воркеров фоновых задач; слушатели у обоих общие.
+job_deck_service = DeckService(deck_repo, note_repo=note_repo, renderer=card_renderer)
+
+deck_list_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+)
+
+
+def compress_body(body: bytes) -> bytes:
+    return gzip_bytes(body, settings.gzip_compresslevel)
+
+
+def invalidate_deck_lists(event: str, deck: Deck) -> None:
+    deck_list_cache.invalidate(deck.owner_id)
+    deck_list_cache.invalidate("*")
+
+
+for service in (deck_service, job_deck_service):
+    service.subscribe(invalidate_deck_lists)
+
+changelog = ChangeLog(
+    tombstone_ttl=settings.sync_tombstone_ttl_seconds,
+    max_tombstones=settings.sync_max_tombstones,
+)
+
+
+# Push-уведомления открытым SSE-соединениям (/api/v1/events).
+events = PubSub()
+
+
+def record_deck_change(event: str, deck: Deck) -> None:
+    seq = changelog.record(
+        deck.owner_id, "deck", deck.id, None if event == "deleted" else deck
+    )
+    op = "delete" if event == "deleted" else "upsert"
+    events.publish(deck.owner_id, "deck", {"seq": seq, "id": deck.id, "op": op})
+
+
+for service in (deck_service, job_deck_service):
+    service.subscribe(record_deck_change)
+
+
+def parse_deck_import(params: Dict[str, Any]) -> DeckBulkCreatePayload:
+    payload = DeckBulkCreatePayload.model_validate(params)
+    if len(payload.items) > settings.jobs_max_import_items:
+        raise ValueError(f"import is limited to {settings.jobs_max_import_items} decks")
+    return payload
+
+
+def get_job_owner(user_id: str) -> Optional[User]:
+    record = user_repo.get_by_id(user_id)
+    return record.to_user() if record is not None else None
+
+
+# Тяжёлые импорты и экспорты выполняются вне запроса, в своём пуле потоков.
+job_store = SQLiteJobStore(
+    os.path.join(settings.data_dir, "jobs.sqlite3") if settings.data_dir else ":memory:"
+)
+job_runner = JobRunner(
+    job_store,
+    deck_job_kinds(job_deck_service, get_job_owner, parse_deck_import),
+    workers=settings.jobs_workers,
+    per_user=settings.jobs_per_user,
+    max_unfinished=settings.jobs_max_unfinished_per_user,
+    max_finished=settings.jobs_max_finished_per_user,
+    finished_ttl=settings.jobs_finished_ttl_seconds,
+    max_attempts=settings.jobs_max_attempts,
+    retry_delay=settings.jobs_retry_delay_seconds,
+)
+app.router.add_event_handler("startup", job_runner.start)
+app.router.add_event_handler("shutdown", job_runner.stop)
+app.router.add_event_handler("shutdown", job_store.close)
+REGISTRY.callback_gauge(
+    "jobs",
+    "Background jobs not yet finished.",
+    lambda: [((state,), value) for state, value in job_runner.stats().items()],
+    labels=("status",),
+)
+
+
+REGISTRY.callback_gauge(
+    "sse_subscriptions",
+    "Open Server-Sent Events subscriptions.",
+    lambda: [((), events.stats()["subscriptions"])],
+)
+REGISTRY.callback_gauge(
+    "response_cache_bytes",
+    "Bytes held by the deck list response cache.",
+    lambda: [((), deck_list_cache.stats()["bytes"])],
+)
+REGISTRY.callback_gauge(
+    "response_cache_hit_ratio",
+    "Hit ratio of the deck list response cache.",
+    lambda: [((), deck_list_cache.stats()["hit_ratio"])],
+)
+REGISTRY.callback_gauge(
+    "render_cache_hit_ratio",
+    "Hit ratio of the rendered card cache.",
+    lambda: [((), card_renderer.stats()["hit_ratio"])],
+)
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+DECK_SORT_PATTERN = r"^-?(created_at|updated_at|title)$"
+
 
-def get_current_user(
+async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials | None = Security(bearer_scheme),
 ) -> User:
@@ -144,9 +367,32 @@ def get_current_user(
         token = credentials.credentials
     elif auth_header and auth_header.lower().startswith("bearer "):
         token = auth_header.split(" ", 1)[1].strip()
+    batch_user = getattr(request.state, BATCH_USER_STATE, None)
+    if batch_user is not None:
+        # Подзапрос пакета: пользователь уже определён для всего пакета.
+        return batch_user
     if not token:
         raise ApiError(code="unauthorized", message="missing bearer token", status=401)
-    return auth_service.get_user_by_token(token)
+    with span("get_current_user"):
+        return await auth_service.get_user_by_token(token)
+
+
+def json_bytes_response(
+    body: bytes, *, status_code: int = status.HTTP_200_OK, etag: Optional[str] = None
+) -> Response:
+    """Отдаёт уже закодированный JSON, минуя повторную валидацию response_model."""
+    headers = {"ETag": etag} if etag else None
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def not_modified(request: Request, etag: str) -> Response:
+    etag = not_modified_etag(request.headers["If-None-Match"], etag)
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
 
 def assert_owner_or_admin(user: User, deck: Deck) -> None:
@@ -154,16 +400,89 @@ def assert_owner_or_admin(user: User, deck: Deck) -> None:
         raise ApiError(code="forbidden", message="not your deck", status=403)
 
 
+def assert_admin(user: User) -> None:
+    if user.role != "admin":
+        raise ApiError(code="forbidden", message="admin only", status=403)
+
+
+def assert_bulk_size(count: int) -> None:
+    if count > settings.bulk_max_items:
+        raise ApiError(
+            code="too_many_items",
+            message=f"at most {settings.bulk_max_items} items per request",
+            status=413,
+        )
+
+
+def bulk_denials(
+    user: User, deck_ids: List[str], found: Dict[str, Deck]
+) -> List[Optional[BulkResult]]:
+    """Проверка assert_owner_or_admin для всей пачки за один проход.
+
+    Для каждого id — результат с ошибкой либо None, если операция разрешена.
+    Повтор id в одной пачке отклоняется: порядок применения не определён.
+    """
+    seen = set()
+    denials: List[Optional[BulkResult]] = []
+    for deck_id in deck_ids:
+        deck = found.get(deck_id)
+        if deck_id in seen:
+            denials.append((deck_id, 409, None, "duplicate"))
+        elif deck is None:
+            denials.append((deck_id, 404, None, "not_found"))
+        elif user.role != "admin" and deck.owner_id != user.id:
+            denials.append((deck_id, 403, None, "forbidden"))
+        else:
+            denials.append(None)
+        seen.add(deck_id)
+    return denials
+
+
+# Вход и регистрация дорогие (хэш пароля): ограничиваем по IP и по email.
+login_ip_limiter = TokenBucketLimiter(
+    *parse_rate(settings.rate_limit_login_per_ip),
+    max_keys=settings.rate_limit_max_keys,
+)
+login_email_limiter = TokenBucketLimiter(
+    *parse_rate(settings.rate_limit_login_per_email),
+    max_keys=settings.rate_limit_max_keys,
+)
+register_ip_limiter = TokenBucketLimiter(
+    *parse_rate(settings.rate_limit_register_per_ip),
+    max_keys=settings.rate_limit_max_keys,
+)
+RATE_LIMITED = REGISTRY.counter(
+    "rate_limited_total", "Requests rejected with 429 by rate limits.", ("limit",)
+)
+
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, name: str, key: str) -> None:
+    retry_after = limiter.acquire(key)
+    if retry_after:
+        RATE_LIMITED.inc((name,))
+        raise ApiError(
+            code="rate_limited",
+            message="too many requests, retry later",
+            status=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
 @app.post(
     "/api/v1/auth/register",
     status_code=status.HTTP_201_CREATED,
     response_model=UserEnvelope,
 )
-def register_endpoint(payload: RegisterPayload):
+async def register_endpoint(payload: RegisterPayload, request: Request):
+    enforce_rate_limit(register_ip_limiter, "register_ip", client_ip(request))
     role = "user"
     if settings.admin_email and payload.email.lower() == settings.admin_email.lower():
         role = "admin"
-    record = auth_service.register_user(
+    record = await auth_service.register_user(
         email=payload.email,
         password=payload.password,
         locale=payload.locale,
@@ -182,8 +501,12 @@ def register_endpoint(payload: RegisterPayload):
 
 
 @app.post("/api/v1/auth/login", response_model=TokenResponse)
-def login_endpoint(payload: LoginPayload):
-    token = auth_service.authenticate(email=payload.email, password=payload.password)
+async def login_endpoint(payload: LoginPayload, request: Request):
+    enforce_rate_limit(login_ip_limiter, "login_ip", client_ip(request))
+    enforce_rate_limit(login_email_limiter, "login_email", payload.email.lower())
+    token = await auth_service.authenticate(
+        email=payload.email, password=payload.password
+    )
     return TokenResponse(access_token=token)
 
 
@@ -192,57 +515,462 @@ def login_endpoint(payload: LoginPayload):
     status_code=status.HTTP_201_CREATED,
     response_model=DeckEnvelope,
 )
-def create_deck_endpoint(
-    payload: DeckCreatePayload, current_user: User = Depends(get_current_user)
+async def create_deck_endpoint(
+    payload: DeckCreatePayload,
+    current_user: User = Depends(get_current_user),
 ):
-    deck = deck_service.create_deck(owner=current_user, payload=payload)
-    return DeckEnvelope(deck=deck_to_response(deck))
+    deck = await deck_service.create_deck(owner=current_user, payload=payload)
+    return json_bytes_response(
+        dump_deck_envelope(deck),
+        status_code=status.HTTP_201_CREATED,
+        etag=deck_etag(deck),
+    )
 
 
 @app.get("/api/v1/decks", response_model=DeckListEnvelope)
-def list_decks_endpoint(
+async def list_decks_endpoint(
+    request: Request,
     limit: int = 20,
     offset: int = 0,
+    source_lang: Optional[str] = Query(None, min_length=2, max_length=8),
+    target_lang: Optional[str] = Query(None, min_length=2, max_length=8),
+    title: Optional[str] = Query(None, min_length=1, max_length=100),
+    sort: Optional[str] = Query(None, pattern=DECK_SORT_PATTERN),
     current_user: User = Depends(get_current_user),
 ):
     limit = max(1, min(limit, 100))
     offset = max(0, offset)
-    decks = deck_service.list_decks()
-    if current_user.role != "admin":
-        decks = [deck for deck in decks if deck.owner_id == current_user.id]
-    total = len(decks)
-    items = decks[offset : offset + limit]
-    return DeckListEnvelope(
-        decks=DeckListResponse(
-            items=[deck_to_response(deck) for deck in items],
-            limit=limit,
-            offset=offset,
-            total=total,
-        )
+    query = DeckQuery(
+        owner_id=None if current_user.role == "admin" else current_user.id,
+        source_lang=source_lang.lower() if source_lang else None,
+        target_lang=target_lang.lower() if target_lang else None,
+        title_contains=title,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+    )
+    scope = query.owner_id or "*"
+    version = await deck_service.list_version(query.owner_id)
+    etag = list_etag(scope, version, query)
+    if if_none_match(request.headers.get("If-None-Match"), etag):
+        return not_modified(request, etag)
+    cache_key = (scope, query, version)
+    body = deck_list_cache.get(cache_key)
+    if body is None:
+        items, total = await deck_service.query_decks(query)
+        body = dump_deck_list_envelope(items, limit=limit, offset=offset, total=total)
+        deck_list_cache.put(cache_key, scope, body)
+    if len(body) >= settings.gzip_minimum_size and accepts_gzip(
+        request.headers.get("Accept-Encoding")
+    ):
+        compressed = deck_list_cache.get_compressed(cache_key, compress_body)
+        if compressed is not None:
+            response = json_bytes_response(compressed, etag=gzip_etag(etag))
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+    return json_bytes_response(body, etag=etag)
+
+
+@app.get("/api/v1/decks/suggest", response_model=DeckSuggestEnvelope)
+async def suggest_decks_endpoint(
+    prefix: str = "",
+    limit: int = 10,
+    current_user: User = Depends(get_current_user),
+):
+    limit = max(1, min(limit, 50))
+    owner_id = None if current_user.role == "admin" else current_user.id
+    decks = await deck_service.suggest_decks(prefix[:100], limit, owner_id)
+    return DeckSuggestEnvelope(
+        suggestions=[DeckSuggestion(id=deck.id, title=deck.title) for deck in decks]
     )
 
 
 @app.get("/api/v1/decks/{deck_id}", response_model=DeckEnvelope)
-def get_deck_endpoint(deck_id: str, current_user: User = Depends(get_current_user)):
-    deck = deck_service.get_deck(deck_id)
+async def get_deck_endpoint(
+    deck_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    deck = await deck_service.get_deck(deck_id)
     assert_owner_or_admin(current_user, deck)
-    return DeckEnvelope(deck=deck_to_response(deck))
+    etag = deck_etag(deck)
+    if if_none_match(request.headers.get("If-None-Match"), etag):
+        return not_modified(request, etag)
+    return json_bytes_response(dump_deck_envelope(deck), etag=etag)
 
 
 @app.patch("/api/v1/decks/{deck_id}", response_model=DeckEnvelope)
-def update_deck_endpoint(
+async def update_deck_endpoint(
     deck_id: str,
     payload: DeckUpdatePayload,
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
-    deck = deck_service.get_deck(deck_id)
+    deck = await deck_service.get_deck(deck_id)
     assert_owner_or_admin(current_user, deck)
-    updated = deck_service.update_deck(deck, payload)
-    return DeckEnvelope(deck=deck_to_response(updated))
+    expected_revision = None
+    if request.headers.get("If-Match") is not None:
+        if not if_match(request.headers["If-Match"], deck_etag(deck)):
+            raise stale_revision()
+        # Проверка повторяется в хранилище под локом колоды: запись между
+        # чтением и сохранением тоже даст 412, а не потеряется.
+        expected_revision = deck.revision
+    updated = await deck_service.update_deck(deck, payload, expected_revision)
+    return json_bytes_response(dump_deck_envelope(updated), etag=deck_etag(updated))
 
 
 @app.delete("/api/v1/decks/{deck_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_deck_endpoint(deck_id: str, current_user: User = Depends(get_current_user)):
-    deck = deck_service.get_deck(deck_id)
+async def delete_deck_endpoint(
+    deck_id: str, current_user: User = Depends(get_current_user)
+):
+    deck = await deck_service.get_deck(deck_id)
     assert_owner_or_admin(current_user, deck)
-    deck_service.delete_deck(deck_id)
+    await deck_service.delete_deck(deck_id)
+
+
+@app.post(
+    "/api/v1/decks/{deck_id}:clone",
+    status_code=status.HTTP_201_CREATED,
+    response_model=DeckEnvelope,
+)
+async def clone_deck_endpoint(
+    deck_id: str, current_user: User = Depends(get_current_user)
+):
+    source = await deck_service.get_deck(deck_id)
+    assert_owner_or_admin(current_user, source)
+    # Клон не копирует заметки и карточки: они копируются при изменении.
+    deck = await deck_service.clone_deck(owner=current_user, source=source)
+    return json_bytes_response(
+        dump_deck_envelope(deck),
+        status_code=status.HTTP_201_CREATED,
+        etag=deck_etag(deck),
+    )
+
+
+@app.get(
+    "/api/v1/decks/{deck_id}/cards/rendered", response_model=RenderedCardListEnvelope
+)
+async def rendered_cards_endpoint(
+    deck_id: str, current_user: User = Depends(get_current_user)
+):
+    deck = await deck_service.get_deck(deck_id)
+    assert_owner_or_admin(current_user, deck)
+    # Клиент забирает колоду перед занятием; отрисовка остаётся в кэше.
+    return json_bytes_response(
+        dump_rendered_cards_envelope(deck_service.render_cards(deck))
+    )
+
+
+@app.post("/api/v1/decks:bulk", response_model=DeckBulkEnvelope)
+async def bulk_create_decks_endpoint(
+    payload: DeckBulkCreatePayload,
+    current_user: User = Depends(get_current_user),
+):
+    assert_bulk_size(len(payload.items))
+    decks = await deck_service.create_decks(owner=current_user, payloads=payload.items)
+    return json_bytes_response(
+        dump_deck_bulk_envelope((deck.id, 201, deck, None) for deck in decks)
+    )
+
+
+@app.patch("/api/v1/decks:bulk", response_model=DeckBulkEnvelope)
+async def bulk_update_decks_endpoint(
+    payload: DeckBulkUpdatePayload,
+    current_user: User = Depends(get_current_user),
+):
+    assert_bulk_size(len(payload.items))
+    deck_ids = [item.id for item in payload.items]
+    found = await deck_service.get_decks(deck_ids)
+    results = bulk_denials(current_user, deck_ids, found)
+    updates = []
+    expected_revisions = {}
+    for index, item in enumerate(payload.items):
+        if results[index] is not None:
+            continue
+        deck = found[item.id]
+        if not if_match(item.if_match, deck_etag(deck)):
+            results[index] = (item.id, 412, None, "precondition_failed")
+            continue
+        if item.if_match is not None:
+            expected_revisions[item.id] = deck.revision
+        updates.append((deck, item))
+    saved = {
+        deck.id: deck
+        for deck in await deck_service.update_decks(updates, expected_revisions)
+    }
+    for index, item in enumerate(payload.items):
+        if results[index] is None:
+            # Колоду изменили между проверкой If-Match и записью.
+            deck = saved.get(item.id)
+            results[index] = (
+                (item.id, 200, deck, None)
+                if deck is not None
+                else (item.id, 412, None, "precondition_failed")
+            )
+    return json_bytes_response(dump_deck_bulk_envelope(results))
+
+
+@app.delete("/api/v1/decks:bulk", response_model=DeckBulkEnvelope)
+async def bulk_delete_decks_endpoint(
+    payload: DeckBulkDeletePayload,
+    current_user: User = Depends(get_current_user),
+):
+    assert_bulk_size(len(payload.ids))
+    found = await deck_service.get_decks(payload.ids)
+    results = bulk_denials(current_user, payload.ids, found)
+    allowed = [
+        deck_id for deck_id, denial in zip(payload.ids, results) if denial is None
+    ]
+    deleted = {deck.id for deck in await deck_service.delete_decks(allowed)}
+    for index, deck_id in enumerate(payload.ids):
+        if results[index] is None:
+            # Колоду могли удалить параллельно между проверкой и удалением.
+            results[index] = (
+                (deck_id, 204, None, None)
+                if deck_id in deleted
+                else (deck_id, 404, None, "not_found")
+            )
+    return json_bytes_response(dump_deck_bulk_envelope(results))
+
+
+@app.get("/api/v1/sync", response_model=SyncEnvelope)
+async def sync_endpoint(
+    since: int = Query(0, ge=0),
+    limit: int = 500,
+    current_user: User = Depends(get_current_user),
+):
+    limit = max(1, min(limit, 1000))
+    try:
+        changes, next_seq, has_more = changelog.since(current_user.id, since, limit)
+    except SyncExpiredError:
+        raise ApiError(
+            code="sync_expired",
+            message="since is not in the change log; resync from 0",
+            status=410,
+        )
+    return json_bytes_response(
+        dump_sync_envelope(changes, next_seq=next_seq, has_more=has_more)
+    )
+
+
+@app.get(EVENTS_PATH, response_class=StreamingResponse)
+async def events_endpoint(current_user: User = Depends(get_current_user)):
+    return StreamingResponse(
+        sse_stream(events, current_user.id, settings.sse_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def assert_job_access(user: User, job: Optional[Job]) -> Job:
+    if job is None:
+        raise ApiError(code="not_found", message="job not found", status=404)
+    if user.role != "admin" and job.owner_id != user.id:
+        raise ApiError(code="forbidden", message="not your job", status=403)
+    return job
+
+
+@app.post(
+    "/api/v1/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=JobEnvelope
+)
+def create_job_endpoint(
+    payload: JobCreatePayload,
+    current_user: User = Depends(get_current_user),
+):
+    # Синхронные эндпоинты задач: разбор параметров (импорт до 100k колод) и
+    # запись в SQLite идут в пуле потоков, а не в цикле событий.
+    try:
+        job = job_runner.submit(
+            current_user.id, payload.kind, payload.params, payload.priority
+        )
+    except TooManyJobs:
+        raise ApiError(
+            code="too_many_jobs",
+            message=(
+                f"at most {settings.jobs_max_unfinished_per_user} "
+                "unfinished jobs per user"
+            ),
+            status=429,
+        )
+    except ValueError as exc:
+        raise ApiError(code="invalid_job", message=str(exc), status=422)
+    response = json_bytes_response(
+        dump_job_envelope(job), status_code=status.HTTP_202_ACCEPTED
+    )
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return response
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobEnvelope)
+def get_job_endpoint(job_id: str, current_user: User = Depends(get_current_user)):
+    job = assert_job_access(current_user, job_runner.get(job_id))
+    return json_bytes_response(dump_job_envelope(job))
+
+
+@app.post("/api/v1/jobs/{job_id}:cancel", response_model=JobEnvelope)
+def cancel_job_endpoint(job_id: str, current_user: User = Depends(get_current_user)):
+    assert_job_access(current_user, job_runner.get(job_id))
+    # Выполняющаяся задача останавливается на ближайшей проверке прогресса.
+    return json_bytes_response(dump_job_envelope(job_runner.cancel(job_id)))
+
+
+BATCH_PATH = "/api/v1/batch"
+# Пути, которые нельзя вызвать из пакета: вложенный пакет и бесконечный поток.
+UNBATCHABLE_PATHS = {BATCH_PATH: "nested batches", EVENTS_PATH: "event streams"}
+batch_dispatcher = BatchDispatcher(
+    app,
+    timeout=settings.batch_sub_request_timeout_seconds,
+    max_body_bytes=settings.batch_max_response_bytes,
+)
+
+
+@app.post(BATCH_PATH, response_model=BatchEnvelope)
+async def batch_endpoint(
+    payload: BatchPayload,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    if len(payload.requests) > settings.batch_max_requests:
+        raise ApiError(
+            code="too_many_items",
+            message=f"at most {settings.batch_max_requests} requests per batch",
+            status=413,
+        )
+    sub_requests = []
+    for item in payload.requests:
+        # Путь сверяется так же, как его потом разберёт диспетчер.
+        unbatchable = UNBATCHABLE_PATHS.get(route_path(item.path).rstrip("/"))
+        if unbatchable is not None:
+            raise ApiError(
+                code="invalid_batch", message=f"{unbatchable} are not allowed"
+            )
+        sub_requests.append(
+            SubRequest(
+                id=item.id,
+                method=item.method,
+                path=item.path,
+                headers=item.headers,
+                body=None if item.body is None else json.dumps(item.body).encode(),
+            )
+        )
+    responses = await batch_dispatcher.run(request.scope, current_user, sub_requests)
+    return json_bytes_response(dump_batch_envelope(responses))
+
+
+@app.get("/api/v1/admin/cache")
+def cache_stats_endpoint(current_user: User = Depends(get_current_user)):
+    assert_admin(current_user)
+    return {
+        "deck_lists": deck_list_cache.stats(),
+        "card_renders": card_renderer.stats(),
+    }
+
+
+@app.post(SAMPLING_PROFILE_PATH, response_class=PlainTextResponse)
+async def sampling_profile_endpoint(
+    seconds: float = Query(5.0, gt=0, le=60),
+    rate_hz: float = Query(100.0, gt=0, le=1000),
+    current_user: User = Depends(get_current_user),
+):
+    assert_admin(current_user)
+    try:
+        sampling_profiler.start(rate_hz)
+    except ProfilerBusyError:
+        raise ApiError(
+            code="conflict", message="profiler is already running", status=409
+        )
+    try:
+        await anyio.sleep(seconds)
+    finally:
+        samples = sampling_profiler.stop()
+    return PlainTextResponse(collapse(samples))
+
+
+@app.get("/api/v1/admin/profile/requests")
+def request_profiles_endpoint(current_user: User = Depends(get_current_user)):
+    assert_admin(current_user)
+    return {"profiles": request_profiles.list()}
+
+
+@app.get(
+    "/api/v1/admin/profile/requests/{request_id}", response_class=PlainTextResponse
+)
+def request_profile_endpoint(
+    request_id: str, current_user: User = Depends(get_current_user)
+):
+    assert_admin(current_user)
+    profile = request_profiles.get(request_id)
+    if profile is None:
+        raise ApiError(code="not_found", message="profile not found", status=404)
+    return PlainTextResponse(profile["stats"])
+
+
+@app.get("/debug/traces", include_in_schema=False)
+def debug_traces_endpoint(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+):
+    assert_admin(current_user)
+    return {"slow_ms": tracer.slow_ms, "traces": tracer.recent(limit)}
+
+
+@app.get("/api/v1/admin/memory")
+def memory_report_endpoint(current_user: User = Depends(get_current_user)):
+    assert_admin(current_user)
+    stores = {
+        **user_repo.memory_stores(),
+        **session_store.memory_stores(),
+        **deck_repo.memory_stores(),
+        **note_repo.memory_stores(),
+        **changelog.memory_stores(),
+        **login_ip_limiter.memory_stores("ratelimit.login_ip"),
+        **login_email_limiter.memory_stores("ratelimit.login_email"),
+        **register_ip_limiter.memory_stores("ratelimit.register_ip"),
+    }
+    return {"stores": store_report(stores), "tracemalloc": allocation_tracker.status()}
+
+
+@app.post("/api/v1/admin/memory/tracemalloc/start")
+def tracemalloc_start_endpoint(
+    frames: int = Query(1, ge=1, le=25),
+    current_user: User = Depends(get_current_user),
+):
+    assert_admin(current_user)
+    allocation_tracker.start(frames)
+    return allocation_tracker.status()
+
+
+@app.post("/api/v1/admin/memory/tracemalloc/stop")
+def tracemalloc_stop_endpoint(current_user: User = Depends(get_current_user)):
+    assert_admin(current_user)
+    allocation_tracker.stop()
+    return allocation_tracker.status()
+
+
+@app.post("/api/v1/admin/memory/snapshots", status_code=status.HTTP_201_CREATED)
+def memory_snapshot_endpoint(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    assert_admin(current_user)
+    if not allocation_tracker.tracing:
+        raise ApiError(
+            code="conflict", message="tracemalloc is not running", status=409
+        )
+    snapshot_id = allocation_tracker.snapshot()
+    return {"id": snapshot_id, "top": allocation_tracker.top(snapshot_id, limit)}
+
+
+@app.get("/api/v1/admin/memory/diff")
+def memory_diff_endpoint(
+    base: int,
+    current: int,
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    assert_admin(current_user)
+    diff = allocation_tracker.diff(base, current, limit)
+    if diff is None:
+        raise ApiError(code="not_found", message="snapshot not found", status=404)
+    return {"base": base, "current": current, "diff": diff}
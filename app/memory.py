@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import sys
+import threading
+import tracemalloc
+from collections import OrderedDict
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from typing import Any, Dict, List, Mapping, Optional
+
+# Общие для всех объектов вещи, которые не относятся к стоимости хранилища.
+_SKIP_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Размер объекта вместе со всем, на что он ссылается (каждый объект один раз).
+
+    Обход итеративный, чтобы глубокие структуры не упирались в лимит рекурсии.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, _SKIP_TYPES) or id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, Mapping):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif isinstance(current, (str, bytes, int, float, bool)) or current is None:
+            continue
+        else:
+            if hasattr(current, "__dict__"):
+                stack.append(vars(current))
+            for cls in type(current).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(current, slot):
+                        stack.append(getattr(current, slot))
+    return total
+
+
+def store_report(stores: Mapping[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Число объектов и глубокий размер каждого хранилища.
+
+    Хранилища меряются независимо: записи, общие для нескольких индексов
+    (например, `_by_id` и `_by_email`), входят в размер каждого из них.
+    """
+    report = {}
+    for name, store in stores.items():
+        report[name] = {
+            "objects": len(store) if hasattr(store, "__len__") else 1,
+            "bytes": deep_sizeof(store),
+        }
+    return report
+
+
+class AllocationTracker:
+    """Управление tracemalloc: запуск/остановка, снимки, топ мест и разница."""
+
+    def __init__(self, keep: int = 4):
+        self._keep = keep
+        self._snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": list(self._snapshots),
+        }
+
+    def snapshot(self) -> int:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            ]
+        )
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > self._keep:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(self, snapshot_id: int, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        return [
+            {
+                "site": _site(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+
+    def diff(
+        self, base_id: int, current_id: int, limit: int = 20
+    ) -> Optional[List[Dict[str, Any]]]:
+        base = self._snapshots.get(base_id)
+        current = self._snapshots.get(current_id)
+        if base is None or current is None:
+            return None
+        return [
+            {
+                "site": _site(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in current.compare_to(base, "lineno")[:limit]
+        ]
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+allocation_tracker = AllocationTracker()
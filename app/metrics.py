@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import functools
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Labels = Tuple[str, ...]
+
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REPOSITORY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 0.1)
+
+
+class MetricsRegistry:
+    """Реестр метрик в текстовом формате Prometheus.
+
+    Каждый поток пишет в свой словарь без блокировок; словари потоков
+    сливаются только при выдаче /metrics. Значения монотонно накапливаются,
+    поэтому словари завершившихся потоков не удаляются.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, Labels], object]] = []
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, "_Metric"] = {}
+
+    def counter(self, name: str, help_: str, labels: Sequence[str] = ()) -> "Counter":
+        return self._register(Counter(self, name, help_, tuple(labels)))
+
+    def gauge(self, name: str, help_: str, labels: Sequence[str] = ()) -> "Gauge":
+        return self._register(Gauge(self, name, help_, tuple(labels)))
+
+    def histogram(
+        self,
+        name: str,
+        help_: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_BUCKETS,
+    ) -> "Histogram":
+        return self._register(Histogram(self, name, help_, tuple(labels), buckets))
+
+    def callback_gauge(
+        self,
+        name: str,
+        help_: str,
+        callback: Callable[[], Iterable[Tuple[Labels, float]]],
+        labels: Sequence[str] = (),
+    ) -> None:
+        """Gauge, значение которого читается при выдаче метрик."""
+        self._register(_CallbackGauge(self, name, help_, tuple(labels), callback))
+
+    def values(self) -> Dict[Tuple[str, Labels], object]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict[Tuple[str, Labels], object] = {}
+            self._local.values = values
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def render(self) -> str:
+        merged: Dict[Tuple[str, Labels], object] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.items()):
+                metric = self._metrics[key[0]]
+                merged[key] = metric.merge(merged.get(key), value)
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(merged))
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self, registry: MetricsRegistry, name: str, help_: str, labels: Labels
+    ):
+        self._registry = registry
+        self.name = name
+        self.help = help_
+        self.label_names = labels
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def samples(self, merged) -> Iterable[Tuple[Labels, object]]:
+        for (name, labels), value in merged.items():
+            if name == self.name:
+                yield labels, value
+
+    def render(self, merged) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in sorted(self.samples(merged))
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self._registry.values()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    """Gauge со сложением приращений (например, число запросов «в полёте»)."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class _CallbackGauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, registry, name, help_, labels, callback):
+        super().__init__(registry, name, help_, labels)
+        self._callback = callback
+
+    def samples(self, merged):
+        return self._callback()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_, labels, buckets: Sequence[float]):
+        super().__init__(registry, name, help_, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float) -> None:
+        values = self._registry.values()
+        key = (self.name, labels)
+        slot = values.get(key)
+        if slot is None:
+            # Счётчики по корзинам (не накопительные) + сумма в конце.
+            slot = values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        slot[bisect_left(self.buckets, value)] += 1
+        slot[-1] += value
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def render(self, merged) -> List[str]:
+        lines = []
+        for labels, slot in sorted(self.samples(merged)):
+            cumulative = 0
+            bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, slot[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    self.label_names + ("le",), labels + (bound,)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(slot[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(v))}"' for name, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "HTTP requests by route and status class.",
+    labels=("method", "route", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency measured with perf_counter.",
+    labels=("method", "route"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+REPOSITORY_LATENCY = REGISTRY.histogram(
+    "repository_operation_duration_seconds",
+    "Repository call latency.",
+    labels=("repository", "operation"),
+    buckets=REPOSITORY_BUCKETS,
+)
+
+
+def _threadpool_samples(field: str):
+    def collect() -> List[Tuple[Labels, float]]:
+        try:
+            limiter = anyio.to_thread.current_default_thread_limiter()
+        except RuntimeError:  # вне event loop лимитер недоступен
+            return []
+        return [((), getattr(limiter.statistics(), field))]
+
+    return collect
+
+
+REGISTRY.callback_gauge(
+    "threadpool_tokens_total",
+    "Size of the threadpool that runs sync endpoints.",
+    _threadpool_samples("total_tokens"),
+)
+REGISTRY.callback_gauge(
+    "threadpool_tokens_borrowed",
+    "Threadpool workers currently busy.",
+    _threadpool_samples("borrowed_tokens"),
+)
+REGISTRY.callback_gauge(
+    "threadpool_tasks_waiting",
+    "Calls queued for a threadpool worker.",
+    _threadpool_samples("tasks_waiting"),
+)
+
+
+def timed(repository: str, operation: str):
+    """Декоратор: пишет длительность вызова в REPOSITORY_LATENCY."""
+    labels = (repository, operation)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REPOSITORY_LATENCY.observe(labels, perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: счётчики, гистограмма задержек и in-flight по маршрутам.
+
+    Метка route — шаблон пути (`/api/v1/decks/{deck_id}`), а не сам путь,
+    чтобы число временных рядов не зависело от идентификаторов.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.inc((method, route, f"{status_code // 100}xx"))
+            HTTP_LATENCY.observe((method, route), perf_counter() - started)
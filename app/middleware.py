@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.tracing import tracer
+
+logger = logging.getLogger("app")
+
+SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("Referrer-Policy", "no-referrer"),
+)
+
+
+class RequestLoggingMiddleware:
+    """ASGI-middleware: X-Request-Id, корневой span трейса и строка журнала.
+
+    Чистый ASGI, а не BaseHTTPMiddleware: запрос не обёрнут в отдельную
+    задачу и потоки памяти, что заметно на долгих SSE-соединениях. Строка
+    журнала пишется после отправки тела, длительность — до конца ответа;
+    трасса потокового ответа заканчивается на его начале.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        method, path = scope["method"], scope["path"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-Id"] = request_id
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    # Поток открыт, пока подключён клиент: трасса — до начала.
+                    tracer.first_byte(root)
+            await send(message)
+
+        root, token = tracer.start(f"{method} {path}")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            tracer.finish(
+                root,
+                token,
+                request_id=request_id,
+                method=method,
+                path=path,
+                status=status_code,
+            )
+        logger.info(
+            json.dumps(
+                {
+                    "ts": time.time(),
+                    "level": "INFO",
+                    "request_id": request_id,
+                    "method": method,
+                    "path": path,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                }
+            )
+        )
+
+
+class SecurityHeadersMiddleware:
+    """ASGI-middleware: защитные заголовки в каждом HTTP-ответе."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS:
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import hmac
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.dependencies.utils import get_typed_signature
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+from app.config import settings
+
+PROFILE_HEADER = "X-Profile"
+
+_active_profile: ContextVar[Optional[cProfile.Profile]] = ContextVar(
+    "active_profile", default=None
+)
+# cProfile — один на процесс (в 3.12 — инструмент sys.monitoring): два
+# одновременных профиля путают статистику друг друга или падают с ValueError.
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Сэмплирующий профайлер уже запущен."""
+
+
+class SamplingProfiler:
+    """Статистический профайлер: снимает стеки всех потоков с заданной частотой.
+
+    Поток сэмплирования существует только на время сеанса, поэтому вне
+    сеанса профайлер ничего не стоит. Результат — collapsed stacks
+    (`поток;внешний;...;внутренний N`) для flamegraph.pl / speedscope.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._samples: Counter = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, rate_hz: float) -> None:
+        with self._lock:
+            if self._thread is not None:
+                raise ProfilerBusyError("profiler is already running")
+            self._samples = Counter()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(1.0 / rate_hz,), name="sampling-profiler"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self) -> Counter:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return Counter()
+        self._stop.set()
+        thread.join()
+        return self._samples
+
+    def _run(self, interval: float) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = code.co_filename.rsplit("/", 1)[-1]
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._samples[";".join(reversed(stack))] += 1
+
+
+def collapse(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class RequestProfiles:
+    """Последние результаты cProfile для запросов с заголовком X-Profile."""
+
+    def __init__(self, size: int = 32):
+        self._items: Deque[Dict[str, str]] = deque(maxlen=size)
+
+    def add(self, request_id: str, method: str, path: str, stats: str) -> None:
+        self._items.append(
+            {
+                "request_id": request_id,
+                "method": method,
+                "path": path,
+                "captured_at": f"{time.time():.3f}",
+                "stats": stats,
+            }
+        )
+
+    def list(self) -> List[Dict[str, str]]:
+        return [
+            {key: value for key, value in item.items() if key != "stats"}
+            for item in reversed(self._items)
+        ]
+
+    def get(self, request_id: str) -> Optional[Dict[str, str]]:
+        for item in reversed(self._items):
+            if item["request_id"] == request_id:
+                return item
+        return None
+
+
+sampling_profiler = SamplingProfiler()
+request_profiles = RequestProfiles()
+
+
+def _format_stats(profile: cProfile.Profile, limit: int = 40) -> str:
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _profiled(func: Callable) -> Callable:
+    """Оборачивает endpoint: если запрос помечен для профилирования, вызов
+    выполняется под cProfile в том потоке, где реально работает endpoint."""
+    # Аннотации разрешаются в модуле endpoint'а: у обёртки другие __globals__.
+    signature = get_typed_signature(func)
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return await func(*args, **kwargs)
+            profile.enable()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                profile.disable()
+
+        async_wrapper.__signature__ = signature
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.runcall(func, *args, **kwargs)
+
+    wrapper.__signature__ = signature
+    return wrapper
+
+
+def _profile_requested(request: Request) -> bool:
+    """Заголовок X-Profile должен содержать секрет профилирования."""
+    secret = settings.request_profiling_secret
+    value = request.headers.get(PROFILE_HEADER)
+    if not (settings.request_profiling_enabled and secret and value):
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), secret.encode("utf-8"))
+
+
+class ProfilingRoute(APIRoute):
+    """Маршрут, который умеет профилировать отдельный запрос по заголовку.
+
+    Без заголовка (или при выключенной настройке) добавляется только одна
+    проверка заголовка на запрос. Профилируется один запрос за раз: пока
+    идёт профиль, остальные запросы с заголовком выполняются без него.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def profiling_handler(request: Request) -> Response:
+            if not _profile_requested(request):
+                return await handler(request)
+            if not _profile_lock.acquire(blocking=False):
+                return await handler(request)
+            profile = cProfile.Profile()
+            token = _active_profile.set(profile)
+            try:
+                return await handler(request)
+            finally:
+                _active_profile.reset(token)
+                _profile_lock.release()
+                request_id = getattr(request.state, "request_id", "") or ""
+                request_profiles.add(
+                    request_id, request.method, request.url.path, _format_stats(profile)
+                )
+
+        return profiling_handler
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, constr
+from pydantic import BaseModel, ConfigDict, Field, constr
 
 from app.domain.models import Deck
 
@@ -68,6 +68,7 @@ class DeckResponse(BaseModel):
     target_lang: str
     created_at: datetime
     updated_at: datetime
+    source_deck_id: Optional[str] = None
 
 
 class DeckEnvelope(BaseModel):
@@ -85,6 +86,96 @@ class DeckListEnvelope(BaseModel):
     decks: DeckListResponse
 
 
+class DeckBulkCreatePayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[DeckCreatePayload] = Field(min_length=1)
+
+
+class DeckBulkUpdateItem(DeckUpdatePayload):
+    id: constr(min_length=1, max_length=64)
+    # ETag колоды, как в If-Match одиночного PATCH.
+    if_match: Optional[constr(max_length=128)] = None
+
+
+class DeckBulkUpdatePayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[DeckBulkUpdateItem] = Field(min_length=1)
+
+
+class DeckBulkDeletePayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    ids: List[constr(min_length=1, max_length=64)] = Field(min_length=1)
+
+
+class DeckBulkResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    deck: Optional[DeckResponse] = None
+    error: Optional[str] = None
+
+
+class DeckBulkEnvelope(BaseModel):
+    results: List[DeckBulkResult]
+
+
+class SyncChange(BaseModel):
+    seq: int
+    entity: str
+    id: str
+    op: Literal["upsert", "delete"]
+    # Текущее состояние сущности (для колод — как DeckResponse); null у удалений.
+    data: Optional[Dict[str, Any]] = None
+
+
+class SyncEnvelope(BaseModel):
+    changes: List[SyncChange]
+    # Значение since для следующего запроса.
+    next: int
+    has_more: bool
+
+
+class BatchSubRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: Optional[constr(max_length=64)] = None
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: constr(min_length=1, max_length=2048, pattern=r"^/[^/#][^#]*$")
+    headers: Dict[constr(max_length=64), constr(max_length=1024)] = Field(
+        default_factory=dict
+    )
+    body: Optional[Any] = None
+
+
+class BatchPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    requests: List[BatchSubRequest] = Field(min_length=1)
+
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    # Повторяющийся заголовок (например, Set-Cookie) — список значений.
+    headers: Dict[str, Union[str, List[str]]]
+    body: Any = None
+
+
+class BatchEnvelope(BaseModel):
+    responses: List[BatchSubResponse]
+
+
+class DeckSuggestion(BaseModel):
+    id: str
+    title: str
+
+
+class DeckSuggestEnvelope(BaseModel):
+    suggestions: List[DeckSuggestion]
+
+
 def deck_to_response(deck: Deck) -> DeckResponse:
     return DeckResponse(
         id=deck.id,
@@ -95,4 +186,44 @@ def deck_to_response(deck: Deck) -> DeckResponse:
         target_lang=deck.target_lang,
         created_at=deck.created_at,
         updated_at=deck.updated_at,
+        source_deck_id=deck.source_deck_id,
     )
+
+
+class RenderedCardResponse(BaseModel):
+    id: str
+    note_id: str
+    template_id: str
+    front: str
+    back: str
+
+
+class RenderedCardListEnvelope(BaseModel):
+    cards: List[RenderedCardResponse]
+
+
+class JobCreatePayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    kind: constr(min_length=1, max_length=64)
+    params: Dict[str, Any] = Field(default_factory=dict)
+    # Больше — раньше; отрицательный приоритет для фоновой рутины.
+    priority: int = Field(default=0, ge=-10, le=10)
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    priority: int
+    progress: float
+    attempts: int
+    max_attempts: int
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class JobEnvelope(BaseModel):
+    job: JobResponse
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from json import dumps
+from json.encoder import encode_basestring
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+    Type,
+    get_type_hints,
+)
+
+from pydantic import BaseModel
+
+from app.adapters.changelog import Change
+from app.domain.models import Deck, Job, RenderedCard
+from app.schemas import DeckResponse, JobResponse, RenderedCardResponse
+
+Encoder = Callable[[Any], str]
+
+
+def _json_datetime(value: datetime) -> str:
+    """Форматирует datetime так же, как pydantic (UTC — с суффиксом Z)."""
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return f'"{text}"'
+
+
+def _json_any(value: Any) -> str:
+    return dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _nullable(formatter: Encoder) -> Encoder:
+    def format_nullable(value: Any) -> str:
+        return "null" if value is None else formatter(value)
+
+    return format_nullable
+
+
+def _formatter_for(hint: Any) -> Encoder:
+    args = getattr(hint, "__args__", None)
+    if args and type(None) in args:
+        (inner,) = [arg for arg in args if arg is not type(None)]
+        return _nullable(_formatter_for(inner))
+    if hint is str:
+        return encode_basestring
+    if hint is datetime:
+        return _json_datetime
+    return _json_any
+
+
+def compile_encoder(cls: Type[Any], model: Type[BaseModel]) -> Encoder:
+    """Собирает функцию dataclass -> JSON-строка по полям response-модели.
+
+    Набор и порядок полей берутся из `model`, поэтому вывод совпадает с тем,
+    что отдал бы FastAPI, а OpenAPI-схема по-прежнему описывается моделью.
+    Типы разбираются один раз здесь, а не на каждом объекте.
+    """
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+    names = tuple(model.model_fields)
+    known = {f.name for f in fields(cls)}
+    missing = [name for name in names if name not in known]
+    if missing:
+        raise TypeError(f"{cls.__name__} has no fields {missing}")
+    hints = get_type_hints(cls)
+    template = "{" + ",".join(f"{encode_basestring(name)}:%s" for name in names) + "}"
+    formatters = tuple(_formatter_for(hints[name]) for name in names)
+    getter = attrgetter(*names)
+
+    def encode(obj: Any) -> str:
+        return template % tuple(
+            [formatter(value) for formatter, value in zip(formatters, getter(obj))]
+        )
+
+    return encode
+
+
+class FragmentCache:
+    """Ограниченный LRU закодированных элементов: каждая версия объекта
+    (например, ревизия колоды) форматируется один раз."""
+
+    def __init__(self, encoder: Encoder, key: Callable[[Any], Hashable], size: int):
+        self._encoder = encoder
+        self._key = key
+        self._size = size
+        self._items: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, obj: Any) -> str:
+        key = self._key(obj)
+        fragment = self._items.get(key)
+        if fragment is not None:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:  # вытеснен другим потоком между get и move
+                pass
+            return fragment
+        fragment = self._encoder(obj)
+        with self._lock:
+            self._items[key] = fragment
+            if len(self._items) > self._size:
+                self._items.popitem(last=False)
+        return fragment
+
+
+encode_deck = FragmentCache(
+    compile_encoder(Deck, DeckResponse),
+    key=lambda deck: (deck.id, deck.revision),
+    size=65536,
+)
+
+
+def dump_deck_envelope(deck: Deck) -> bytes:
+    """JSON-тело `DeckEnvelope` без построения pydantic-моделей."""
+    return f'{{"deck":{encode_deck(deck)}}}'.encode("utf-8")
+
+
+def dump_deck_list_envelope(
+    decks: Iterable[Deck], *, limit: int, offset: int, total: int
+) -> bytes:
+    """JSON-тело `DeckListEnvelope` без построения pydantic-моделей."""
+    items = ",".join([encode_deck(deck) for deck in decks])
+    return (
+        f'{{"decks":{{"items":[{items}],'
+        f'"limit":{limit},"offset":{offset},"total":{total}}}}}'
+    ).encode("utf-8")
+
+
+# Результат элемента пакетной операции: id, статус, колода, код ошибки.
+BulkResult = Tuple[Optional[str], int, Optional[Deck], Optional[str]]
+
+
+def dump_deck_bulk_envelope(results: Iterable[BulkResult]) -> bytes:
+    """JSON-тело `DeckBulkEnvelope` без построения pydantic-моделей."""
+    format_str = _nullable(encode_basestring)
+    items = ",".join(
+        [
+            f'{{"id":{format_str(deck_id)},"status":{status},'
+            f'"deck":{encode_deck(deck) if deck is not None else "null"},'
+            f'"error":{format_str(error)}}}'
+            for deck_id, status, deck, error in results
+        ]
+    )
+    return f'{{"results":[{items}]}}'.encode("utf-8")
+
+
+# Кодировщики данных изменений по типу сущности для /api/v1/sync.
+CHANGE_ENCODERS = {"deck": encode_deck}
+
+
+def _encode_change(change: Change) -> str:
+    data = "null"
+    if change.data is not None:
+        data = CHANGE_ENCODERS[change.entity](change.data)
+    return (
+        f'{{"seq":{change.seq},"entity":{encode_basestring(change.entity)},'
+        f'"id":{encode_basestring(change.entity_id)},"op":"{change.op}",'
+        f'"data":{data}}}'
+    )
+
+
+def dump_sync_envelope(
+    changes: Iterable[Change], *, next_seq: int, has_more: bool
+) -> bytes:
+    """JSON-тело `SyncEnvelope` без построения pydantic-моделей."""
+    items = ",".join([_encode_change(change) for change in changes])
+    return (
+        f'{{"changes":[{items}],"next":{next_seq},'
+        f'"has_more":{"true" if has_more else "false"}}}'
+    ).encode("utf-8")
+
+
+encode_job = compile_encoder(Job, JobResponse)
+
+
+def dump_job_envelope(job: Job) -> bytes:
+    return f'{{"job":{encode_job(job)}}}'.encode("utf-8")
+
+
+encode_rendered_card = compile_encoder(RenderedCard, RenderedCardResponse)
+
+
+def dump_rendered_cards_envelope(cards: Iterable[RenderedCard]) -> bytes:
+    """JSON-тело `RenderedCardListEnvelope` без построения pydantic-моделей."""
+    items = ",".join([encode_rendered_card(card) for card in cards])
+    return f'{{"cards":[{items}]}}'.encode("utf-8")
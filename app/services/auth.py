@@ -1,7 +1,23 @@
-from app.adapters.repositories import SessionStore, UserRepository
+from typing import Optional
+
+from app.adapters.async_repositories import AsyncSessionStore, AsyncUserRepository
+from app.adapters.repositories import SessionStore, UserRecord, UserRepository
 from app.domain.models import User
 from app.shared.errors import ApiError
 from app.shared.security import verify_password
+from app.tracing import traced
+
+
+def _check_password(record: Optional[UserRecord], password: str) -> UserRecord:
+    if record is None:
+        raise ApiError(code="unauthorized", message="invalid credentials", status=401)
+    if not verify_password(password, record.password_salt, record.password_hash):
+        raise ApiError(code="unauthorized", message="invalid credentials", status=401)
+    return record
+
+
+def _invalid_token() -> ApiError:
+    return ApiError(code="unauthorized", message="invalid token", status=401)
 
 
 class AuthService:
@@ -9,6 +25,7 @@ class AuthService:
         self._user_repo = user_repo
         self._sessions = sessions
 
+    @traced("auth.register_user")
     def register_user(
         self,
         *,
@@ -26,23 +43,58 @@ class AuthService:
             proficiency_level=proficiency_level,
         )
 
+    @traced("auth.authenticate")
     def authenticate(self, *, email: str, password: str) -> str:
-        record = self._user_repo.get_by_email(email)
-        if record is None:
-            raise ApiError(
-                code="unauthorized", message="invalid credentials", status=401
-            )
-        if not verify_password(password, record.password_salt, record.password_hash):
-            raise ApiError(
-                code="unauthorized", message="invalid credentials", status=401
-            )
+        record = _check_password(self._user_repo.get_by_email(email), password)
         return self._sessions.create(record.id)
 
+    @traced("auth.get_user_by_token")
     def get_user_by_token(self, token: str) -> User:
         user_id = self._sessions.get_user_id(token)
         if user_id is None:
-            raise ApiError(code="unauthorized", message="invalid token", status=401)
+            raise _invalid_token()
         record = self._user_repo.get_by_id(user_id)
         if record is None:
-            raise ApiError(code="unauthorized", message="invalid token", status=401)
+            raise _invalid_token()
+        return record.to_user()
+
+
+class AsyncAuthService:
+    """То же, что AuthService, поверх async-хранилищ для async endpoint'ов."""
+
+    def __init__(self, user_repo: AsyncUserRepository, sessions: AsyncSessionStore):
+        self._user_repo = user_repo
+        self._sessions = sessions
+
+    @traced("auth.register_user")
+    async def register_user(
+        self,
+        *,
+        email: str,
+        password: str,
+        locale: str,
+        proficiency_level: str,
+        role: str = "user",
+    ) -> UserRecord:
+        return await self._user_repo.create_user(
+            email=email,
+            password=password,
+            role=role,
+            locale=locale,
+            proficiency_level=proficiency_level,
+        )
+
+    @traced("auth.authenticate")
+    async def authenticate(self, *, email: str, password: str) -> str:
+        record = _check_password(await self._user_repo.get_by_email(email), password)
+        return await self._sessions.create(record.id)
+
+    @traced("auth.get_user_by_token")
+    async def get_user_by_token(self, token: str) -> User:
+        user_id = await self._sessions.get_user_id(token)
+        if user_id is None:
+            raise _invalid_token()
+        record = await self._user_repo.get_by_id(user_id)
+        if record is None:
+            raise _invalid_token()
         return record.to_user()
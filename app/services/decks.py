@@ -1,68 +1,477 @@
+from dataclasses import replace
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 from uuid import uuid4
 
-from app.adapters.repositories import DeckRepository
-from app.domain.models import Deck, User
+from app.adapters.async_repositories import AsyncDeckRepository
+from app.adapters.indexes import normalize_prefix
+from app.adapters.notes import InMemoryNoteRepository
+from app.adapters.repositories import DeckQuery, DeckRepository
+from app.domain.models import Card, Deck, Note, RenderedCard, User
+from app.services.rendering import BUILTIN_TEMPLATES, CardRenderer
 from app.shared.errors import ApiError
+from app.shared.singleflight import AsyncSingleFlight, SingleFlight
+from app.tracing import traced
 
 if TYPE_CHECKING:
     from app.schemas import DeckCreatePayload, DeckUpdatePayload
 
 
-class DeckService:
-    def __init__(self, deck_repo: DeckRepository):
-        self._deck_repo = deck_repo
+# Слушатель получает событие ("created" | "updated" | "deleted") и колоду.
+DeckListener = Callable[[str, Deck], None]
 
-    def create_deck(self, owner: User, payload: "DeckCreatePayload") -> Deck:
-        # Нормализация UTC: используем timezone-aware datetime
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        deck = Deck(
+# Карточка по умолчанию для новой заметки: (card_type, template_id).
+DEFAULT_CARD_TEMPLATES = (("basic", "default"),)
+
+
+def _now() -> datetime:
+    # Нормализация UTC: используем timezone-aware datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def new_deck(owner: User, payload: "DeckCreatePayload") -> Deck:
+    now = _now()
+    return Deck(
+        id=str(uuid4()),
+        owner_id=owner.id,
+        title=payload.title.strip(),
+        description=payload.description.strip() if payload.description else None,
+        source_lang=payload.source_lang.lower(),
+        target_lang=payload.target_lang.lower(),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def updated_deck(deck: Deck, payload: "DeckUpdatePayload") -> Deck:
+    now = _now()
+    return Deck(
+        id=deck.id,
+        owner_id=deck.owner_id,
+        title=payload.title.strip() if payload.title is not None else deck.title,
+        description=(
+            payload.description.strip()
+            if payload.description is not None
+            else deck.description
+        ),
+        source_lang=(
+            payload.source_lang.lower()
+            if payload.source_lang is not None
+            else deck.source_lang
+        ),
+        target_lang=(
+            payload.target_lang.lower()
+            if payload.target_lang is not None
+            else deck.target_lang
+        ),
+        created_at=deck.created_at,
+        updated_at=now,
+        source_deck_id=deck.source_deck_id,
+    )
+
+
+def cloned_deck(owner: User, source: Deck) -> Deck:
+    now = _now()
+    return Deck(
+        id=str(uuid4()),
+        owner_id=owner.id,
+        title=source.title,
+        description=source.description,
+        source_lang=source.source_lang,
+        target_lang=source.target_lang,
+        created_at=now,
+        updated_at=now,
+        source_deck_id=source.id,
+    )
+
+
+class _DeckEvents:
+    def __init__(self):
+        self._listeners: List[DeckListener] = []
+
+    def subscribe(self, listener: DeckListener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, deck: Deck) -> None:
+        for listener in self._listeners:
+            listener(event, deck)
+
+    def _notify_many(self, event: str, decks: Iterable[Deck]) -> None:
+        for deck in decks:
+            self._notify(event, deck)
+
+
+class _DeckNotes:
+    """Заметки и карточки колод, общие для DeckService и AsyncDeckService.
+
+    Хранилище заметок в памяти, поэтому методы синхронны в обоих сервисах.
+    Права на колоду проверяет вызывающий код, как и для самих колод.
+    """
+
+    def __init__(
+        self,
+        note_repo: Optional[InMemoryNoteRepository] = None,
+        renderer: Optional[CardRenderer] = None,
+    ):
+        self._notes = note_repo if note_repo is not None else InMemoryNoteRepository()
+        self._renderer = (
+            renderer if renderer is not None else CardRenderer(BUILTIN_TEMPLATES)
+        )
+
+    def list_notes(self, deck: Deck) -> List[Note]:
+        return self._notes.notes(deck.id)
+
+    def list_cards(self, deck: Deck) -> List[Card]:
+        return self._notes.cards(deck.id)
+
+    @traced("decks.render_cards")
+    def render_cards(self, deck: Deck, *, store: bool = True) -> List[RenderedCard]:
+        return self._renderer.render_many(
+            self._notes.notes(deck.id), self._notes.cards(deck.id), store=store
+        )
+
+    def get_note(self, deck: Deck, note_id: str) -> Note:
+        note = self._notes.get(deck.id, note_id)
+        if note is None:
+            raise ApiError(code="not_found", message="note not found", status=404)
+        return note
+
+    @traced("decks.add_note")
+    def add_note(
+        self,
+        deck: Deck,
+        fields: Mapping[str, str],
+        *,
+        tags: Sequence[str] = (),
+        templates: Sequence[Tuple[str, str]] = DEFAULT_CARD_TEMPLATES,
+    ) -> Note:
+        """Создаёт заметку и по карточке на каждый (card_type, template_id)."""
+        now = _now()
+        note = Note(
             id=str(uuid4()),
-            owner_id=owner.id,
-            title=payload.title.strip(),
-            description=payload.description.strip() if payload.description else None,
-            source_lang=payload.source_lang.lower(),
-            target_lang=payload.target_lang.lower(),
+            deck_id=deck.id,
+            fields=dict(fields),
+            tags=list(tags),
             created_at=now,
             updated_at=now,
         )
-        return self._deck_repo.save(deck)
+        cards = [
+            Card(
+                id=str(uuid4()),
+                note_id=note.id,
+                deck_id=deck.id,
+                card_type=card_type,
+                template_id=template_id,
+                created_at=now,
+            )
+            for card_type, template_id in templates
+        ]
+        return self._notes.save(deck.id, note, cards)
+
+    @traced("decks.update_note")
+    def update_note(
+        self,
+        deck: Deck,
+        note_id: str,
+        *,
+        fields: Optional[Mapping[str, str]] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> Note:
+        note = self.get_note(deck, note_id)
+        # Заметка исходной колоды копируется в клон с тем же id: карточки и
+        # UserCardState подписчика остаются привязаны к ней.
+        updated = replace(
+            note,
+            deck_id=deck.id,
+            fields=dict(fields) if fields is not None else note.fields,
+            tags=list(tags) if tags is not None else note.tags,
+            updated_at=_now(),
+        )
+        return self._notes.save(deck.id, updated)
+
+    @traced("decks.delete_note")
+    def delete_note(self, deck: Deck, note_id: str) -> None:
+        if not self._notes.delete(deck.id, note_id):
+            raise ApiError(code="not_found", message="note not found", status=404)
+
+
+class DeckService(_DeckEvents, _DeckNotes):
+    """Сервис колод.
+
+    Чтения блокирующего хранилища (get_deck, query_decks, suggest_decks)
+    склеиваются: одинаковые одновременные запросы к популярной колоде
+    ждут одно обращение к хранилищу вместо того, чтобы повторять его.
+    Хранилище в памяти отвечает быстрее, чем стоит склейка, — его вызовы
+    идут напрямую.
+    """
+
+    def __init__(
+        self,
+        deck_repo: DeckRepository,
+        flight_timeout: Optional[float] = None,
+        note_repo: Optional[InMemoryNoteRepository] = None,
+        renderer: Optional[CardRenderer] = None,
+    ):
+        _DeckEvents.__init__(self)
+        _DeckNotes.__init__(self, note_repo, renderer)
+        self._deck_repo = deck_repo
+        self._flights = (
+            SingleFlight(flight_timeout)
+            if getattr(deck_repo, "blocking", False)
+            else None
+        )
+        if self._flights is not None:
+            # Чтение после записи не должно получить результат, начатый до неё.
+            self.subscribe(lambda event, deck: self._flights.forget())
 
+    def _read(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        if self._flights is None:
+            return func(*args)
+        return self._flights.do(key, lambda: func(*args))
+
+    @traced("decks.create_deck")
+    def create_deck(self, owner: User, payload: "DeckCreatePayload") -> Deck:
+        saved = self._deck_repo.save(new_deck(owner, payload))
+        self._notify("created", saved)
+        return saved
+
+    @traced("decks.clone_deck")
+    def clone_deck(self, owner: User, source: Deck) -> Deck:
+        """Клон колоды для `owner` за O(1): заметки копируются при изменении."""
+        clone = cloned_deck(owner, source)
+        self._notes.fork(source.id, clone.id)
+        saved = self._deck_repo.save(clone)
+        self._notify("created", saved)
+        return saved
+
+    @traced("decks.get_deck")
     def get_deck(self, deck_id: str) -> Deck:
-        deck = self._deck_repo.get(deck_id)
+        deck = self._read(("get", deck_id), self._deck_repo.get, deck_id)
         if deck is None:
             raise ApiError(code="not_found", message="deck not found", status=404)
         return deck
 
+    @traced("decks.list_decks")
     def list_decks(self) -> List[Deck]:
         return self._deck_repo.list_all()
 
-    def update_deck(self, deck: Deck, payload: "DeckUpdatePayload") -> Deck:
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        updated = Deck(
-            id=deck.id,
-            owner_id=deck.owner_id,
-            title=payload.title.strip() if payload.title is not None else deck.title,
-            description=(
-                payload.description.strip()
-                if payload.description is not None
-                else deck.description
-            ),
-            source_lang=(
-                payload.source_lang.lower()
-                if payload.source_lang is not None
-                else deck.source_lang
-            ),
-            target_lang=(
-                payload.target_lang.lower()
-                if payload.target_lang is not None
-                else deck.target_lang
-            ),
-            created_at=deck.created_at,
-            updated_at=now,
+    @traced("decks.query_decks")
+    def query_decks(self, query: DeckQuery) -> Tuple[List[Deck], int]:
+        return self._read(("query", query), self._deck_repo.query, query)
+
+    def list_version(self, owner_id: Optional[str] = None) -> int:
+        return self._deck_repo.version(owner_id)
+
+    @traced("decks.suggest_decks")
+    def suggest_decks(
+        self, prefix: str, limit: int, owner_id: Optional[str] = None
+    ) -> List[Deck]:
+        prefix = normalize_prefix(prefix)
+        return self._read(
+            ("suggest", prefix, limit, owner_id),
+            self._deck_repo.suggest,
+            prefix,
+            limit,
+            owner_id,
         )
-        return self._deck_repo.save(updated)
 
+    @traced("decks.update_deck")
+    def update_deck(
+        self,
+        deck: Deck,
+        payload: "DeckUpdatePayload",
+        expected_revision: Optional[int] = None,
+    ) -> Deck:
+        saved = self._deck_repo.save(updated_deck(deck, payload), expected_revision)
+        self._notify("updated", saved)
+        return saved
+
+    @traced("decks.delete_deck")
     def delete_deck(self, deck_id: str) -> None:
+        deck = self._deck_repo.get(deck_id)
+        if deck is None:
+            return
         self._deck_repo.delete(deck_id)
+        self._notes.drop(deck_id)
+        self._notify("deleted", deck)
+
+    def get_decks(self, deck_ids: Iterable[str]) -> Dict[str, Deck]:
+        return self._deck_repo.get_many(deck_ids)
+
+    @traced("decks.create_decks")
+    def create_decks(
+        self, owner: User, payloads: Iterable["DeckCreatePayload"]
+    ) -> List[Deck]:
+        saved = self._deck_repo.save_many(
+            [new_deck(owner, payload) for payload in payloads]
+        )
+        self._notify_many("created", saved)
+        return saved
+
+    @traced("decks.update_decks")
+    def update_decks(
+        self,
+        updates: Iterable[Tuple[Deck, "DeckUpdatePayload"]],
+        expected_revisions: Optional[Dict[str, int]] = None,
+    ) -> List[Deck]:
+        saved = self._deck_repo.save_many(
+            [updated_deck(deck, payload) for deck, payload in updates],
+            expected_revisions,
+        )
+        self._notify_many("updated", saved)
+        return saved
+
+    @traced("decks.delete_decks")
+    def delete_decks(self, deck_ids: Iterable[str]) -> List[Deck]:
+        deleted = self._deck_repo.delete_many(deck_ids)
+        for deck in deleted:
+            self._notes.drop(deck.id)
+        self._notify_many("deleted", deleted)
+        return deleted
+
+
+class AsyncDeckService(_DeckEvents, _DeckNotes):
+    """Async-вариант DeckService для async endpoint'ов.
+
+    С хранилищем в памяти все вызовы завершаются без переключений контекста;
+    блокирующее хранилище уходит в threadpool внутри AsyncDeckRepository, и
+    его чтения склеиваются так же, как в DeckService.
+    """
+
+    def __init__(
+        self,
+        deck_repo: AsyncDeckRepository,
+        flight_timeout: Optional[float] = None,
+        note_repo: Optional[InMemoryNoteRepository] = None,
+        renderer: Optional[CardRenderer] = None,
+    ):
+        _DeckEvents.__init__(self)
+        _DeckNotes.__init__(self, note_repo, renderer)
+        self._deck_repo = deck_repo
+        self._flights = (
+            AsyncSingleFlight(flight_timeout) if deck_repo.blocking else None
+        )
+        if self._flights is not None:
+            # Чтение после записи не должно получить результат, начатый до неё.
+            self.subscribe(lambda event, deck: self._flights.forget())
+
+    async def _read(
+        self, key: Hashable, func: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        if self._flights is None:
+            return await func(*args)
+        return await self._flights.do(key, lambda: func(*args))
+
+    @traced("decks.create_deck")
+    async def create_deck(self, owner: User, payload: "DeckCreatePayload") -> Deck:
+        saved = await self._deck_repo.save(new_deck(owner, payload))
+        self._notify("created", saved)
+        return saved
+
+    @traced("decks.clone_deck")
+    async def clone_deck(self, owner: User, source: Deck) -> Deck:
+        clone = cloned_deck(owner, source)
+        self._notes.fork(source.id, clone.id)
+        saved = await self._deck_repo.save(clone)
+        self._notify("created", saved)
+        return saved
+
+    @traced("decks.get_deck")
+    async def get_deck(self, deck_id: str) -> Deck:
+        deck = await self._read(("get", deck_id), self._deck_repo.get, deck_id)
+        if deck is None:
+            raise ApiError(code="not_found", message="deck not found", status=404)
+        return deck
+
+    @traced("decks.list_decks")
+    async def list_decks(self) -> List[Deck]:
+        return await self._deck_repo.list_all()
+
+    @traced("decks.query_decks")
+    async def query_decks(self, query: DeckQuery) -> Tuple[List[Deck], int]:
+        return await self._read(("query", query), self._deck_repo.query, query)
+
+    async def list_version(self, owner_id: Optional[str] = None) -> int:
+        return await self._deck_repo.version(owner_id)
+
+    @traced("decks.suggest_decks")
+    async def suggest_decks(
+        self, prefix: str, limit: int, owner_id: Optional[str] = None
+    ) -> List[Deck]:
+        prefix = normalize_prefix(prefix)
+        return await self._read(
+            ("suggest", prefix, limit, owner_id),
+            self._deck_repo.suggest,
+            prefix,
+            limit,
+            owner_id,
+        )
+
+    @traced("decks.update_deck")
+    async def update_deck(
+        self,
+        deck: Deck,
+        payload: "DeckUpdatePayload",
+        expected_revision: Optional[int] = None,
+    ) -> Deck:
+        saved = await self._deck_repo.save(
+            updated_deck(deck, payload), expected_revision
+        )
+        self._notify("updated", saved)
+        return saved
+
+    @traced("decks.delete_deck")
+    async def delete_deck(self, deck_id: str) -> None:
+        deck = await self._deck_repo.get(deck_id)
+        if deck is None:
+            return
+        await self._deck_repo.delete(deck_id)
+        self._notes.drop(deck_id)
+        self._notify("deleted", deck)
+
+    async def get_decks(self, deck_ids: Iterable[str]) -> Dict[str, Deck]:
+        return await self._deck_repo.get_many(deck_ids)
+
+    @traced("decks.create_decks")
+    async def create_decks(
+        self, owner: User, payloads: Iterable["DeckCreatePayload"]
+    ) -> List[Deck]:
+        saved = await self._deck_repo.save_many(
+            [new_deck(owner, payload) for payload in payloads]
+        )
+        self._notify_many("created", saved)
+        return saved
+
+    @traced("decks.update_decks")
+    async def update_decks(
+        self,
+        updates: Iterable[Tuple[Deck, "DeckUpdatePayload"]],
+        expected_revisions: Optional[Dict[str, int]] = None,
+    ) -> List[Deck]:
+        saved = await self._deck_repo.save_many(
+            [updated_deck(deck, payload) for deck, payload in updates],
+            expected_revisions,
+        )
+        self._notify_many("updated", saved)
+        return saved
+
+    @traced("decks.delete_decks")
+    async def delete_decks(self, deck_ids: Iterable[str]) -> List[Deck]:
+        deleted = await self._deck_repo.delete_many(deck_ids)
+        for deck in deleted:
+            self._notes.drop(deck.id)
+        self._notify_many("deleted", deleted)
+        return deleted
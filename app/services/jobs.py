@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from app.adapters.jobs import SQLiteJobStore
+from app.adapters.repositories import DeckQuery
+from app.domain.models import Job, User
+from app.serialization import encode_deck
+
+logger = logging.getLogger("app.jobs")
+
+
+class JobCancelled(Exception):
+    """Поднимается из JobContext, когда задачу отменили во время работы."""
+
+
+class TooManyJobs(Exception):
+    """У владельца уже максимум незавершённых задач; новая не ставится."""
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """Тип задачи: обработчик и проверка параметров при постановке.
+
+    `parse` поднимает ValueError (в том числе ValidationError pydantic) на
+    неверных параметрах — задача тогда не ставится. `max_attempts`
+    переопределяет число попыток для неидемпотентных задач.
+    """
+
+    handler: Callable[["JobContext", Any], Any]
+    parse: Callable[[Dict[str, Any]], Any] = dict
+    max_attempts: Optional[int] = None
+
+
+class JobContext:
+    """То, что обработчик видит о своей задаче: прогресс и отмена."""
+
+    def __init__(self, runner: "JobRunner", job: Job):
+        self._runner = runner
+        self.job = job
+
+    def progress(self, fraction: float) -> None:
+        """Сохраняет прогресс (0..1); заодно точка проверки отмены."""
+        self.check()
+        self._runner._set_progress(self.job.id, min(max(fraction, 0.0), 1.0))
+
+    def check(self) -> None:
+        if self._runner._cancel_requested(self.job.id):
+            raise JobCancelled(self.job.id)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobRunner:
+    """Фоновые задачи в пуле потоков с приоритетами.
+
+    Задача пишется в хранилище при постановке и при каждой смене статуса,
+    поэтому после перезапуска незавершённые задачи ставятся заново. Воркер
+    берёт из очереди задачу с наибольшим приоритетом, у владельца которой
+    выполняется меньше `per_user` задач; упавшая задача повторяется через
+    retry_delay·2^(попытка−1), пока не исчерпает попытки. Отмена ставит
+    флаг, который обработчик видит в JobContext.progress/check.
+
+    `max_unfinished` ограничивает число незавершённых задач владельца:
+    без него один пользователь заполнит очередь и таблицу задач. Завершённые
+    задачи вместе с результатами удаляются при завершении следующей: старше
+    `finished_ttl` секунд и сверх `max_finished` последних у владельца. Методы
+    блокируют поток (лок и SQLite) — из async-кода их зовут в пуле потоков.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        kinds: Dict[str, JobKind],
+        *,
+        workers: int = 2,
+        per_user: int = 1,
+        max_unfinished: Optional[int] = None,
+        max_finished: Optional[int] = None,
+        finished_ttl: Optional[float] = None,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self._store = store
+        self._kinds = kinds
+        self._workers = workers
+        self._per_user = per_user
+        self._max_unfinished = max_unfinished
+        self._max_finished = max_finished
+        self._finished_ttl = finished_ttl
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._cond = threading.Condition()
+        # Незавершённые задачи; конечные читаются из хранилища.
+        self._jobs: Dict[str, Job] = {}
+        self._ready: List[Tuple[int, int, str]] = []
+        self._delayed: List[Tuple[float, str]] = []
+        self._seq = count()
+        self._running: Dict[str, int] = {}
+        self._unfinished: Dict[str, int] = {}
+        self._cancelled: Set[str] = set()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        """Запускает воркеры и подхватывает задачи, прерванные перезапуском."""
+        with self._cond:
+            if self._threads or self._stopping:
+                return
+            for job in self._store.unfinished():
+                job = replace(job, status="queued", updated_at=_now())
+                self._store.save(job)
+                self._enqueue(job)
+            for index in range(self._workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"job-worker-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            # Выполняющиеся задачи прерываются и после рестарта пойдут заново.
+            self._cancelled.update(self._jobs)
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(
+        self, owner_id: str, kind: str, params: Dict[str, Any], priority: int = 0
+    ) -> Job:
+        if kind not in self._kinds:
+            raise ValueError(f"unknown job kind: {kind}")
+        job_kind = self._kinds[kind]
+        job_kind.parse(params)
+        now = _now()
+        job = Job(
+            id=str(uuid4()),
+            owner_id=owner_id,
+            kind=kind,
+            params=params,
+            priority=priority,
+            status="queued",
+            progress=0.0,
+            attempts=0,
+            max_attempts=job_kind.max_attempts or self._max_attempts,
+            result=None,
+            error=None,
+            created_at=now,
+            updated_at=now,
+        )
+        self.start()
+        with self._cond:
+            unfinished = self._unfinished.get(owner_id, 0)
+            if self._max_unfinished is not None and unfinished >= self._max_unfinished:
+                raise TooManyJobs(owner_id)
+            self._store.save(job)
+            self._enqueue(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return self._store.get(job_id)
+            if job.status == "queued":
+                # Запись в очереди остаётся и пропускается воркером.
+                return self._finish(job, status="cancelled")
+            self._cancelled.add(job_id)
+            return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            running = sum(self._running.values())
+            return {"queued": len(self._jobs) - running, "running": running}
+
+    def _enqueue(self, job: Job, delay: float = 0.0) -> None:
+        if job.id not in self._jobs:
+            self._unfinished[job.owner_id] = self._unfinished.get(job.owner_id, 0) + 1
+        self._jobs[job.id] = job
+        if delay > 0:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, job.id))
+        else:
+            heapq.heappush(self._ready, (-job.priority, next(self._seq), job.id))
+        self._cond.notify()
+
+    def _finish(self, job: Job, **changes: Any) -> Job:
+        job = replace(job, updated_at=_now(), **changes)
+        self._store.save(job)
+        if self._jobs.pop(job.id, None) is not None:
+            self._unfinished[job.owner_id] -= 1
+            if not self._unfinished[job.owner_id]:
+                del self._unfinished[job.owner_id]
+        self._cancelled.discard(job.id)
+        before = None
+        if self._finished_ttl is not None:
+            before = job.updated_at - timedelta(seconds=self._finished_ttl)
+        self._store.prune(job.owner_id, keep=self._max_finished, before=before)
+        return job
+
+    def _next(self) -> Optional[Job]:
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, job_id = heapq.heappop(self._delayed)
+                    job = self._jobs.get(job_id)
+                    if job is not None:
+                        entry = (-job.priority, next(self._seq), job_id)
+                        heapq.heappush(self._ready, entry)
+                job = self._pick()
+                if job is not None:
+                    return job
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._cond.wait(timeout)
+            return None
+
+    def _pick(self) -> Optional[Job]:
+        """Лучшая по приоритету задача владельца, не упёршегося в лимит."""
+        blocked = []
+        picked = None
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            job = self._jobs.get(entry[2])
+            if job is None or job.status != "queued":
+                continue
+            if self._running.get(job.owner_id, 0) >= self._per_user:
+                blocked.append(entry)
+                continue
+            picked = replace(
+                job, status="running", attempts=job.attempts + 1, updated_at=_now()
+            )
+            self._running[job.owner_id] = self._running.get(job.owner_id, 0) + 1
+            self._jobs[job.id] = picked
+            self._store.save(picked)
+            break
+        for entry in blocked:
+            heapq.heappush(self._ready, entry)
+        return picked
+
+    def _work(self) -> None:
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running[job.owner_id] -= 1
+                    if not self._running[job.owner_id]:
+                        del self._running[job.owner_id]
+                    # Освободился слот владельца — его задачи снова доступны.
+                    self._cond.notify_all()
+
+    def _run(self, job: Job) -> None:
+        kind = self._kinds[job.kind]
+        try:
+            result = kind.handler(JobContext(self, job), kind.parse(job.params))
+            # Результат хранится в JSON: проверяем здесь, а не при записи.
+            json.dumps(result)
+        except JobCancelled:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._finish(self._jobs[job.id], status="cancelled")
+        except Exception as exc:
+            logger.warning("job %s (%s) failed: %r", job.id, job.kind, exc)
+            with self._cond:
+                current = self._jobs[job.id]
+                if current.attempts < current.max_attempts and not self._stopping:
+                    retry = replace(
+                        current, status="queued", error=str(exc), updated_at=_now()
+                    )
+                    self._store.save(retry)
+                    delay = self._retry_delay * 2 ** (current.attempts - 1)
+                    self._enqueue(retry, delay)
+                else:
+                    self._finish(current, status="failed", error=str(exc))
+        else:
+            with self._cond:
+                self._finish(
+                    self._jobs[job.id],
+                    status="succeeded",
+                    progress=1.0,
+                    result=result,
+                    error=None,
+                )
+
+    def _set_progress(self, job_id: str, fraction: float) -> None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job = replace(job, progress=fraction, updated_at=_now())
+                self._jobs[job_id] = job
+                self._store.save(job)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        return job_id in self._cancelled
+
+
+def deck_job_kinds(
+    decks: Any,
+    get_user: Callable[[str], Optional[User]],
+    parse_import: Callable[[Dict[str, Any]], Any],
+    chunk: int = 200,
+) -> Dict[str, JobKind]:
+    """Задачи над колодами: экспорт всех колод владельца и импорт пачки.
+
+    Экспорт с параметром `render` добавляет к каждой колоде отрисованные
+    карточки.
+
+    `decks` — синхронный DeckService, разделяющий слушателей с основным,
+    чтобы импорт так же сбрасывал кэши и попадал в /api/v1/sync.
+    """
+
+    def export_decks(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+        render = bool(params.get("render"))
+        exported: List[Any] = []
+        offset = 0
+        while True:
+            items, total = decks.query_decks(
+                DeckQuery(owner_id=ctx.job.owner_id, limit=chunk, offset=offset)
+            )
+            for deck in items:
+                data = json.loads(encode_deck(deck))
+                if render:
+                    # Разовый проход не должен вытеснять из кэша горячие карточки.
+                    cards = decks.render_cards(deck, store=False)
+                    data["cards"] = [asdict(card) for card in cards]
+                exported.append(data)
+            offset += chunk
+            if offset >= total:
+                return {"decks": exported}
+            ctx.progress(offset / total)
+
+    def import_decks(ctx: JobContext, payload: Any) -> Dict[str, Any]:
+        owner = get_user(ctx.job.owner_id)
+        if owner is None:
+            raise ValueError("job owner no longer exists")
+        items = payload.items
+        created: List[str] = []
+        for start in range(0, len(items), chunk):
+            ctx.check()
+            saved = decks.create_decks(owner, items[start : start + chunk])
+            created.extend(deck.id for deck in saved)
+            ctx.progress(len(created) / len(items))
+        return {"created": len(created), "ids": created}
+
+    return {
+        "deck_export": JobKind(export_decks),
+        # Повтор после частичного импорта создал бы дубликаты.
+        "deck_import": JobKind(import_decks, parse=parse_import, max_attempts=1),
+    }
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import anyio
+
+from app.adapters.card_states import NO_TIME, ColumnarCardStateStore, to_micros
+from app.domain.models import UserCardState
+from app.shared.pubsub import PubSub
+from app.shared.timer_wheel import TimerWheel
+
+
+def format_event(name: str, data: object, event_id: Optional[int] = None) -> str:
+    """Кадр Server-Sent Events."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"{head}event: {name}\ndata: {payload}\n\n"
+
+
+async def sse_stream(
+    events: PubSub, topic: str, heartbeat: float
+) -> AsyncIterator[str]:
+    """Поток SSE для одного соединения.
+
+    Подписка создаётся при первом чтении потока и снимается при отключении
+    клиента (отмена задачи ответа). Комментарий-пинг раз в `heartbeat`
+    секунд не даёт прокси закрыть простаивающее соединение.
+    """
+    subscription = events.subscribe(topic)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            event = await subscription.get(heartbeat)
+            if subscription.overflowed:
+                # Часть событий вытеснена: клиент догоняет через /api/v1/sync.
+                subscription.overflowed = False
+                yield format_event("resync", {})
+            if event is None:
+                yield ": ping\n\n"
+                continue
+            name, data = event
+            yield format_event(name, data, data.get("seq"))
+    finally:
+        events.unsubscribe(subscription)
+
+
+class ReviewNotifier:
+    """Таймеры next_review_at → события `review_due` пользователю.
+
+    Каждая карточка с датой следующего повторения стоит в колесе таймеров;
+    раз в тик сработавшие карточки группируются по пользователю и
+    публикуются одним событием.
+    """
+
+    def __init__(
+        self,
+        events: PubSub,
+        *,
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._events = events
+        self._tick = tick
+        self._clock = clock
+        self._wheel = TimerWheel(tick, start=clock())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def schedule(self, state: UserCardState) -> None:
+        key = (state.user_id, state.card_id)
+        with self._lock:
+            if state.next_review_at is None:
+                self._wheel.cancel(key)
+            else:
+                self._wheel.schedule(key, to_micros(state.next_review_at) / 1e6)
+
+    def load(self, store: ColumnarCardStateStore) -> int:
+        """Ставит таймеры для всех состояний хранилища; возвращает их число."""
+        users, cards = store.users(), store.cards()
+        columns = store.columns()
+        scheduled = 0
+        with self._lock:
+            for user, card, due in zip(
+                columns["user"], columns["card"], columns["next_review_at"]
+            ):
+                if due != NO_TIME:
+                    self._wheel.schedule((users[user], cards[card]), due / 1e6)
+                    scheduled += 1
+        return scheduled
+
+    def fire_due(self, now: Optional[float] = None) -> int:
+        """Публикует наступившие повторения; возвращает число карточек."""
+        with self._lock:
+            fired = self._wheel.advance(self._clock() if now is None else now)
+        by_user: Dict[str, List[str]] = {}
+        for (user_id, card_id), _ in fired:
+            by_user.setdefault(user_id, []).append(card_id)
+        for user_id, card_ids in by_user.items():
+            self._events.publish(user_id, "review_due", {"card_ids": card_ids})
+        return len(fired)
+
+    async def run(self) -> None:
+        while True:
+            await anyio.sleep(self._tick)
+            self.fire_due()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from html import escape
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Tuple
+
+from app.domain.models import Card, CardTemplate, Note, RenderedCard
+from app.shared.errors import ApiError
+
+# (поля заметки, отрисованная лицевая сторона) -> HTML стороны карточки.
+Renderer = Callable[..., str]
+
+FRONT_SIDE = "FrontSide"
+_PLACEHOLDER = re.compile(r"\{\{\s*([^{}]*?)\s*\}\}")
+
+BUILTIN_TEMPLATES: Dict[str, CardTemplate] = {
+    "default": CardTemplate(
+        id="default", front="{{front}}", back='{{FrontSide}}<hr id="answer">{{back}}'
+    ),
+    "reverse": CardTemplate(
+        id="reverse", front="{{back}}", back='{{FrontSide}}<hr id="answer">{{front}}'
+    ),
+}
+
+
+class TemplateError(ValueError):
+    """Шаблон нельзя разобрать: пустой или незакрытый плейсхолдер."""
+
+
+def compile_template(source: str) -> Renderer:
+    """Собирает функцию отрисовки стороны карточки по шаблону.
+
+    Шаблон разбирается один раз: литералы склеиваются в строку формата `%`,
+    плейсхолдеры превращаются в кортеж имён полей, так что отрисовка — одна
+    подстановка без регулярных выражений. Значения полей экранируются как
+    HTML, отсутствующее поле даёт пустую строку. `{{FrontSide}}` вставляет
+    уже отрисованную лицевую сторону как есть (для оборота).
+    """
+    literals: List[str] = []
+    names: List[str] = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(source):
+        literals.append(source[position : match.start()])
+        if not match.group(1):
+            raise TemplateError(f"empty placeholder at {match.start()}")
+        names.append(match.group(1))
+        position = match.end()
+    literals.append(source[position:])
+    for literal in literals:
+        if "{{" in literal or "}}" in literal:
+            raise TemplateError(f"unbalanced braces in template {source!r}")
+
+    if not names:
+
+        def render_literal(fields: Mapping[str, str], front_side: str = "") -> str:
+            return source
+
+        return render_literal
+
+    template = "%s".join(literal.replace("%", "%%") for literal in literals)
+    names_tuple = tuple(names)
+    if names_tuple != (FRONT_SIDE,) and len(names_tuple) == 1:
+        # Частый случай — одно поле: без списка и кортежа значений.
+        (name,) = names_tuple
+
+        def render_field(fields: Mapping[str, str], front_side: str = "") -> str:
+            return template % escape(fields.get(name, ""))
+
+        return render_field
+
+    if FRONT_SIDE not in names_tuple:
+
+        def render(fields: Mapping[str, str], front_side: str = "") -> str:
+            get = fields.get
+            return template % tuple([escape(get(name, "")) for name in names_tuple])
+
+        return render
+
+    def render_back(fields: Mapping[str, str], front_side: str = "") -> str:
+        get = fields.get
+        return template % tuple(
+            [
+                front_side if name == FRONT_SIDE else escape(get(name, ""))
+                for name in names_tuple
+            ]
+        )
+
+    return render_back
+
+
+class CardRenderer:
+    """Отрисовка карточек по скомпилированным шаблонам с LRU-кэшем.
+
+    Шаблон компилируется при первом использовании и дальше не разбирается.
+    Результат кэшируется по версии заметки и шаблону: ключ включает
+    updated_at, так что правка заметки не требует сброса — старые версии
+    вытесняются сами. Копия заметки в клоне колоды отличается deck_id и
+    кэшируется отдельно; неизменённые заметки у всех клонов общие.
+    """
+
+    def __init__(self, templates: Mapping[str, CardTemplate], max_entries: int = 65536):
+        self._templates = dict(templates)
+        self._compiled: Dict[str, Tuple[Renderer, Renderer]] = {}
+        self._max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, RenderedCard]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def compiled(self, template_id: str) -> Tuple[Renderer, Renderer]:
+        compiled = self._compiled.get(template_id)
+        if compiled is None:
+            template = self._templates.get(template_id)
+            if template is None:
+                raise ApiError(
+                    code="not_found", message="card template not found", status=404
+                )
+            # Гонка двух потоков безвредна: оба скомпилируют одно и то же.
+            compiled = (
+                compile_template(template.front),
+                compile_template(template.back),
+            )
+            self._compiled[template_id] = compiled
+        return compiled
+
+    def render(self, note: Note, card: Card, *, store: bool = True) -> RenderedCard:
+        """Отрисовывает карточку; `store=False` читает кэш, но не пополняет его."""
+        key = (note.id, note.deck_id, note.updated_at, card.template_id)
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is None:
+                self._misses += 1
+            else:
+                self._cache.move_to_end(key)
+                self._hits += 1
+        if rendered is not None:
+            # Кэшируется готовый объект: попадание ничего не создаёт.
+            if rendered.id == card.id:
+                return rendered
+            return replace(rendered, id=card.id)
+        render_front, render_back = self.compiled(card.template_id)
+        front = render_front(note.fields)
+        rendered = RenderedCard(
+            id=card.id,
+            note_id=note.id,
+            template_id=card.template_id,
+            front=front,
+            back=render_back(note.fields, front),
+        )
+        if store:
+            with self._lock:
+                self._cache[key] = rendered
+                if len(self._cache) > self._max_entries:
+                    self._cache.popitem(last=False)
+        return rendered
+
+    def render_many(
+        self, notes: Iterable[Note], cards: Iterable[Card], *, store: bool = True
+    ) -> List[RenderedCard]:
+        """Карточки колоды разом (экспорт, предзагрузка перед занятием).
+
+        Экспорт передаёт store=False, чтобы проход по большой колоде не
+        вытеснил из кэша карточки, которые сейчас повторяют.
+        """
+        by_id = {note.id: note for note in notes}
+        return [
+            self.render(by_id[card.note_id], card, store=store)
+            for card in cards
+            if card.note_id in by_id
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self._max_entries,
+                "templates": len(self._compiled),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Set
+
+
+class ResponseCache:
+    """LRU-кэш уже закодированных тел ответов.
+
+    Записи помечаются владельцем (scope), чтобы запись колоды сбрасывала
+    ровно страницы этого владельца. Ограничен и числом записей, и суммарным
+    размером тел. Рядом с телом хранится сжатый вариант, который строится
+    при первом запросе и дальше переиспользуется.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_scope: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.body
+
+    def get_compressed(
+        self, key: Hashable, compress: Callable[[bytes], bytes]
+    ) -> Optional[bytes]:
+        """Сжатый вариант тела; `compress` вызывается один раз на запись."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.compressed is not None:
+                return entry.compressed
+            body = entry.body
+        compressed = compress(body)
+        with self._lock:
+            if self._entries.get(key) is entry and entry.compressed is None:
+                entry.compressed = compressed
+                self._bytes += len(compressed)
+                self._evict()
+        return compressed
+
+    def put(self, key: Hashable, scope: str, body: bytes) -> None:
+        if len(body) > self._max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(scope, body)
+            self._by_scope.setdefault(scope, set()).add(key)
+            self._bytes += len(body)
+            self._evict()
+
+    def invalidate(self, scope: str) -> None:
+        with self._lock:
+            for key in list(self._by_scope.get(scope, ())):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        keys = self._by_scope.get(entry.scope)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_scope[entry.scope]
+
+
+class _Entry:
+    __slots__ = ("scope", "body", "compressed")
+
+    def __init__(self, scope: str, body: bytes):
+        self.scope = scope
+        self.body = body
+        self.compressed: Optional[bytes] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.compressed or b"")
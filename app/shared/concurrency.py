@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import threading
+from typing import Hashable, List
+
+
+class StripedLock:
+    """Набор локов, выбираемых по хэшу ключа.
+
+    Операции над разными ключами почти всегда берут разные локи и идут
+    параллельно; над одним ключом — сериализуются. Число полос — степень двойки.
+    """
+
+    def __init__(self, stripes: int = 64):
+        if stripes <= 0 or stripes & (stripes - 1):
+            raise ValueError("stripes must be a power of two")
+        self._mask = stripes - 1
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) & self._mask]
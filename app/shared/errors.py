@@ -1,5 +1,15 @@
+from typing import Dict, Optional
+
+
 class ApiError(Exception):
-    def __init__(self, code: str, message: str, status: int = 400):
+    def __init__(
+        self,
+        code: str,
+        message: str,
+        status: int = 400,
+        headers: Optional[Dict[str, str]] = None,
+    ):
         self.code = code
         self.message = message
         self.status = status
+        self.headers = headers
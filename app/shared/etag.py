@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+from typing import Optional
+
+from app.domain.models import Deck
+
+# Счётчики версий живут в памяти процесса: эпоха не даёт ETag'ам после
+# рестарта совпасть со старыми при том же номере версии.
+_EPOCH = secrets.token_hex(8)
+_GZIP_SUFFIX = "-gzip"
+
+
+def _strong_etag(*parts: object) -> str:
+    raw = ":".join(str(part) for part in parts).encode("utf-8")
+    return f'"{hashlib.blake2b(raw, digest_size=16).hexdigest()}"'
+
+
+def deck_etag(deck: Deck) -> str:
+    """Сильный ETag колоды: меняется при каждом сохранении (ревизия).
+
+    updated_at для этого не годится: два сохранения в одну микросекунду
+    или после перевода часов назад дали бы один и тот же ETag.
+    """
+    return _strong_etag("deck", _EPOCH, deck.id, deck.revision)
+
+
+def gzip_etag(etag: str) -> str:
+    """ETag сжатого gzip представления: суффикс внутри кавычек."""
+    return f'{etag[:-1]}{_GZIP_SUFFIX}"'
+
+
+def list_etag(scope: str, version: int, *params: object) -> str:
+    """ETag страницы списка: версия владельца плюс параметры запроса."""
+    return _strong_etag("decks", _EPOCH, scope, version, *params)
+
+
+def _parse(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _identity(tag: str) -> str:
+    """ETag без gzip-суффикса: обе формы обозначают одну версию."""
+    suffixed = f'{_GZIP_SUFFIX}"'
+    return f'{tag[: -len(suffixed)]}"' if tag.endswith(suffixed) else tag
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True, если клиент уже имеет эту версию (слабое сравнение, RFC 9110).
+
+    Принимается и ETag сжатого представления (`gzip_etag`).
+    """
+    if not header:
+        return False
+    tags = _parse(header)
+    if "*" in tags:
+        return True
+    return _identity(etag.removeprefix("W/")) in {
+        _identity(tag.removeprefix("W/")) for tag in tags
+    }
+
+
+def not_modified_etag(header: str, etag: str) -> str:
+    """ETag для ответа 304: в той форме, в какой версия есть у клиента."""
+    return gzip_etag(etag) if gzip_etag(etag) in _parse(header) else etag
+
+
+def if_match(header: Optional[str], etag: str) -> bool:
+    """True, если предусловие If-Match выполнено (сильное сравнение).
+
+    ETag сжатого представления той же версии тоже подходит: клиент, получивший
+    тело в gzip, знает только его.
+    """
+    if header is None:
+        return True
+    tags = _parse(header)
+    return "*" in tags or etag in {_identity(tag) for tag in tags}
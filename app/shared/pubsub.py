@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+# Событие: имя и данные (JSON-совместимые).
+Event = Tuple[str, Any]
+
+
+class Subscription:
+    """Очередь событий одного соединения.
+
+    Пока событий нет, соединение держит только эту структуру и future
+    ожидания — без собственного потока или задачи. Очередь ограничена:
+    при переполнении старые события вытесняются, а `overflowed` говорит
+    клиенту, что нужно пересинхронизироваться.
+    """
+
+    __slots__ = ("topic", "overflowed", "_queue", "_loop", "_waiter")
+
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop, size: int):
+        self.topic = topic
+        self.overflowed = False
+        self._queue: Deque[Event] = deque(maxlen=size)
+        self._loop = loop
+        self._waiter: Optional[asyncio.Future] = None
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Следующее событие или None, если за `timeout` секунд ничего не пришло."""
+        if not self._queue:
+            self._waiter = self._loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiter = None
+        return self._queue.popleft() if self._queue else None
+
+    def _push(self, event: Event) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.overflowed = True
+        self._queue.append(event)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class PubSub:
+    """Публикация событий подписчикам по теме (id пользователя) внутри процесса.
+
+    Публиковать можно из event loop и из потоков threadpool: доставка в
+    чужой loop идёт через call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size: int = 64):
+        self._queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Подписка для текущего event loop; вызывается из корутины."""
+        subscription = Subscription(topic, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, topic: str, name: str, data: Any) -> int:
+        """Рассылает событие подписчикам темы; возвращает их число."""
+        subscribers = tuple(self._topics.get(topic, ()))
+        if not subscribers:
+            return 0
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        event = (name, data)
+        for subscription in subscribers:
+            if subscription._loop is current:
+                subscription._push(event)
+            else:
+                subscription._loop.call_soon_threadsafe(subscription._push, event)
+        return len(subscribers)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscriptions": sum(map(len, self._topics.values())),
+            }
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """Разбирает лимит вида "30/60": 30 запросов за 60 секунд."""
+    count, _, seconds = spec.partition("/")
+    capacity, period = int(count), float(seconds or 1)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f"invalid rate limit: {spec!r}")
+    return capacity, period
+
+
+class TokenBucketLimiter:
+    """Token bucket на каждый ключ (IP, email) с ленивым пополнением.
+
+    Корзина вмещает `capacity` токенов и наполняется за `period` секунд.
+    Хранится не пара (токены, время), а одно число — теоретическое время
+    прихода (GCRA): до него корзина «занята», каждый запрос сдвигает его на
+    period / capacity. Пополнение этим и считается — без фоновых таймеров.
+
+    Ключи разложены по шардам; в шарде не больше max_keys / shards ключей,
+    при переполнении вытесняется дольше всех не использовавшийся — его
+    корзина к этому времени обычно уже полна. Локов нет: вызовы идут из
+    event loop, а отдельные операции OrderedDict атомарны под GIL. Гонка
+    двух потоков за один ключ в худшем случае даёт лишний токен, а лок
+    стоил бы дороже всего решения.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        period: float,
+        *,
+        max_keys: int = 100_000,
+        shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if shards <= 0 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        self._interval = period / capacity
+        # На сколько TAT может опережать текущее время: capacity − 1 токен.
+        self._burst = period - self._interval
+        self._mask = shards - 1
+        self._shards: List["OrderedDict[str, float]"] = [
+            OrderedDict() for _ in range(shards)
+        ]
+        self._per_shard = max(1, max_keys // shards)
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return sum(map(len, self._shards))
+
+    def acquire(self, key: str) -> float:
+        """Берёт токен: 0.0 при успехе, иначе секунды до следующего токена."""
+        buckets = self._shards[hash(key) & self._mask]
+        now = self._clock()
+        # pop + вставка заодно переносит ключ в конец очереди LRU.
+        tat = buckets.pop(key, now)
+        if tat < now:
+            tat = now
+        wait = tat - now - self._burst
+        if wait > 0:
+            buckets[key] = tat
+            return wait
+        if len(buckets) >= self._per_shard:
+            buckets.popitem(last=False)
+        buckets[key] = tat + self._interval
+        return 0.0
+
+    def memory_stores(self, name: str) -> Dict[str, object]:
+        return {name: self._shards}
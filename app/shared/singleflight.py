@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DEFAULT: Any = object()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Склейка одинаковых одновременных вызовов для потоков.
+
+    Первый вызов с ключом выполняет функцию, остальные ждут и получают тот
+    же результат (или то же исключение). Ожидающий не дольше `timeout`
+    секунд: если вычисление зависло, он выполняет функцию сам, а не висит
+    вместе с ним. Результат общий — вызывающие не должны его изменять.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._timeout = timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._shared = 0
+
+    def do(
+        self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = _DEFAULT
+    ) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._shared += 1
+        if not leader:
+            if not call.done.wait(self._timeout if timeout is _DEFAULT else timeout):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self) -> None:
+        """Новые вызовы не присоединяются к уже идущим (после записи)."""
+        with self._lock:
+            self._calls.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "shared": self._shared}
+
+
+class AsyncSingleFlight:
+    """Склейка одинаковых одновременных вызовов для event loop.
+
+    Вычисление идёт отдельной задачей, а вызывающие ждут её через shield:
+    отмена одного запроса (клиент отключился) не отменяет вычисление для
+    остальных. Таймаут ожидания — как в SingleFlight: по нему сам считает
+    только присоединившийся вызов, первый ждёт своё вычисление до конца.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._timeout = timeout
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._shared = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = _DEFAULT,
+    ) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(flight)
+        self._shared += 1
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(flight),
+                self._timeout if timeout is _DEFAULT else timeout,
+            )
+        except asyncio.TimeoutError:
+            # Вычисление могло завершиться ровно на таймауте (или само
+            # упасть с TimeoutError) — тогда его результат и отдаётся.
+            if flight.done():
+                return flight.result()
+        return await fn()
+
+    def _forget(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Если все ожидающие отменены, исключение некому забрать.
+        if not flight.cancelled():
+            flight.exception()
+
+    def forget(self) -> None:
+        """Новые вызовы не присоединяются к уже идущим (после записи)."""
+        self._flights.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "shared": self._shared}
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+class TimerWheel:
+    """Хэшированное колесо таймеров.
+
+    Время делится на тики длиной `tick` секунд, тик n попадает в ячейку
+    n % slots. Постановка и отмена — O(1), продвижение на тик обходит одну
+    ячейку: таймеры из следующих оборотов колеса остаются на месте. Таймер
+    срабатывает не раньше своего срока и не позже чем через тик после него.
+    """
+
+    def __init__(self, tick: float, slots: int = 512, start: float = 0.0):
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick and slots must be positive")
+        self._tick = tick
+        self._slots: List[Dict[Hashable, Tuple[int, Any]]] = [{} for _ in range(slots)]
+        self._where: Dict[Hashable, int] = {}
+        self._current = math.floor(start / tick)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None) -> None:
+        """Ставит (или переставляет) таймер `key` на момент `deadline`."""
+        self.cancel(key)
+        # Срок в прошлом срабатывает на ближайшем тике.
+        tick = max(math.ceil(deadline / self._tick), self._current + 1)
+        index = tick % len(self._slots)
+        self._slots[index][key] = (tick, payload)
+        self._where[key] = index
+
+    def cancel(self, key: Hashable) -> bool:
+        index = self._where.pop(key, None)
+        if index is None:
+            return False
+        del self._slots[index][key]
+        return True
+
+    def advance(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """Продвигает колесо до `now`; возвращает сработавшие (key, payload)."""
+        target = math.floor(now / self._tick)
+        if target <= self._current:
+            return []
+        slots = len(self._slots)
+        # Если прошло больше оборота, каждую ячейку достаточно обойти один раз.
+        first = max(self._current + 1, target - slots + 1)
+        fired = []
+        for tick in range(first, target + 1):
+            bucket = self._slots[tick % slots]
+            if not bucket:
+                continue
+            due = [key for key, (at, _) in bucket.items() if at <= target]
+            for key in due:
+                fired.append((key, bucket.pop(key)[1]))
+                del self._where[key]
+        self._current = target
+        return fired
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+
+class Span:
+    __slots__ = ("name", "started", "finished", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = perf_counter()
+        self.finished: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.finished if self.finished is not None else perf_counter()
+        return (end - self.started) * 1000
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Вложенный span внутри текущей трассы; вне трассы ничего не делает.
+
+    Контекст копируется в потоки threadpool, поэтому sync-endpoint'ы и
+    сервисы, работающие в воркерах, попадают в трассу своего запроса.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finished = perf_counter()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Декоратор для методов сервисов и репозиториев (sync и async)."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Tracer:
+    """Собирает трассы запросов и сохраняет только медленные.
+
+    Медленные трассы (дольше `slow_ms`) попадают в кольцевой буфер для
+    /debug/traces и, если задан `path`, дописываются в файл JSON Lines.
+    Файл пишет отдельный поток, а не event loop; если диск не успевает и
+    очередь полна, строка в файл не попадает (в буфере она остаётся).
+
+    Потоковый ответ (SSE) живёт, пока открыто соединение, поэтому его
+    трасса заканчивается на первом байте ответа — см. `first_byte`.
+    """
+
+    def __init__(
+        self, slow_ms: float, size: int = 100, path: str = "", queue_size: int = 1000
+    ):
+        self.slow_ms = slow_ms
+        self.path = path
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._lines: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def start(self, name: str) -> "tuple[Span, Token]":
+        root = Span(name)
+        return root, _current_span.set(root)
+
+    def first_byte(self, root: Span) -> None:
+        """Завершает трассу потокового ответа на начале ответа."""
+        root.finished = perf_counter()
+
+    def finish(self, root: Span, token: Token, **fields: Any) -> None:
+        if root.finished is None:
+            root.finished = perf_counter()
+        _current_span.reset(token)
+        if root.duration_ms < self.slow_ms:
+            return
+        trace = {
+            **fields,
+            "ts": time.time(),
+            "duration_ms": round(root.duration_ms, 3),
+            "root": root.to_dict(root.started),
+        }
+        self._traces.append(trace)
+        if self.path:
+            self._write_later(json.dumps(trace, ensure_ascii=False))
+
+    def flush(self) -> None:
+        """Ждёт, пока поток допишет в файл все поставленные строки."""
+        self._lines.join()
+
+    def _write_later(self, line: str) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_lines, name="trace-writer", daemon=True
+                )
+                self._writer.start()
+        try:
+            self._lines.put_nowait(line)
+        except queue.Full:
+            pass
+
+    def _write_lines(self) -> None:
+        while True:
+            lines = [self._lines.get()]
+            while True:
+                try:
+                    lines.append(self._lines.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write("".join(line + "\n" for line in lines))
+            finally:
+                for _ in lines:
+                    self._lines.task_done()
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return list(reversed(self._traces))[:limit]
+
+
+tracer = Tracer(slow_ms=settings.trace_slow_ms, path=settings.trace_file)
@@ -0,0 +1 @@
+"""Микробенчмарки. Запуск из корня репозитория: `python -m benchmarks.<имя>`."""
@@ -0,0 +1,115 @@
+"""Контроль допуска под перегрузкой.
+
+Модель сервера: `--workers` воркеров (как threadpool), каждый запрос занимает
+воркер на `--service-ms`. Запросы приходят с постоянной частотой `--overload`
+× пропускная способность. Без контроля допуска очередь растёт и задержку
+получают все; с AdmissionMiddleware лишние запросы сразу получают 503.
+
+    python -m benchmarks.bench_admission --seconds 5 --overload 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from app.admission import AdaptiveLimit, AdmissionMiddleware
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def make_app(workers: int, service: float):
+    pool = asyncio.Semaphore(workers)
+
+    async def app(scope, receive, send):
+        async with pool:
+            await asyncio.sleep(service)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def one(app, served: List[float], shed: List[float]) -> None:
+    status: Optional[int] = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/decks",
+        "query_string": b"",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "root_path": "",
+        "headers": [(b"authorization", b"Bearer x")],
+    }
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    (served if status == 200 else shed).append(time.perf_counter() - started)
+
+
+async def run(args, admission: bool) -> None:
+    service = args.service_ms / 1000
+    app = make_app(args.workers, service)
+    if admission:
+        limiter = AdaptiveLimit(
+            64, min_limit=args.workers, target_latency=args.target_ms / 1000
+        )
+        app = AdmissionMiddleware(app, limiter)
+    rate = args.workers / service * args.overload
+    served: List[float] = []
+    shed: List[float] = []
+    tasks = []
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < args.seconds:
+        due = int((time.perf_counter() - started) * rate)
+        for _ in range(due - sent):
+            tasks.append(asyncio.create_task(one(app, served, shed)))
+        sent = due
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+
+    label = "admission" if admission else "no admission"
+    print(
+        f"  {label:12}: served {len(served):5} "
+        f"p50 {percentile(served, 0.5) * 1000:7.1f} ms "
+        f"p99 {percentile(served, 0.99) * 1000:7.1f} ms | "
+        f"shed {len(shed):5} p99 {percentile(shed, 0.99) * 1000:5.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=20)
+    parser.add_argument("--overload", type=float, default=2.0)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--target-ms", type=float, default=100)
+    args = parser.parse_args()
+    capacity = args.workers / args.service_ms * 1000
+    print(
+        f"capacity {capacity:.0f} req/s, offered {capacity * args.overload:.0f} "
+        f"req/s for {args.seconds:.0f} s:"
+    )
+    for admission in (False, True):
+        asyncio.run(run(args, admission))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Sync endpoint'ы в threadpool против async endpoint'ов при высокой конкуренции.
+
+Одна и та же колода отдаётся четырьмя маршрутами: sync/async поверх
+хранилища в памяти и sync/async поверх «блокирующего» хранилища, которое
+имитирует I/O задержкой в `--io-ms`. Клиент держит `--concurrency`
+запросов в полёте через ASGI-транспорт httpx, без сети.
+
+    python -m benchmarks.bench_async --requests 4000 --concurrency 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+
+import anyio
+import httpx
+from fastapi import FastAPI, Response
+
+from app.adapters.async_repositories import AsyncDeckRepository
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import Deck
+from app.serialization import dump_deck_envelope
+from app.services.decks import AsyncDeckService, DeckService
+
+
+class SlowDeckRepository(InMemoryDeckRepository):
+    blocking = True
+
+    def __init__(self, io_seconds: float):
+        super().__init__()
+        self._io_seconds = io_seconds
+
+    def get(self, deck_id):
+        time.sleep(self._io_seconds)
+        return super().get(deck_id)
+
+
+def sync_route(service: DeckService):
+    def endpoint(deck_id: str):
+        return Response(dump_deck_envelope(service.get_deck(deck_id)))
+
+    return endpoint
+
+
+def async_route(service: AsyncDeckService):
+    async def endpoint(deck_id: str):
+        return Response(dump_deck_envelope(await service.get_deck(deck_id)))
+
+    return endpoint
+
+
+def build_app(io_seconds: float):
+    deck = Deck(
+        id="deck-1",
+        owner_id="owner-1",
+        title="Verbs",
+        description=None,
+        source_lang="en",
+        target_lang="ru",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+    memory_repo = InMemoryDeckRepository()
+    slow_repo = SlowDeckRepository(io_seconds)
+    for repo in (memory_repo, slow_repo):
+        repo.save(deck)
+    services = {
+        "memory": (
+            DeckService(memory_repo),
+            AsyncDeckService(AsyncDeckRepository(memory_repo)),
+        ),
+        "io": (
+            DeckService(slow_repo),
+            AsyncDeckService(AsyncDeckRepository(slow_repo)),
+        ),
+    }
+    app = FastAPI()
+
+    for backend, (sync_service, async_service) in services.items():
+        app.get(f"/{backend}/sync/{{deck_id}}")(sync_route(sync_service))
+        app.get(f"/{backend}/async/{{deck_id}}")(async_route(async_service))
+    return app
+
+
+async def drive(app, path: str, requests: int, concurrency: int):
+    latencies = []
+    limiter = anyio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def one():
+            async with limiter:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        async with anyio.create_task_group() as group:
+            for _ in range(requests):
+                group.start_soon(one)
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return requests / elapsed, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=4_000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--io-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    app = build_app(args.io_ms / 1000)
+
+    print(
+        f"{args.requests} requests, {args.concurrency} in flight, "
+        f"blocking backend sleeps {args.io_ms} ms:"
+    )
+    for backend in ("memory", "io"):
+        for mode in ("sync", "async"):
+            rps, p99 = anyio.run(
+                drive, app, f"/{backend}/{mode}/deck-1", args.requests, args.concurrency
+            )
+            print(f"  {backend:<6} {mode:<5}  {rps:8.0f} req/s  p99 {p99:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Стартовая пачка запросов клиента: по отдельности против одного /api/v1/batch.
+
+Через ASGI-транспорт httpx (без сети) `--rounds` раз отправляется набор из
+`--details + 2` чтений (список колод, подсказки, детали колод): отдельными
+запросами и одним пакетом. Запросы проходят весь стек middleware.
+
+    python -m benchmarks.bench_batch --rounds 300 --details 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from uuid import uuid4
+
+import anyio
+import httpx
+
+from app.main import app
+
+
+async def login(client: httpx.AsyncClient) -> dict:
+    credentials = {"email": f"bench-{uuid4()}@example.com", "password": "Password123"}
+    response = await client.post("/api/v1/auth/register", json=credentials)
+    assert response.status_code == 201
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(rounds: int, details: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        headers = await login(client)
+        payload = {"title": "Verbs", "source_lang": "en", "target_lang": "ru"}
+        response = await client.post(
+            "/api/v1/decks:bulk", json={"items": [payload] * details}, headers=headers
+        )
+        ids = [result["id"] for result in response.json()["results"]]
+        paths = ["/api/v1/decks", "/api/v1/decks/suggest?prefix=ve"]
+        paths += [f"/api/v1/decks/{deck_id}" for deck_id in ids]
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for path in paths:
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200
+        separate = time.perf_counter() - started
+
+        requests = [{"method": "GET", "path": path} for path in paths]
+        started = time.perf_counter()
+        for _ in range(rounds):
+            response = await client.post(
+                "/api/v1/batch", json={"requests": requests}, headers=headers
+            )
+            assert all(item["status"] == 200 for item in response.json()["responses"])
+        batched = time.perf_counter() - started
+
+    print(f"{rounds} rounds of {len(paths)} reads:")
+    print(f"  separate requests: {separate / rounds * 1000:7.2f} ms/round")
+    print(f"  one batch:         {batched / rounds * 1000:7.2f} ms/round")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--details", type=int, default=10)
+    args = parser.parse_args()
+    # Строка журнала на каждый запрос в замере только шумит.
+    for name in ("app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    anyio.run(run, args.rounds, args.details)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Пакетные endpoint'ы колод против одиночных: пропускная способность в колодах/с.
+
+Через ASGI-транспорт httpx (без сети) создаётся, обновляется и удаляется
+`--decks` колод: по одной на запрос и пачками по `--batch`. Запросы идут
+через полный стек приложения — middleware и аутентификацию.
+
+    python -m benchmarks.bench_bulk --decks 5000 --batch 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from uuid import uuid4
+
+import anyio
+import httpx
+
+from app.main import app
+
+PAYLOAD = {"title": "Verbs", "source_lang": "en", "target_lang": "ru"}
+
+
+async def login(client: httpx.AsyncClient) -> dict:
+    credentials = {"email": f"bench-{uuid4()}@example.com", "password": "Password123"}
+    response = await client.post("/api/v1/auth/register", json=credentials)
+    assert response.status_code == 201
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def single(client: httpx.AsyncClient, headers: dict, decks: int) -> list:
+    timings = []
+    started = time.perf_counter()
+    ids = []
+    for _ in range(decks):
+        response = await client.post("/api/v1/decks", json=PAYLOAD, headers=headers)
+        ids.append(response.json()["deck"]["id"])
+    timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for deck_id in ids:
+        response = await client.patch(
+            f"/api/v1/decks/{deck_id}", json={"title": "Nouns"}, headers=headers
+        )
+        assert response.status_code == 200
+    timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for deck_id in ids:
+        response = await client.delete(f"/api/v1/decks/{deck_id}", headers=headers)
+        assert response.status_code == 204
+    timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bulk(
+    client: httpx.AsyncClient, headers: dict, decks: int, batch: int
+) -> list:
+    sizes = [min(batch, decks - start) for start in range(0, decks, batch)]
+    timings = []
+    started = time.perf_counter()
+    ids = []
+    for size in sizes:
+        response = await client.post(
+            "/api/v1/decks:bulk", json={"items": [PAYLOAD] * size}, headers=headers
+        )
+        ids.extend(result["id"] for result in response.json()["results"])
+    timings.append(time.perf_counter() - started)
+
+    chunks = [ids[start : start + batch] for start in range(0, decks, batch)]
+    started = time.perf_counter()
+    for chunk in chunks:
+        items = [{"id": deck_id, "title": "Nouns"} for deck_id in chunk]
+        response = await client.patch(
+            "/api/v1/decks:bulk", json={"items": items}, headers=headers
+        )
+        assert all(result["status"] == 200 for result in response.json()["results"])
+    timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for chunk in chunks:
+        response = await client.request(
+            "DELETE", "/api/v1/decks:bulk", json={"ids": chunk}, headers=headers
+        )
+        assert all(result["status"] == 204 for result in response.json()["results"])
+    timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run(decks: int, batch: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        headers = await login(client)
+        results = {
+            "single": await single(client, headers, decks),
+            f"bulk/{batch}": await bulk(client, headers, decks, batch),
+        }
+    print(f"{decks} decks, decks/s:")
+    print(f"  {'mode':<10} {'create':>9} {'update':>9} {'delete':>9}")
+    for mode, timings in results.items():
+        rates = "".join(f" {decks / seconds:9.0f}" for seconds in timings)
+        print(f"  {mode:<10}{rates}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decks", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    # Строка журнала на каждый запрос в замере только шумит.
+    for name in ("app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    anyio.run(run, args.decks, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Память и полный проход: объекты UserCardState против колоночного хранилища.
+
+    python -m benchmarks.bench_card_states --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.adapters.card_states import ColumnarCardStateStore
+from app.domain.models import UserCardState
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_state(i: int, users: int) -> UserCardState:
+    return UserCardState(
+        id=str(UUID(int=i)),
+        user_id=f"user-{i % users}",
+        card_id=f"card-{i // users}",
+        status="review",
+        stability=1.5 + i % 10,
+        retrievability=0.9,
+        ease_factor=2.5,
+        interval=i % 30,
+        next_review_at=BASE + timedelta(hours=i % 1000),
+        last_review_at=BASE,
+        review_count=i % 7,
+        success_count=i % 5,
+        lapses_count=i % 3,
+    )
+
+
+def build_objects(count: int, users: int):
+    states = {}
+    for i in range(count):
+        state = make_state(i, users)
+        states[(state.user_id, state.card_id)] = state
+    return states
+
+
+def build_columnar(count: int, users: int):
+    store = ColumnarCardStateStore()
+    for i in range(count):
+        store.upsert(make_state(i, users))
+    return store
+
+
+def measure_memory(build, count: int, users: int):
+    gc.collect()
+    tracemalloc.start()
+    result = build(count, users)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+    now = BASE + timedelta(hours=500)
+
+    objects, object_bytes = measure_memory(build_objects, args.count, args.users)
+    # Сборка мусора после построения не должна попасть в замер прохода.
+    gc.collect()
+    started = time.perf_counter()
+    due_objects = sum(
+        1
+        for state in objects.values()
+        if state.next_review_at is not None and state.next_review_at <= now
+    )
+    object_scan = time.perf_counter() - started
+    del objects
+
+    store, columnar_bytes = measure_memory(build_columnar, args.count, args.users)
+    gc.collect()
+    started = time.perf_counter()
+    due_columnar = len(store.due_rows(now))
+    columnar_scan = time.perf_counter() - started
+    assert due_objects == due_columnar
+
+    started = time.perf_counter()
+    stability = sum(store.columns()["stability"]) / len(store)
+    column_sum = time.perf_counter() - started
+
+    print(f"{args.count} card states, {args.users} users:")
+    print(f"  objects + dict index: {object_bytes:6.1f} B/state")
+    print(
+        f"  columnar store:       {columnar_bytes:6.1f} B/state"
+        f"  ({object_bytes / columnar_bytes:.1f}x)"
+    )
+    print(f"  due scan, objects:    {object_scan * 1000:7.1f} ms")
+    print(f"  due scan, columns:    {columnar_scan * 1000:7.1f} ms")
+    print(f"  mean stability:       {column_sum * 1000:7.1f} ms ({stability:.2f})")
+
+
+if __name__ == "__main__":
+    main()
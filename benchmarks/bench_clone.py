@@ -0,0 +1,95 @@
+"""Клонирование популярной колоды: копия при записи против полной копии.
+
+Колода из `--cards` заметок (по карточке на заметку) клонируется
+`--clones` раз; сравниваются время клона и прирост памяти (tracemalloc) с
+полным копированием заметок и карточек в каждую новую колоду.
+
+    python -m benchmarks.bench_clone --cards 20000 --clones 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import replace
+from uuid import uuid4
+
+from app.adapters.notes import InMemoryNoteRepository
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import User
+from app.schemas import DeckCreatePayload
+from app.services.decks import DeckService, cloned_deck
+
+
+def user(user_id: str) -> User:
+    return User(
+        id=user_id,
+        email=f"{user_id}@x",
+        role="user",
+        locale="ru",
+        proficiency_level="b1",
+    )
+
+
+def full_copy(service: DeckService, notes: InMemoryNoteRepository, owner, source):
+    """Клон без разделения: у каждого подписчика свои заметки и карточки."""
+    clone = cloned_deck(owner, source)
+    cards = {}
+    for card in notes.cards(source.id):
+        cards.setdefault(card.note_id, []).append(card)
+    for note in notes.notes(source.id):
+        copy = replace(note, id=str(uuid4()), deck_id=clone.id)
+        notes.save(
+            clone.id,
+            copy,
+            [
+                replace(card, id=str(uuid4()), note_id=copy.id, deck_id=clone.id)
+                for card in cards.get(note.id, ())
+            ],
+        )
+    return clone
+
+
+def cow_clone(service: DeckService, notes: InMemoryNoteRepository, owner, source):
+    return service.clone_deck(owner, source)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=20_000)
+    parser.add_argument("--clones", type=int, default=100)
+    args = parser.parse_args()
+
+    notes = InMemoryNoteRepository()
+    service = DeckService(InMemoryDeckRepository(), note_repo=notes)
+    source = service.create_deck(
+        user("author"),
+        DeckCreatePayload(title="Popular", source_lang="en", target_lang="ru"),
+    )
+    for i in range(args.cards):
+        service.add_note(source, {"front": f"word {i}", "back": f"перевод {i}"})
+
+    print(f"deck with {args.cards} cards, {args.clones} clones")
+    for name, clone in (("full copy", full_copy), ("copy-on-write", cow_clone)):
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        clones = [
+            clone(service, notes, user(f"learner-{i}"), source)
+            for i in range(args.clones)
+        ]
+        seconds = time.perf_counter() - started
+        grown, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"  {name:13}: {seconds / args.clones * 1000:8.3f} ms and "
+            f"{grown / args.clones / 1024:9.1f} KiB per clone"
+        )
+        for deck in clones:
+            notes.drop(deck.id)
+
+
+if __name__ == "__main__":
+    main()
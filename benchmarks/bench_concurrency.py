@@ -0,0 +1,122 @@
+"""Пропускная способность репозитория колод при 1–64 потоках.
+
+Смесь операций: 80% чтений (get/query/suggest), 20% записей (save/delete).
+Сравнивается текущий репозиторий (полосатые локи, чтение без локов) с тем
+же репозиторием под одним глобальным локом.
+
+    python -m benchmarks.bench_concurrency --ops 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from app.adapters.repositories import DeckQuery, InMemoryDeckRepository
+from app.domain.models import Deck
+
+BASE = datetime(2024, 1, 1)
+
+
+class GlobalLockDeckRepository(InMemoryDeckRepository):
+    def __init__(self):
+        super().__init__()
+        self._global = threading.Lock()
+
+    def save(self, deck):
+        with self._global:
+            return super().save(deck)
+
+    def delete(self, deck_id):
+        with self._global:
+            return super().delete(deck_id)
+
+    def get(self, deck_id):
+        with self._global:
+            return super().get(deck_id)
+
+    def query(self, query):
+        with self._global:
+            return super().query(query)
+
+    def suggest(self, prefix, limit, owner_id=None):
+        with self._global:
+            return super().suggest(prefix, limit, owner_id)
+
+
+def make_deck(i: int, owner: str) -> Deck:
+    return Deck(
+        id=str(uuid4()),
+        owner_id=owner,
+        title=f"Deck {i}",
+        description=None,
+        source_lang=("en", "de", "fr")[i % 3],
+        target_lang="ru",
+        created_at=BASE + timedelta(seconds=i),
+        updated_at=BASE + timedelta(seconds=i),
+    )
+
+
+def seed(repo, decks: int, owners):
+    ids = []
+    for i in range(decks):
+        deck = make_deck(i, owners[i % len(owners)])
+        repo.save(deck)
+        ids.append(deck.id)
+    return ids
+
+
+def worker(repo, ids, owners, ops: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    for i in range(ops):
+        roll = rng.random()
+        owner = owners[rng.randrange(len(owners))]
+        if roll < 0.4:
+            repo.get(ids[rng.randrange(len(ids))])
+        elif roll < 0.7:
+            repo.query(DeckQuery(owner_id=owner, sort="-updated_at", limit=20))
+        elif roll < 0.8:
+            repo.suggest("deck 1", 10, owner)
+        else:
+            deck = make_deck(rng.randrange(10**6), owner)
+            repo.save(deck)
+            repo.delete(deck.id)
+
+
+def run(repo_cls, threads: int, ops: int, decks: int) -> float:
+    owners = [f"owner-{i}" for i in range(64)]
+    repo = repo_cls()
+    ids = seed(repo, decks, owners)
+    per_thread = ops // threads
+    workers = [
+        threading.Thread(target=worker, args=(repo, ids, owners, per_thread, n))
+        for n in range(threads)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--decks", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{args.ops} mixed ops over {args.decks} decks, ops/s:")
+    print(f"  {'threads':>7}  {'striped':>10}  {'global lock':>11}")
+    for threads in (1, 2, 4, 8, 16, 32, 64):
+        striped = run(InMemoryDeckRepository, threads, args.ops, args.decks)
+        global_lock = run(GlobalLockDeckRepository, threads, args.ops, args.decks)
+        print(f"  {threads:>7}  {striped:>10.0f}  {global_lock:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
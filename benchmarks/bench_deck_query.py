@@ -0,0 +1,84 @@
+"""Смешанные запросы к InMemoryDeckRepository.query на большом числе колод.
+
+    python -m benchmarks.bench_deck_query --decks 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.adapters.repositories import DeckQuery, InMemoryDeckRepository
+from app.domain.models import Deck
+
+LANGS = ["en", "ru", "de", "fr", "es", "it", "ja", "zh"]
+WORDS = ["verbs", "nouns", "travel", "basics", "food", "animals", "colors", "daily"]
+
+
+def build(decks: int, owners: int, rng: random.Random) -> InMemoryDeckRepository:
+    repo = InMemoryDeckRepository()
+    base = datetime(2024, 1, 1)
+    for i in range(decks):
+        ts = base + timedelta(seconds=i)
+        repo.save(
+            Deck(
+                id=f"deck-{i}",
+                owner_id=f"user-{rng.randrange(owners)}",
+                title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                description=None,
+                source_lang=rng.choice(LANGS),
+                target_lang=rng.choice(LANGS),
+                created_at=ts,
+                updated_at=ts + timedelta(seconds=rng.randrange(86400)),
+            )
+        )
+    return repo
+
+
+def random_query(owners: int, rng: random.Random) -> DeckQuery:
+    admin = rng.random() < 0.1
+    return DeckQuery(
+        owner_id=None if admin else f"user-{rng.randrange(owners)}",
+        source_lang=rng.choice(LANGS) if rng.random() < 0.5 else None,
+        target_lang=rng.choice(LANGS) if rng.random() < 0.5 else None,
+        title_contains=rng.choice(WORDS) if rng.random() < 0.3 else None,
+        sort=rng.choice([None, "title", "-updated_at", "created_at"]),
+        limit=20,
+        offset=rng.choice([0, 0, 20, 100]),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decks", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    started = time.perf_counter()
+    repo = build(args.decks, args.owners, rng)
+    print(f"build: {args.decks} decks in {time.perf_counter() - started:.1f}s")
+
+    timings = []
+    for _ in range(args.queries):
+        query = random_query(args.owners, rng)
+        started = time.perf_counter()
+        repo.query(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"query: n={len(timings)} "
+        f"p50={statistics.median(timings):.3f}ms "
+        f"p95={timings[int(len(timings) * 0.95)]:.3f}ms "
+        f"p99={timings[int(len(timings) * 0.99)]:.3f}ms "
+        f"max={timings[-1]:.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
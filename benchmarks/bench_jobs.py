@@ -0,0 +1,98 @@
+"""Импорт в запросе против фоновой задачи: что видят остальные клиенты.
+
+Один клиент импортирует `--decks` колод — пачками по 1000 через
+POST /api/v1/decks:bulk либо одной задачей POST /api/v1/jobs. Параллельно
+другой клиент читает свою колоду; сравниваются время ответа импортирующему
+и задержки чтений, пока импорт идёт.
+
+    python -m benchmarks.bench_jobs --decks 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from typing import List
+
+import anyio
+import httpx
+
+from app.main import app
+from benchmarks.bench_admission import percentile
+from benchmarks.bench_bulk import PAYLOAD, login
+
+
+async def reader(client: httpx.AsyncClient, headers, url, done, latencies) -> None:
+    while not done.is_set():
+        started = time.perf_counter()
+        await client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        await anyio.sleep(0.001)
+
+
+async def inline_import(client, headers, decks: int) -> float:
+    longest = 0.0
+    for _ in range(0, decks, 1000):
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/decks:bulk", json={"items": [PAYLOAD] * 1000}, headers=headers
+        )
+        assert response.status_code == 200
+        longest = max(longest, time.perf_counter() - started)
+    return longest
+
+
+async def job_import(client, headers, decks: int) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/jobs",
+        json={"kind": "deck_import", "params": {"items": [PAYLOAD] * decks}},
+        headers=headers,
+    )
+    assert response.status_code == 202
+    answered = time.perf_counter() - started
+    location = response.headers["Location"]
+    while True:
+        job = (await client.get(location, headers=headers)).json()["job"]
+        if job["status"] not in ("queued", "running"):
+            assert job["status"] == "succeeded", job
+            return answered
+        await anyio.sleep(0.01)
+
+
+async def run(decks: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        importer = await login(c)
+        other = await login(c)
+        response = await c.post("/api/v1/decks", json=PAYLOAD, headers=other)
+        url = f"/api/v1/decks/{response.json()['deck']['id']}"
+        for name, scenario in (("inline :bulk", inline_import), ("job", job_import)):
+            latencies: List[float] = []
+            done = anyio.Event()
+            started = time.perf_counter()
+            async with anyio.create_task_group() as tasks:
+                tasks.start_soon(reader, c, other, url, done, latencies)
+                answered = await scenario(c, importer, decks)
+                total = time.perf_counter() - started
+                done.set()
+            print(
+                f"  {name:12}: import done in {total:6.2f} s, longest importer request "
+                f"{answered * 1000:7.1f} ms | other reads "
+                f"p50 {percentile(latencies, 0.5) * 1000:6.1f} ms "
+                f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decks", type=int, default=20_000)
+    args = parser.parse_args()
+    for name in ("app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    anyio.run(run, args.decks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Байты на колоду и на состояние карточки: dataclass с __dict__ против слотов.
+
+    python -m benchmarks.bench_memory --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from app.domain.models import Deck, UserCardState
+
+
+# Прежнее представление: frozen dataclass без слотов и без интернирования.
+@dataclass(frozen=True)
+class LegacyDeck:
+    id: str
+    owner_id: str
+    title: str
+    description: Optional[str]
+    source_lang: str
+    target_lang: str
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class LegacyUserCardState:
+    id: str
+    user_id: str
+    card_id: str
+    status: str
+    stability: float
+    retrievability: float
+    ease_factor: float
+    interval: int
+    next_review_at: Optional[datetime]
+    last_review_at: Optional[datetime]
+    review_count: int
+    success_count: int
+    lapses_count: int
+
+
+def _uuid(i: int) -> str:
+    return str(UUID(int=i))
+
+
+def _copy(value: str) -> str:
+    # Как после разбора JSON: равная, но отдельная строка на каждую запись.
+    return "".join(list(value))
+
+
+def make_decks(cls, count: int):
+    base = datetime(2024, 1, 1)
+    owners = [_uuid(10**9 + i) for i in range(max(count // 100, 1))]
+    return [
+        cls(
+            id=_uuid(i),
+            owner_id=owners[i % len(owners)],
+            title=f"Deck {i}",
+            description=None,
+            source_lang=_copy("en"),
+            target_lang=_copy("ru"),
+            created_at=base + timedelta(seconds=i),
+            updated_at=base + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def make_states(cls, count: int):
+    base = datetime(2024, 1, 1)
+    user_id = _uuid(10**9)
+    return [
+        cls(
+            id=_uuid(i),
+            user_id=user_id,
+            card_id=_uuid(2 * 10**9 + i),
+            status=_copy("review"),
+            stability=1.5,
+            retrievability=0.9,
+            ease_factor=2.5,
+            interval=i % 30,
+            next_review_at=base + timedelta(days=i % 30),
+            last_review_at=base,
+            review_count=i % 7,
+            success_count=i % 5,
+            lapses_count=i % 3,
+        )
+        for i in range(count)
+    ]
+
+
+def bytes_per_record(factory, cls, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    records = factory(cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.count} records, bytes per record (incl. ids and datetimes):")
+    for label, factory, legacy, compact in (
+        ("deck", make_decks, LegacyDeck, Deck),
+        ("card state", make_states, LegacyUserCardState, UserCardState),
+    ):
+        before = bytes_per_record(factory, legacy, args.count)
+        after = bytes_per_record(factory, compact, args.count)
+        print(
+            f"  {label:<10} __dict__: {before:7.1f}  slots+intern: {after:7.1f}"
+            f"  ({before / after:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Стоимость записи одного события метрик (counter.inc и histogram.observe).
+
+    python -m benchmarks.bench_metrics
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.metrics import MetricsRegistry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Events.", labels=("route",))
+    histogram = registry.histogram("event_seconds", "Events.", labels=("route",))
+    labels = ("/api/v1/decks",)
+
+    for name, record in [
+        ("counter.inc", lambda: counter.inc(labels)),
+        ("histogram.observe", lambda: histogram.observe(labels, 0.003)),
+    ]:
+        started = time.perf_counter()
+        for _ in range(args.events):
+            record()
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {elapsed / args.events * 1e9:.0f} ns/event")
+
+    started = time.perf_counter()
+    registry.render()
+    print(f"render: {(time.perf_counter() - started) * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Цена одного решения rate limiter'а.
+
+Горячий ключ (один клиент долбит вход), поток новых ключей (перебор
+адресов) с вытеснением LRU и смешанная нагрузка по `--keys` ключам.
+
+    python -m benchmarks.bench_ratelimit --calls 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from app.shared.ratelimit import TokenBucketLimiter
+
+
+def measure(limiter: TokenBucketLimiter, keys) -> float:
+    acquire = limiter.acquire
+    started = time.perf_counter()
+    for key in keys:
+        acquire(key)
+    return (time.perf_counter() - started) / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    hot = ["10.0.0.1"] * args.calls
+    fresh = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.calls)]
+    pool = fresh[: args.keys]
+    mixed = [random.choice(pool) for _ in range(args.calls)]
+
+    cases = (("hot key", hot), ("new keys + LRU", fresh), ("mixed", mixed))
+    for name, keys in cases:
+        limiter = TokenBucketLimiter(60, 60.0, max_keys=args.keys)
+        seconds = measure(limiter, keys)
+        print(f"  {name:15}: {seconds * 1e9:6.0f} ns/decision, {len(limiter)} keys")
+
+
+if __name__ == "__main__":
+    main()
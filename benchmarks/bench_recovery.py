@@ -0,0 +1,101 @@
+"""Время восстановления пользователей и сессий из снимка и хвоста WAL.
+
+    python -m benchmarks.bench_recovery --users 1000000 --sessions 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import secrets
+import tempfile
+import time
+from uuid import UUID
+
+from app.adapters.journal import SESSION_KEY_SIZE, Journal
+from app.adapters.repositories import SessionStore, UserRecord, UserRepository
+
+
+def populate(users: UserRepository, sessions: SessionStore, count: int, per_user: int):
+    records = [
+        UserRecord(
+            id=str(UUID(int=i)),
+            email=f"user{i}@example.com",
+            role="user",
+            locale="ru",
+            proficiency_level="b1",
+            password_hash=secrets.token_hex(32),
+            password_salt=secrets.token_hex(16),
+        )
+        for i in range(count)
+    ]
+    users.restore(records)
+    # Ключи сессий — sha256 токенов; случайные 32 байта им равноценны.
+    sessions.restore(
+        {
+            secrets.token_bytes(SESSION_KEY_SIZE): records[i % count].id
+            for i in range(count * per_user)
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=5_000_000)
+    parser.add_argument("--wal-tail", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(directory)
+        users, sessions = UserRepository(journal=journal), SessionStore(journal=journal)
+        journal.recover(users, sessions)
+        populate(users, sessions, args.users, max(args.sessions // args.users, 1))
+
+        started = time.perf_counter()
+        journal.snapshot()
+        snapshot_time = time.perf_counter() - started
+        snapshot_size = os.path.getsize(os.path.join(directory, "snapshot.bin"))
+
+        started = time.perf_counter()
+        tail_users = args.wal_tail // 5
+        for i in range(tail_users):
+            record = users.create_user(
+                email=f"tail{i}@example.com",
+                password="Password123",
+                role="user",
+                locale="ru",
+                proficiency_level="b1",
+            )
+            for _ in range(4):
+                sessions.create(record.id)
+        wal_time = time.perf_counter() - started
+        journal.close()
+        expected = (len(users.records()), len(sessions))
+        del users, sessions
+        gc.collect()
+
+        journal = Journal(directory)
+        users, sessions = UserRepository(journal=journal), SessionStore(journal=journal)
+        started = time.perf_counter()
+        stats = journal.recover(users, sessions)
+        recovery_time = time.perf_counter() - started
+        journal.close()
+        assert (len(users.records()), len(sessions)) == expected
+
+    appended = tail_users * 5
+    print(f"{args.users} users, {args.sessions} sessions, WAL tail {appended}:")
+    print(
+        f"  snapshot write:   {snapshot_time:6.2f} s ({snapshot_size / 2**20:.0f} MiB)"
+    )
+    print(f"  WAL append:       {wal_time / appended * 1e6:6.1f} us/record")
+    print(f"  recovery total:   {recovery_time:6.2f} s")
+    print(f"    snapshot load:  {stats.snapshot_seconds:6.2f} s")
+    print(
+        f"    WAL replay:     {stats.replay_seconds:6.2f} s ({stats.wal_records} records)"
+    )
+
+
+if __name__ == "__main__":
+    main()
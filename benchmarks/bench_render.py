@@ -0,0 +1,126 @@
+"""Отрисовка карточек: разбор шаблона на каждый вызов против компиляции и кэша.
+
+Колода из `--cards` заметок с двумя карточками (прямая и обратная).
+Сравнивается стоимость одной карточки для подстановки регулярным
+выражением, скомпилированного шаблона и попадания в кэш; затем — отрисовка
+всей колоды холодной и тёплой и доля попаданий, когда `--reviews`
+повторений с распределением Ципфа идут через кэш на `--cache` записей.
+
+    python -m benchmarks.bench_render --cards 20000 --cache 8192
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from html import escape
+
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import User
+from app.schemas import DeckCreatePayload
+from app.services.decks import DeckService
+from app.services.rendering import (
+    BUILTIN_TEMPLATES,
+    FRONT_SIDE,
+    CardRenderer,
+    compile_template,
+)
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([^{}]*?)\s*\}\}")
+
+
+def interpret(source: str, fields, front_side: str = "") -> str:
+    """Без компиляции: шаблон разбирается заново на каждой отрисовке."""
+
+    def substitute(match):
+        name = match.group(1)
+        return front_side if name == FRONT_SIDE else escape(fields.get(name, ""))
+
+    return _PLACEHOLDER.sub(substitute, source)
+
+
+def per_call(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=20_000)
+    parser.add_argument("--cache", type=int, default=8192)
+    parser.add_argument("--reviews", type=int, default=200_000)
+    args = parser.parse_args()
+
+    template = BUILTIN_TEMPLATES["default"]
+    fields = {"front": "the house <b>", "back": "дом & сад"}
+    front, back = compile_template(template.front), compile_template(template.back)
+    assert back(fields, front(fields)) == interpret(
+        template.back, fields, interpret(template.front, fields)
+    )
+
+    service = DeckService(
+        InMemoryDeckRepository(),
+        renderer=CardRenderer(BUILTIN_TEMPLATES, max_entries=args.cache),
+    )
+    deck = service.create_deck(
+        User(id="u", email="u@x", role="user", locale="ru", proficiency_level="b1"),
+        DeckCreatePayload(title="Words", source_lang="en", target_lang="ru"),
+    )
+    for i in range(args.cards):
+        service.add_note(
+            deck,
+            {"front": f"word {i} <b>", "back": f"слово {i} & перевод"},
+            templates=[("basic", "default"), ("basic", "reverse")],
+        )
+    notes = {note.id: note for note in service.list_notes(deck)}
+    cards = service.list_cards(deck)
+    renderer = service._renderer
+    # Ничего не сохраняет: каждая отрисовка — промах.
+    uncached = CardRenderer(BUILTIN_TEMPLATES)
+    note, card = notes[cards[0].note_id], cards[0]
+
+    print("per card (both sides):")
+    repeat = 50_000
+    timings = (
+        (
+            "interpreted",
+            lambda: interpret(template.back, fields, interpret(template.front, fields)),
+        ),
+        ("compiled", lambda: back(fields, front(fields))),
+        ("renderer, miss", lambda: uncached.render(note, card, store=False)),
+        ("renderer, hit", lambda: renderer.render(note, card)),
+    )
+    renderer.render(note, card)
+    for name, func in timings:
+        print(f"  {name:15}: {per_call(func, repeat):6.2f} µs")
+
+    print(f"whole deck, {len(cards)} cards, cache fits the deck:")
+    service._renderer = CardRenderer(BUILTIN_TEMPLATES, max_entries=len(cards))
+    for name in ("cold", "warm"):
+        started = time.perf_counter()
+        service.render_cards(deck)
+        print(f"  {name:15}: {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+    # Повторения: немногие «трудные» карточки встречаются намного чаще.
+    fresh = CardRenderer(BUILTIN_TEMPLATES, max_entries=args.cache)
+    rng = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(len(cards))]
+    picks = rng.choices(cards, weights=weights, k=args.reviews)
+    started = time.perf_counter()
+    for picked in picks:
+        fresh.render(notes[picked.note_id], picked)
+    seconds = time.perf_counter() - started
+    stats = fresh.stats()
+    print(
+        f"{args.reviews} zipf reviews, cache {args.cache}: "
+        f"hit ratio {stats['hit_ratio']:.3f}, "
+        f"{seconds / args.reviews * 1e6:.2f} µs per review"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Стоимость сериализации страницы колод: pydantic-модели против fast path.
+
+    python -m benchmarks.bench_serialization --items 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.domain.models import Deck
+from app.schemas import (
+    DeckListEnvelope,
+    DeckListResponse,
+    DeckResponse,
+    deck_to_response,
+)
+from app.serialization import compile_encoder, dump_deck_list_envelope
+
+encode_uncached = compile_encoder(Deck, DeckResponse)
+
+
+def make_decks(count: int):
+    base = datetime(2024, 1, 1, 8, 0, 0, 123456)
+    return [
+        Deck(
+            id=f"00000000-0000-4000-8000-{i:012d}",
+            owner_id="11111111-2222-4333-8444-555555555555",
+            title=f"Deck number {i}",
+            description="Basics" if i % 2 else None,
+            source_lang="en",
+            target_lang="ru",
+            created_at=base + timedelta(minutes=i),
+            updated_at=base + timedelta(minutes=i, seconds=30),
+        )
+        for i in range(count)
+    ]
+
+
+def pydantic_path(decks) -> bytes:
+    # Как было: DeckResponse на каждый элемент, обёртки и повторная валидация
+    # по response_model перед кодированием.
+    envelope = DeckListEnvelope(
+        decks=DeckListResponse(
+            items=[deck_to_response(deck) for deck in decks],
+            limit=len(decks),
+            offset=0,
+            total=len(decks),
+        )
+    )
+    validated = DeckListEnvelope.model_validate(envelope.model_dump())
+    return validated.model_dump_json().encode("utf-8")
+
+
+def fast_path_cold(decks) -> bytes:
+    # Без кэша фрагментов: каждый элемент форматируется заново.
+    items = ",".join([encode_uncached(deck) for deck in decks])
+    return f'{{"decks":{{"items":[{items}]}}}}'.encode("utf-8")
+
+
+def fast_path(decks) -> bytes:
+    return dump_deck_list_envelope(decks, limit=len(decks), offset=0, total=len(decks))
+
+
+def measure(func, decks, rounds: int) -> float:
+    func(decks)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(decks)
+    return (time.perf_counter() - started) / rounds / len(decks) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2_000)
+    args = parser.parse_args()
+    decks = make_decks(args.items)
+
+    before = measure(pydantic_path, decks, args.rounds)
+    cold = measure(fast_path_cold, decks, args.rounds)
+    warm = measure(fast_path, decks, args.rounds)
+    print(f"page of {args.items} decks, per item:")
+    print(f"  pydantic models:         {before:.2f} us")
+    print(f"  fast path, cold encoder: {cold:.2f} us  ({before / cold:.1f}x)")
+    print(f"  fast path, cached items: {warm:.2f} us  ({before / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Склейка одинаковых чтений популярной колоды.
+
+`--clients` одновременных запросов одной колоды к AsyncDeckService поверх
+блокирующего хранилища с задержкой `--io-ms`; сравниваются обращения к
+хранилищу и время, за которое получили ответ все клиенты, со склейкой и без.
+
+    python -m benchmarks.bench_singleflight --clients 500 --io-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+
+import anyio
+
+from app.adapters.async_repositories import AsyncDeckRepository
+from app.services.decks import AsyncDeckService
+from benchmarks.bench_async import SlowDeckRepository
+from benchmarks.bench_sync import deck
+
+
+class CountingRepository(SlowDeckRepository):
+    calls = 0
+
+    def get(self, deck_id):
+        CountingRepository.calls += 1
+        return super().get(deck_id)
+
+
+async def burst(service: AsyncDeckService, clients: int) -> float:
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tasks:
+        for _ in range(clients):
+            tasks.start_soon(service.get_deck, "deck-1")
+    return time.perf_counter() - started
+
+
+async def run(clients: int, io_seconds: float) -> None:
+    repo = CountingRepository(io_seconds)
+    repo.save(deck(1, "Popular", datetime(2024, 1, 1)))
+    for coalesce in (False, True):
+        service = AsyncDeckService(AsyncDeckRepository(repo))
+        if not coalesce:
+            service._flights = None
+        CountingRepository.calls = 0
+        seconds = await burst(service, clients)
+        label = "single-flight" if coalesce else "no coalescing"
+        print(
+            f"  {label:14}: {CountingRepository.calls:4} storage reads, "
+            f"all {clients} answered in {seconds * 1000:7.1f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--io-ms", type=float, default=20)
+    args = parser.parse_args()
+    anyio.run(run, args.clients, args.io_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Стоимость открытых SSE-соединений.
+
+Поднимает `--connections` соединений к /api/v1/events через ASGI-приложение
+целиком (middleware, авторизация, StreamingResponse), ждёт первый кадр
+каждого, затем меряет память на соединение, задержку доставки события
+всем подписчикам и проверяет, что после отключения подписок не осталось.
+
+    python -m benchmarks.bench_sse --connections 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import secrets
+import time
+import tracemalloc
+from uuid import UUID
+
+from app import main as server
+from app.adapters.journal import session_key
+from app.adapters.repositories import UserRecord
+
+
+def populate(count: int):
+    records = [
+        UserRecord(
+            id=str(UUID(int=i)),
+            email=f"sse{i}@example.com",
+            role="user",
+            locale="ru",
+            proficiency_level="b1",
+            password_hash=secrets.token_hex(32),
+            password_salt=secrets.token_hex(16),
+        )
+        for i in range(count)
+    ]
+    server.user_repo.restore(records)
+    tokens = {secrets.token_urlsafe(32): record.id for record in records}
+    server.session_store.restore(
+        {session_key(token): user_id for token, user_id in tokens.items()}
+    )
+    return list(tokens.items())
+
+
+class Connection:
+    def __init__(self, token: str):
+        self.frames = 0
+        self.first = asyncio.Event()
+        self.event = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("bench", 80),
+            "client": ("bench", 1),
+            "root_path": "",
+            "path": "/api/v1/events",
+            "raw_path": b"/api/v1/events",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+
+    async def receive(self):
+        await self.closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        self.frames += 1
+        if self.frames == 1:
+            self.first.set()
+        elif b"event: deck" in message["body"]:
+            self.event.set()
+
+
+async def run(count: int) -> None:
+    sessions = populate(count)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    connections = [Connection(token) for token, _ in sessions]
+    tasks = [
+        asyncio.create_task(server.app(c.scope, c.receive, c.send)) for c in connections
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(c.first.wait() for c in connections))
+    opened = time.perf_counter() - started
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{count} connections open in {opened:.2f} s")
+    print(f"  memory per connection: {held / count / 1024:.1f} KiB")
+    print(f"  subscriptions: {server.events.stats()['subscriptions']}")
+
+    started = time.perf_counter()
+    for _, user_id in sessions:
+        server.events.publish(user_id, "deck", {"seq": 1, "id": "d", "op": "upsert"})
+    await asyncio.gather(*(c.event.wait() for c in connections))
+    print(f"  fan-out to all: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for c in connections:
+        c.closed.set()
+    await asyncio.gather(*tasks)
+    print(f"  after disconnect: {server.events.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=10_000)
+    args = parser.parse_args()
+    # Журнал доступа на каждое соединение только мешает замеру.
+    logging.getLogger("app").setLevel(logging.WARNING)
+    asyncio.run(run(args.connections))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Дельта-синхронизация против перекачки всего списка колод.
+
+У пользователя `--decks` колод, из которых между синхронизациями меняется
+`--changed`. Сравниваются байты ответа и время сервера: полный список
+(все страницы по 100, как делает клиент сейчас) против /api/v1/sync.
+
+    python -m benchmarks.bench_sync --decks 20000 --changed 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.adapters.changelog import ChangeLog
+from app.adapters.repositories import DeckQuery, InMemoryDeckRepository
+from app.domain.models import Deck
+from app.serialization import dump_deck_list_envelope, dump_sync_envelope
+
+OWNER = "user-1"
+
+
+def deck(i: int, title: str, at: datetime) -> Deck:
+    return Deck(
+        id=f"deck-{i}",
+        owner_id=OWNER,
+        title=title,
+        description=None,
+        source_lang="en",
+        target_lang="ru",
+        created_at=at,
+        updated_at=at,
+    )
+
+
+def full_list(repo: InMemoryDeckRepository) -> int:
+    size = 0
+    offset = 0
+    while True:
+        query = DeckQuery(owner_id=OWNER, limit=100, offset=offset)
+        items, total = repo.query(query)
+        size += len(
+            dump_deck_list_envelope(items, limit=100, offset=offset, total=total)
+        )
+        offset += 100
+        if offset >= total:
+            return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decks", type=int, default=20_000)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    repo = InMemoryDeckRepository()
+    log = ChangeLog(tombstone_ttl=3600, max_tombstones=10_000)
+    base = datetime(2024, 1, 1)
+    for i in range(args.decks):
+        saved = repo.save(deck(i, f"deck {i}", base))
+        log.record(OWNER, "deck", saved.id, saved)
+    _, position, _ = log.since(OWNER, 0, args.decks)
+
+    full_seconds = sync_seconds = 0.0
+    full_bytes = sync_bytes = 0
+    for round_ in range(args.rounds):
+        at = base + timedelta(minutes=round_ + 1)
+        for i in range(args.changed):
+            saved = repo.save(deck(i * 7 + round_, f"edited {round_}", at))
+            log.record(OWNER, "deck", saved.id, saved)
+
+        started = time.perf_counter()
+        full_bytes += full_list(repo)
+        full_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        changes, position, _ = log.since(OWNER, position, 1000)
+        sync_bytes += len(
+            dump_sync_envelope(changes, next_seq=position, has_more=False)
+        )
+        sync_seconds += time.perf_counter() - started
+
+    rounds = args.rounds
+    print(f"{args.decks} decks, {args.changed} changed between syncs, per sync:")
+    print(
+        f"  full list: {full_bytes / rounds / 1024:9.1f} KiB "
+        f"{full_seconds / rounds * 1000:8.2f} ms"
+    )
+    print(
+        f"  /sync:     {sync_bytes / rounds / 1024:9.1f} KiB "
+        f"{sync_seconds / rounds * 1000:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
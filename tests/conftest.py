@@ -1,7 +1,13 @@
 # tests/conftest.py
+import os
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]  # корень репозитория
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+# Все тесты ходят с одного адреса TestClient: лимиты по IP для них снимаем,
+# лимит по email остаётся рабочим.
+os.environ.setdefault("APP_RATE_LIMIT_LOGIN_PER_IP", "1000000/1")
+os.environ.setdefault("APP_RATE_LIMIT_REGISTER_PER_IP", "1000000/1")
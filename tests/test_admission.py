@@ -0,0 +1,118 @@
+from uuid import uuid4
+
+import anyio
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdaptiveLimit, AdmissionMiddleware, request_priority
+from app.main import app
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_adaptive_limit_grows_when_fast_and_backs_off_when_slow():
+    now = [0.0]
+    limit = AdaptiveLimit(
+        10, min_limit=2, max_limit=12, target_latency=0.1, clock=lambda: now[0]
+    )
+    for _ in range(200):
+        assert limit.try_acquire()
+        limit.in_flight = 8
+        limit.release(0.01)
+    assert limit.limit == 12
+
+    limit.in_flight = 1
+    limit.release(0.5)
+    assert limit.limit == 12 * 0.9
+    # Повторное замедление в том же окне лимит не трогает.
+    limit.in_flight = 1
+    limit.release(0.5, failed=True)
+    assert limit.limit == 12 * 0.9
+    for _ in range(100):
+        now[0] += 1
+        limit.in_flight = 1
+        limit.release(0.5)
+    assert limit.limit == 2
+
+
+def test_lower_priorities_get_smaller_share_of_limit():
+    limit = AdaptiveLimit(8, min_limit=1)
+    admitted = {
+        share: sum(limit.try_acquire(share) for _ in range(10))
+        for share in (0.5, 0.75, 1.0)
+    }
+    assert admitted == {0.5: 4, 0.75: 2, 1.0: 2}
+
+    def scope(method, path, headers=()):
+        return {"type": "http", "method": method, "path": path, "headers": headers}
+
+    auth = [(b"authorization", b"Bearer x")]
+    assert request_priority(scope("GET", "/api/v1/decks", auth)) == "read"
+    assert request_priority(scope("GET", "/api/v1/decks")) == "write"
+    assert request_priority(scope("POST", "/api/v1/decks", auth)) == "write"
+    assert request_priority(scope("POST", "/api/v1/decks:bulk", auth)) == "bulk"
+    upload = auth + [(b"content-type", b"multipart/form-data; boundary=x")]
+    assert request_priority(scope("POST", "/api/v1/decks", upload)) == "bulk"
+
+
+def test_overloaded_server_sheds_with_retry_after(monkeypatch):
+    headers = get_auth_headers()
+    monkeypatch.setattr(main.admission, "in_flight", int(main.admission.limit))
+
+    response = client.get("/api/v1/decks", headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    error = response.json()["error"]
+    assert error["code"] == "overloaded" and error["status"] == 503
+
+    assert client.get("/health").status_code == 200
+    monkeypatch.setattr(main.admission, "in_flight", 0)
+    assert client.get("/api/v1/decks", headers=headers).status_code == 200
+
+
+def test_latency_ends_at_response_start_and_profiler_is_exempt():
+    async def slow_body():
+        yield b"a"
+        await anyio.sleep(0.3)
+        yield b"b"
+
+    inner = FastAPI()
+
+    @inner.get("/download")
+    def download():
+        return StreamingResponse(slow_body(), media_type="text/plain")
+
+    limiter = AdaptiveLimit(8, min_limit=1, target_latency=0.1)
+    inner.add_middleware(AdmissionMiddleware, limiter=limiter, exempt=["/profile"])
+    local = TestClient(inner)
+    # Медленная отдача тела клиенту не снижает лимит.
+    assert local.get("/download").content == b"ab"
+    assert limiter.limit == 8 and limiter.in_flight == 0
+    # Исключённый путь не занимает слот и не влияет на задержку.
+    local.get("/profile")
+    assert limiter.in_flight == 0 and limiter.limit == 8
+    admission = next(
+        item for item in main.app.user_middleware if item.cls is AdmissionMiddleware
+    )
+    assert main.SAMPLING_PROFILE_PATH in admission.kwargs["exempt"]
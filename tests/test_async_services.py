@@ -0,0 +1,97 @@
+import threading
+
+import anyio
+import pytest
+
+from app.adapters.async_repositories import (
+    AsyncDeckRepository,
+    AsyncSessionStore,
+    AsyncUserRepository,
+)
+from app.adapters.repositories import (
+    DeckQuery,
+    InMemoryDeckRepository,
+    SessionStore,
+    UserRepository,
+)
+from app.domain.models import User
+from app.schemas import DeckCreatePayload, DeckUpdatePayload
+from app.services.auth import AsyncAuthService
+from app.services.decks import AsyncDeckService
+from app.shared.errors import ApiError
+
+
+class RecordingDeckRepository(InMemoryDeckRepository):
+    def __init__(self, blocking):
+        super().__init__()
+        self.blocking = blocking
+        self.threads = set()
+
+    def get(self, deck_id):
+        self.threads.add(threading.get_ident())
+        return super().get(deck_id)
+
+
+OWNER = User(
+    id="owner-1",
+    email="o@example.com",
+    role="user",
+    locale="ru",
+    proficiency_level="b1",
+)
+
+
+@pytest.mark.parametrize("blocking", [False, True])
+def test_deck_service_runs_inline_or_in_threadpool(blocking):
+    repo = RecordingDeckRepository(blocking=blocking)
+    service = AsyncDeckService(AsyncDeckRepository(repo))
+    events = []
+    service.subscribe(lambda event, deck: events.append(event))
+
+    async def scenario():
+        deck = await service.create_deck(
+            OWNER,
+            DeckCreatePayload(title=" Verbs ", source_lang="EN", target_lang="ru"),
+        )
+        assert deck.title == "Verbs" and deck.source_lang == "en"
+        fetched = await service.get_deck(deck.id)
+        updated = await service.update_deck(fetched, DeckUpdatePayload(title="Nouns"))
+        assert updated.created_at == deck.created_at
+        assert updated.updated_at >= deck.updated_at
+        items, total = await service.query_decks(DeckQuery(owner_id=OWNER.id))
+        assert total == 1 and items[0].title == "Nouns"
+        assert [d.id for d in await service.suggest_decks("no", 5)] == [deck.id]
+        assert await service.list_version(OWNER.id) == 2
+        await service.delete_deck(deck.id)
+        with pytest.raises(ApiError):
+            await service.get_deck(deck.id)
+        return threading.get_ident()
+
+    loop_thread = anyio.run(scenario)
+    assert events == ["created", "updated", "deleted"]
+    assert (loop_thread in repo.threads) is not blocking
+
+
+def test_auth_service_registers_and_resolves_tokens():
+    service = AsyncAuthService(
+        AsyncUserRepository(UserRepository()), AsyncSessionStore(SessionStore())
+    )
+
+    async def scenario():
+        record = await service.register_user(
+            email="A@Example.com",
+            password="Password123",
+            locale="ru",
+            proficiency_level="b1",
+        )
+        token = await service.authenticate(
+            email="a@example.com", password="Password123"
+        )
+        user = await service.get_user_by_token(token)
+        assert user.id == record.id and user.email == "a@example.com"
+        with pytest.raises(ApiError):
+            await service.authenticate(email="a@example.com", password="wrong")
+        with pytest.raises(ApiError):
+            await service.get_user_by_token("bad-token")
+
+    anyio.run(scenario)
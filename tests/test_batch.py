@@ -0,0 +1,197 @@
+import json
+from uuid import uuid4
+
+import anyio
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import main
+from app.batch import BatchDispatcher, SubRequest, dump_batch_envelope
+from app.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def batch(headers, *requests):
+    return client.post(
+        "/api/v1/batch", json={"requests": list(requests)}, headers=headers
+    )
+
+
+def test_batch_runs_sub_requests_in_order_with_own_statuses():
+    headers = get_auth_headers()
+    deck = {"title": "Verbs", "source_lang": "en", "target_lang": "ru"}
+    response = batch(
+        headers,
+        {"id": "before", "method": "GET", "path": "/api/v1/decks?limit=5"},
+        {"id": "create", "method": "POST", "path": "/api/v1/decks", "body": deck},
+        {"id": "after", "method": "GET", "path": "/api/v1/decks"},
+        {"id": "missing", "method": "GET", "path": "/api/v1/decks/nope"},
+        {"id": "invalid", "method": "POST", "path": "/api/v1/decks", "body": {}},
+        {"id": "unknown", "method": "GET", "path": "/api/v1/unknown"},
+    )
+    assert response.status_code == 200
+    results = {item["id"]: item for item in response.json()["responses"]}
+    assert list(results) == [
+        "before",
+        "create",
+        "after",
+        "missing",
+        "invalid",
+        "unknown",
+    ]
+
+    assert results["before"]["body"]["decks"]["total"] == 0
+    assert results["before"]["body"]["decks"]["limit"] == 5
+    assert results["create"]["status"] == 201
+    created = results["create"]["body"]["deck"]
+    assert results["create"]["headers"]["etag"]
+    assert [d["id"] for d in results["after"]["body"]["decks"]["items"]] == [
+        created["id"]
+    ]
+
+    missing = results["missing"]
+    assert missing["status"] == 404
+    assert missing["body"]["error"]["code"] == "not_found"
+    assert missing["body"]["error"]["instance"].endswith("/api/v1/decks/nope")
+    assert results["invalid"]["status"] == 422
+    assert results["invalid"]["body"]["error"]["code"] == "validation_error"
+    assert results["unknown"]["status"] == 404
+    # Как и у обычного запроса к неизвестному пути.
+    assert results["unknown"]["body"] == client.get("/api/v1/unknown").json()
+
+
+def test_batch_authenticates_once(monkeypatch):
+    headers = get_auth_headers()
+    calls = []
+    original = main.auth_service.get_user_by_token
+
+    async def counting(token):
+        calls.append(token)
+        return await original(token)
+
+    monkeypatch.setattr(main.auth_service, "get_user_by_token", counting)
+    response = batch(
+        headers,
+        {"method": "GET", "path": "/api/v1/decks"},
+        {"method": "GET", "path": "/api/v1/decks/suggest?prefix=v"},
+        {"method": "GET", "path": "/api/v1/decks"},
+    )
+    assert [item["status"] for item in response.json()["responses"]] == [200] * 3
+    assert len(calls) == 1
+
+    response = client.post(
+        "/api/v1/batch", json={"requests": [{"method": "GET", "path": "/health"}]}
+    )
+    assert response.status_code == 401
+
+
+def test_batch_rejects_nesting_and_oversized_batches(monkeypatch):
+    headers = get_auth_headers()
+    response = batch(headers, {"method": "POST", "path": "/api/v1/batch/"})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "invalid_batch"
+
+    monkeypatch.setattr(settings, "batch_max_requests", 1)
+    response = batch(
+        headers,
+        {"method": "GET", "path": "/health"},
+        {"method": "GET", "path": "/health"},
+    )
+    assert response.status_code == 413
+
+    response = batch(headers, {"method": "GET", "path": "http://evil/health"})
+    assert response.status_code == 422
+
+    response = batch(headers, {"method": "GET", "path": "/api/v1/events"})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "invalid_batch"
+
+    # Фрагмент или %-кодирование не позволяют обойти проверку пути.
+    response = batch(headers, {"method": "POST", "path": "/api/v1/batch#x"})
+    assert response.status_code == 422
+    response = batch(headers, {"method": "POST", "path": "/api/v1/%62atch"})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "invalid_batch"
+
+
+def test_batch_non_latin1_sub_request_fails_alone():
+    headers = get_auth_headers()
+    response = batch(
+        headers,
+        {"id": "header", "method": "GET", "path": "/health", "headers": {"X-A": "€"}},
+        {"id": "query", "method": "GET", "path": "/api/v1/decks?title=€"},
+    )
+    assert response.status_code == 200
+    first, second = response.json()["responses"]
+    assert (first["status"], first["body"]["error"]["code"]) == (400, "invalid_batch")
+    assert second["status"] == 200
+
+
+def test_batch_bounds_slow_streaming_and_large_sub_responses():
+    inner = FastAPI()
+
+    @inner.get("/slow")
+    async def slow():
+        await anyio.sleep(5)
+
+    @inner.get("/stream")
+    async def stream():
+        async def forever():
+            while True:
+                yield b"data: ping\n\n"
+                await anyio.sleep(0.01)
+
+        return StreamingResponse(forever(), media_type="text/event-stream")
+
+    @inner.get("/big")
+    async def big():
+        return Response(b"x" * 2048, media_type="text/plain")
+
+    @inner.get("/cookies")
+    async def cookies():
+        response = Response(b"{}", media_type="application/json")
+        response.set_cookie("a", "1")
+        response.set_cookie("b", "2")
+        return response
+
+    dispatcher = BatchDispatcher(inner, timeout=0.2, max_body_bytes=1024)
+    paths = ["/slow", "/stream", "/big", "/cookies"]
+    responses = anyio.run(
+        dispatcher.run,
+        {"headers": [], "app": inner},
+        None,
+        [SubRequest(id=p, method="GET", path=p, headers={}, body=None) for p in paths],
+    )
+    items = json.loads(dump_batch_envelope(responses))["responses"]
+    assert [(item["status"], item["body"]["error"]["code"]) for item in items[:3]] == [
+        (504, "timeout"),
+        (502, "streaming_not_supported"),
+        (502, "response_too_large"),
+    ]
+    # Повторяющиеся заголовки не теряются.
+    assert [c.split(";")[0] for c in items[3]["headers"]["set-cookie"]] == [
+        "a=1",
+        "b=2",
+    ]
@@ -0,0 +1,141 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app, deck_repo
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def deck_payload(title):
+    return {"title": title, "source_lang": "EN", "target_lang": "RU"}
+
+
+def bulk_create(headers, titles):
+    response = client.post(
+        "/api/v1/decks:bulk",
+        json={"items": [deck_payload(title) for title in titles]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_bulk_create_update_delete():
+    headers = get_auth_headers()
+    results = bulk_create(headers, ["One", "Two", "Three"])
+    assert [r["status"] for r in results] == [201, 201, 201]
+    assert [r["deck"]["title"] for r in results] == ["One", "Two", "Three"]
+    assert all(r["deck"]["source_lang"] == "en" for r in results)
+    ids = [r["id"] for r in results]
+
+    response = client.get("/api/v1/decks", headers=headers)
+    assert response.json()["decks"]["total"] == 3
+
+    response = client.get(f"/api/v1/decks/{ids[1]}", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.patch(
+        "/api/v1/decks:bulk",
+        json={
+            "items": [
+                {"id": ids[0], "title": "First"},
+                {"id": ids[1], "title": "Second", "if_match": etag},
+                {"id": ids[2], "title": "Third", "if_match": '"stale"'},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 200, 412]
+    assert results[1]["deck"]["title"] == "Second"
+    assert results[2]["error"] == "precondition_failed"
+    assert deck_repo.get(ids[2]).title == "Three"
+
+    response = client.request(
+        "DELETE",
+        "/api/v1/decks:bulk",
+        json={"ids": [ids[0], ids[1], "missing"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [
+        (ids[0], 204),
+        (ids[1], 204),
+        ("missing", 404),
+    ]
+    response = client.get("/api/v1/decks", headers=headers)
+    assert [deck["id"] for deck in response.json()["decks"]["items"]] == [ids[2]]
+
+
+def test_bulk_ownership_and_duplicates_are_per_item():
+    owner = get_auth_headers()
+    other = get_auth_headers()
+    mine = bulk_create(other, ["Mine"])[0]["id"]
+    theirs = bulk_create(owner, ["Theirs"])[0]["id"]
+
+    response = client.patch(
+        "/api/v1/decks:bulk",
+        json={
+            "items": [
+                {"id": mine, "title": "Renamed"},
+                {"id": theirs, "title": "Hijacked"},
+                {"id": mine, "title": "Again"},
+            ]
+        },
+        headers=other,
+    )
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 403, 409]
+    assert [r["error"] for r in results] == [None, "forbidden", "duplicate"]
+    assert deck_repo.get(theirs).title == "Theirs"
+    assert deck_repo.get(mine).title == "Renamed"
+
+    response = client.request(
+        "DELETE", "/api/v1/decks:bulk", json={"ids": [theirs]}, headers=other
+    )
+    assert response.json()["results"][0]["status"] == 403
+    assert deck_repo.get(theirs) is not None
+
+
+def test_bulk_size_is_capped(monkeypatch):
+    headers = get_auth_headers()
+    monkeypatch.setattr(settings, "bulk_max_items", 2)
+    response = client.post(
+        "/api/v1/decks:bulk",
+        json={"items": [deck_payload(str(i)) for i in range(3)]},
+        headers=headers,
+    )
+    assert response.status_code == 413
+    assert response.json()["error"]["code"] == "too_many_items"
+
+    response = client.post("/api/v1/decks:bulk", json={"items": []}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_bulk_save_bumps_owner_version_once():
+    headers = get_auth_headers()
+    results = bulk_create(headers, ["A", "B", "C", "D"])
+    owner_id = results[0]["deck"]["owner_id"]
+    assert deck_repo.version(owner_id) == 1
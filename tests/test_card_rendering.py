@@ -0,0 +1,132 @@
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.domain.models import Card, CardTemplate, Note
+from app.main import app, deck_repo, deck_service
+from app.services.rendering import CardRenderer, TemplateError, compile_template
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def wait_job(headers, location):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = client.get(location, headers=headers).json()["job"]
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job did not finish: {job}")
+
+
+def test_compile_template_substitutes_and_escapes_fields():
+    render = compile_template("<b>{{ front }}</b> 100% {{missing}}")
+    assert render({"front": "<i>&</i>"}) == "<b>&lt;i&gt;&amp;&lt;/i&gt;</b> 100% "
+
+    back = compile_template('{{FrontSide}}<hr id="answer">{{back}}')
+    assert back({"back": "дом"}, "<b>house</b>") == '<b>house</b><hr id="answer">дом'
+    assert compile_template("no fields")({}) == "no fields"
+
+    for broken in ("{{}}", "{{front}", "front}}", "{{a{{b}}"):
+        with pytest.raises(TemplateError):
+            compile_template(broken)
+
+
+def test_renderer_caches_per_note_version_and_template():
+    templates = {"t": CardTemplate(id="t", front="{{front}}", back="{{back}}")}
+    renderer = CardRenderer(templates, max_entries=2)
+    now = datetime(2024, 1, 1)
+    note = Note(
+        id="n1",
+        deck_id="d1",
+        fields={"front": "a", "back": "b"},
+        created_at=now,
+        updated_at=now,
+    )
+    card = Card(
+        id="c1",
+        note_id="n1",
+        deck_id="d1",
+        card_type="basic",
+        template_id="t",
+        created_at=now,
+    )
+
+    first = renderer.render(note, card)
+    assert (first.front, first.back) == ("a", "b")
+    assert renderer.render(note, card) == first
+    assert renderer.stats()["hits"] == 1 and renderer.stats()["templates"] == 1
+
+    edited = replace(note, fields={"front": "A"}, updated_at=now + timedelta(1))
+    assert renderer.render(edited, card).front == "A"
+    assert renderer.stats()["misses"] == 2
+
+    # Разовый проход с store=False не вытесняет горячие записи.
+    renderer.render_many(
+        [replace(note, id=f"x{i}") for i in range(5)],
+        [replace(card, note_id=f"x{i}") for i in range(5)],
+        store=False,
+    )
+    assert renderer.stats()["entries"] == 2
+    assert renderer.render(edited, card).front == "A"
+    assert renderer.stats()["hits"] == 2
+
+
+def test_rendered_cards_endpoint_and_export_job():
+    headers = get_auth_headers()
+    response = client.post(
+        "/api/v1/decks",
+        json={"title": "Words", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+    deck = deck_repo.get(response.json()["deck"]["id"])
+    note = deck_service.add_note(
+        deck,
+        {"front": "house", "back": "<дом>"},
+        templates=[("basic", "default"), ("basic", "reverse")],
+    )
+
+    url = f"/api/v1/decks/{deck.id}/cards/rendered"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    cards = response.json()["cards"]
+    assert [(c["note_id"], c["template_id"]) for c in cards] == [
+        (note.id, "default"),
+        (note.id, "reverse"),
+    ]
+    assert cards[0]["front"] == "house"
+    assert cards[0]["back"] == 'house<hr id="answer">&lt;дом&gt;'
+    assert cards[1]["front"] == "&lt;дом&gt;"
+    assert client.get(url, headers=get_auth_headers()).status_code == 403
+
+    response = client.post(
+        "/api/v1/jobs",
+        json={"kind": "deck_export", "params": {"render": True}},
+        headers=headers,
+    )
+    job = wait_job(headers, response.headers["Location"])
+    (exported,) = job["result"]["decks"]
+    assert exported["cards"] == cards
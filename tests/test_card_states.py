@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.adapters.card_states import NO_TIME, ColumnarCardStateStore
+from app.domain.models import UserCardState
+
+
+def make_state(user_id, card_id, **overrides):
+    values = dict(
+        id=str(uuid4()),
+        user_id=user_id,
+        card_id=card_id,
+        status="review",
+        stability=1.25,
+        retrievability=0.9,
+        ease_factor=2.5,
+        interval=3,
+        next_review_at=datetime(2024, 1, 4, 8, 30, 0, 123456),
+        last_review_at=datetime(2024, 1, 1, 8, 30),
+        review_count=4,
+        success_count=3,
+        lapses_count=1,
+    )
+    values.update(overrides)
+    return UserCardState(**values)
+
+
+def test_roundtrip_and_update():
+    store = ColumnarCardStateStore()
+    state = make_state("u1", "c1")
+    store.upsert(state)
+    assert store.get("u1", "c1") == state
+    assert store.get("u1", "missing") is None
+
+    new = make_state("u1", "c1", status="learning", next_review_at=None, interval=0)
+    store.upsert(new)
+    assert len(store) == 1
+    assert store.get("u1", "c1") == new
+    assert store.columns()["next_review_at"][0] == NO_TIME
+
+
+def test_aware_datetimes_are_stored_as_naive_utc():
+    store = ColumnarCardStateStore()
+    aware = datetime(2024, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=3)))
+    store.upsert(make_state("u1", "c1", last_review_at=aware))
+    assert store.get("u1", "c1").last_review_at == datetime(2024, 1, 1, 9, 0)
+
+
+def test_rejects_non_uuid_ids():
+    store = ColumnarCardStateStore()
+    with pytest.raises(ValueError):
+        store.upsert(make_state("u1", "c1", id="state-1"))
+
+
+def test_matches_dict_model_under_random_operations():
+    rng = random.Random(7)
+    store = ColumnarCardStateStore()
+    expected = {}
+    for _ in range(3000):
+        key = (f"u{rng.randrange(5)}", f"c{rng.randrange(200)}")
+        if rng.random() < 0.3:
+            assert store.delete(*key) == (expected.pop(key, None) is not None)
+        else:
+            state = make_state(*key, interval=rng.randrange(100))
+            store.upsert(state)
+            expected[key] = state
+    assert len(store) == len(expected)
+    for key, state in expected.items():
+        assert store.get(*key) == state
+    assert sorted(store, key=lambda s: s.id) == sorted(
+        expected.values(), key=lambda s: s.id
+    )
+
+
+def test_due_rows_scans_columns():
+    store = ColumnarCardStateStore()
+    now = datetime(2024, 1, 10)
+    store.upsert(make_state("u1", "c1", next_review_at=now - timedelta(days=1)))
+    store.upsert(make_state("u1", "c2", next_review_at=now + timedelta(days=1)))
+    store.upsert(make_state("u2", "c1", next_review_at=now))
+    store.upsert(make_state("u2", "c3", next_review_at=None))
+
+    due = {store.row(row).card_id for row in store.due_rows(now)}
+    assert due == {"c1"}
+    assert [store.row(row).user_id for row in store.due_rows(now, user_id="u2")] == [
+        "u2"
+    ]
+    assert store.due_rows(now, user_id="nobody") == []
+
+
+def test_due_rows_match_exact_scan_across_rebases():
+    rng = random.Random(3)
+    store = ColumnarCardStateStore()
+    start = datetime(2024, 1, 1)
+    for i in range(2000):
+        due = start + timedelta(minutes=rng.randrange(-400 * 1440, 800 * 1440))
+        store.upsert(
+            make_state(
+                f"u{i % 7}", f"c{i}", next_review_at=None if i % 11 == 0 else due
+            )
+        )
+    for i in range(0, 2000, 3):
+        store.delete(f"u{i % 7}", f"c{i}")
+
+    # Дни запросов и до, и далеко после базового дня колонки.
+    for days in (-500, -10, 0, 1, 100, 300, 700, 2000):
+        now = start + timedelta(days=days, minutes=rng.randrange(1440))
+        expected = [
+            row
+            for row in range(len(store))
+            if store.row(row).next_review_at is not None
+            and store.row(row).next_review_at <= now
+        ]
+        assert store.due_rows(now) == expected
+        assert store.due_rows(now, limit=5) == expected[:5]
+        assert store.due_rows(now, user_id="u3") == [
+            row for row in expected if store.row(row).user_id == "u3"
+        ]
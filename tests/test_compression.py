@@ -0,0 +1,129 @@
+import gzip
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import GzipMiddleware, accepts_gzip
+from app.main import app, deck_list_cache
+
+client = TestClient(app)
+
+
+def build_app():
+    demo = FastAPI()
+    demo.add_middleware(GzipMiddleware, minimum_size=100)
+
+    @demo.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @demo.get("/large")
+    def large():
+        return PlainTextResponse("x" * 1000, headers={"ETag": '"v1"'})
+
+    @demo.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"0" * 1000, media_type="image/png")
+
+    @demo.get("/stream")
+    def stream():
+        def chunks():
+            for i in range(5):
+                yield f"chunk-{i};" * 50
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return TestClient(demo)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_accepts_gzip_parses_quality_values():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert accepts_gzip("*;q=0, gzip")
+    assert not accepts_gzip("*, gzip;q=0")
+    assert not accepts_gzip("deflate, *;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
+
+
+def test_middleware_respects_threshold_and_media_type():
+    demo = build_app()
+    headers = {"Accept-Encoding": "gzip"}
+
+    response = demo.get("/small", headers=headers)
+    assert "content-encoding" not in response.headers
+
+    response = demo.get("/large", headers=headers)
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert response.text == "x" * 1000
+
+    response = demo.get("/image", headers=headers)
+    assert "content-encoding" not in response.headers
+
+    response = demo.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_middleware_compresses_streaming_responses():
+    demo = build_app()
+    response = demo.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"chunk-{i};" * 50 for i in range(5))
+
+
+def test_deck_list_reuses_precompressed_cache_entry():
+    headers = get_auth_headers()
+    for i in range(20):
+        client.post(
+            "/api/v1/decks",
+            json={"title": f"Deck {i}", "source_lang": "en", "target_lang": "ru"},
+            headers=headers,
+        )
+    headers = {**headers, "Accept-Encoding": "gzip"}
+
+    first = client.get("/api/v1/decks", headers=headers)
+    assert first.headers["content-encoding"] == "gzip"
+    # У сжатого представления свой сильный ETag; 304 даётся для обеих форм.
+    plain = client.get("/api/v1/decks", headers={**headers, "Accept-Encoding": ""})
+    assert first.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    for etag in (first.headers["etag"], plain.headers["etag"]):
+        response = client.get(
+            "/api/v1/decks", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    bytes_after_first = deck_list_cache.stats()["bytes"]
+    second = client.get("/api/v1/decks", headers=headers)
+    assert second.headers["content-encoding"] == "gzip"
+    assert deck_list_cache.stats()["bytes"] == bytes_after_first
+    assert len(second.json()["decks"]["items"]) == 20
+
+    with client.stream("GET", "/api/v1/decks", headers=headers) as response:
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == second.content
@@ -0,0 +1,149 @@
+import sys
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.adapters.indexes import SortedKeyIndex
+from app.adapters.repositories import DeckQuery, InMemoryDeckRepository, UserRepository
+from app.domain.models import Deck
+from app.shared.concurrency import StripedLock
+from app.shared.errors import ApiError
+
+BASE = datetime(2024, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    # Частые переключения GIL, чтобы гонки проявлялись в коротком тесте.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(count, target):
+    errors = []
+    barrier = threading.Barrier(count)
+
+    def wrapper(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as exc:  # noqa: BLE001 - собираем для проверки
+            errors.append(exc)
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def make_deck(index, owner, lang):
+    return Deck(
+        id=str(uuid4()),
+        owner_id=owner,
+        title=f"Deck {index}",
+        description=None,
+        source_lang=lang,
+        target_lang="ru",
+        created_at=BASE + timedelta(seconds=index),
+        updated_at=BASE + timedelta(seconds=index),
+    )
+
+
+def test_striped_lock_requires_power_of_two():
+    assert len(StripedLock(8)) == 8
+    with pytest.raises(ValueError):
+        StripedLock(6)
+
+
+def test_concurrent_registration_of_same_email_creates_one_user():
+    repo = UserRepository()
+    errors = run_threads(
+        16,
+        lambda _: repo.create_user(
+            email="Same@Example.com",
+            password="Password123",
+            role="user",
+            locale="ru",
+            proficiency_level="b1",
+        ),
+    )
+    assert len(errors) == 15
+    assert all(isinstance(exc, ApiError) and exc.status == 409 for exc in errors)
+    assert repo.get_by_email("same@example.com") is not None
+
+
+def test_sorted_index_readers_see_consistent_blocks_during_writes():
+    index = SortedKeyIndex(load=8)
+    stop = threading.Event()
+
+    def write(_):
+        for i in range(2000):
+            index.add(f"k{i % 97:02d}", str(i))
+            if i % 3 == 0:
+                index.remove(f"k{i % 97:02d}", str(i))
+        stop.set()
+
+    def read(_):
+        while not stop.is_set():
+            entries = list(index)
+            assert entries == sorted(entries)
+            assert len(index.prefix("k1", 5)) <= 5
+
+    errors = run_threads(4, lambda i: write(i) if i == 0 else read(i))
+    assert errors == []
+    assert list(index) == sorted(index)
+
+
+def test_deck_repository_stays_consistent_under_concurrent_writes_and_reads():
+    repo = InMemoryDeckRepository()
+    owners = [f"owner-{i}" for i in range(4)]
+    writers = 8
+    per_writer = 150
+    done = threading.Event()
+    finished = []
+
+    def write(worker):
+        for i in range(per_writer):
+            deck = make_deck(
+                worker * per_writer + i, owners[i % 4], ("en", "de")[i % 2]
+            )
+            repo.save(deck)
+            if i % 3 == 0:
+                repo.delete(deck.id)
+            elif i % 3 == 1:
+                repo.save(replace(deck, title=f"Renamed {i}"))
+        finished.append(worker)
+        if len(finished) == writers:
+            done.set()
+
+    def read(_):
+        while not done.is_set():
+            for query in (
+                DeckQuery(limit=50),
+                DeckQuery(owner_id="owner-1", sort="-title"),
+                DeckQuery(source_lang="en", target_lang="ru", sort="updated_at"),
+                DeckQuery(title_contains="deck", sort="created_at", offset=10),
+            ):
+                decks, total = repo.query(query)
+                assert len(decks) <= query.limit
+            repo.suggest("de", 10)
+
+    errors = run_threads(writers + 4, lambda i: write(i) if i < writers else read(i))
+    assert errors == []
+
+    decks = repo.list_all()
+    assert len(decks) == writers * per_writer * 2 // 3
+    _, total = repo.query(DeckQuery(limit=1))
+    assert total == len(decks)
+    for key in ("inserted", "created_at", "updated_at", "title"):
+        assert len(repo._sort_indexes[key]) == len(decks)
+    by_owner = sum(repo.query(DeckQuery(owner_id=owner))[1] for owner in owners)
+    assert by_owner == len(decks)
+    assert repo.version() == writers * (per_writer + per_writer // 3 * 2)
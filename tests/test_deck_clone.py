@@ -0,0 +1,144 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import User
+from app.main import app
+from app.memory import deep_sizeof
+from app.schemas import DeckCreatePayload
+from app.services.decks import DeckService
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_user(user_id):
+    return User(
+        id=user_id,
+        email=f"{user_id}@x",
+        role="user",
+        locale="ru",
+        proficiency_level="b1",
+    )
+
+
+def shared_deck(service, notes=3):
+    author = make_user("author")
+    deck = service.create_deck(
+        author,
+        DeckCreatePayload(title="Popular", source_lang="en", target_lang="ru"),
+    )
+    for i in range(notes):
+        service.add_note(deck, {"front": f"word {i}", "back": f"слово {i}"})
+    return deck
+
+
+def test_clone_shares_notes_until_subscriber_edits():
+    service = DeckService(InMemoryDeckRepository())
+    source = shared_deck(service)
+    clone = service.clone_deck(make_user("learner"), source)
+    assert clone.source_deck_id == source.id and clone.owner_id == "learner"
+
+    original = service.list_notes(source)
+    assert service.list_notes(clone) == original
+    cards = service.list_cards(source)
+    assert service.list_cards(clone) == cards
+
+    edited = service.update_note(clone, original[1].id, fields={"front": "mine"})
+    assert edited.id == original[1].id and edited.deck_id == clone.id
+    # Копия встала на место оригинала, исходная колода не изменилась.
+    assert [n.fields["front"] for n in service.list_notes(clone)] == [
+        "word 0",
+        "mine",
+        "word 2",
+    ]
+    assert service.list_notes(source) == original
+    # Карточки общие: состояния повторения подписчика ссылаются на те же id.
+    assert [c.id for c in service.list_cards(clone)] == [c.id for c in cards]
+
+    service.delete_note(clone, original[0].id)
+    assert len(service.list_notes(clone)) == 2
+    assert len(service.list_cards(clone)) == 2
+    assert len(service.list_notes(source)) == 3
+
+    # Неизменённые заметки следуют за исходной колодой.
+    service.update_note(source, original[2].id, fields={"front": "fixed typo"})
+    assert service.get_note(clone, original[2].id).fields["front"] == "fixed typo"
+    assert service.get_note(clone, original[1].id).fields["front"] == "mine"
+
+
+def test_clone_keeps_edited_note_cards_after_source_deletes_it():
+    service = DeckService(InMemoryDeckRepository())
+    source = shared_deck(service)
+    clone = service.clone_deck(make_user("learner"), source)
+    note = service.list_notes(source)[1]
+    cards = [c for c in service.list_cards(source) if c.note_id == note.id]
+
+    service.update_note(clone, note.id, fields={"front": "mine"})
+    service.delete_note(source, note.id)
+    assert note.id not in [n.id for n in service.list_notes(source)]
+    assert [c for c in service.list_cards(clone) if c.note_id == note.id] == cards
+
+    # Неизменённую заметку удаление в исходной колоде убирает и из клона.
+    other = service.list_notes(source)[0]
+    service.delete_note(source, other.id)
+    assert other.id not in [c.note_id for c in service.list_cards(clone)]
+
+
+def test_clone_is_constant_size_and_outlives_source():
+    service = DeckService(InMemoryDeckRepository())
+    source = shared_deck(service, notes=500)
+    before = deep_sizeof(service._notes.memory_stores())
+    clones = [service.clone_deck(make_user(f"u{i}"), source) for i in range(20)]
+    per_clone = (deep_sizeof(service._notes.memory_stores()) - before) / 20
+    assert per_clone < 1024
+
+    # Слой исходной колоды живёт, пока на него ссылаются клоны.
+    service.delete_deck(source.id)
+    assert len(service.list_notes(clones[0])) == 500
+    grandchild = service.clone_deck(make_user("late"), clones[0])
+    assert len(service.list_cards(grandchild)) == 500
+
+
+def test_clone_endpoint():
+    headers = get_auth_headers()
+    response = client.post(
+        "/api/v1/decks",
+        json={"title": "Mine", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+    source = response.json()["deck"]
+    assert source["source_deck_id"] is None
+
+    response = client.post(f"/api/v1/decks/{source['id']}:clone", headers=headers)
+    assert response.status_code == 201
+    clone = response.json()["deck"]
+    assert clone["source_deck_id"] == source["id"] and clone["title"] == "Mine"
+    assert response.headers["ETag"]
+    decks = client.get("/api/v1/decks", headers=headers).json()["decks"]
+    assert decks["total"] == 2
+
+    other = get_auth_headers()
+    response = client.post(f"/api/v1/decks/{source['id']}:clone", headers=other)
+    assert response.status_code == 403
+    response = client.post("/api/v1/decks/missing:clone", headers=headers)
+    assert response.status_code == 404
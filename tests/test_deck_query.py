@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.adapters.repositories import DeckQuery, InMemoryDeckRepository
+from app.domain.models import Deck
+from app.main import app
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_deck(deck_id, owner_id, title, source_lang, target_lang, minutes):
+    ts = datetime(2024, 1, 1) + timedelta(minutes=minutes)
+    return Deck(
+        id=deck_id,
+        owner_id=owner_id,
+        title=title,
+        description=None,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        created_at=ts,
+        updated_at=ts,
+    )
+
+
+def build_repo():
+    repo = InMemoryDeckRepository()
+    repo.save(make_deck("d1", "u1", "Verbs", "en", "ru", 3))
+    repo.save(make_deck("d2", "u1", "Animals", "en", "de", 1))
+    repo.save(make_deck("d3", "u2", "Irregular verbs", "en", "ru", 2))
+    repo.save(make_deck("d4", "u1", "Colors", "de", "ru", 4))
+    return repo
+
+
+def ids(result):
+    items, _ = result
+    return [deck.id for deck in items]
+
+
+def test_query_filters_by_owner_and_languages():
+    repo = build_repo()
+
+    assert ids(repo.query(DeckQuery(owner_id="u1"))) == ["d1", "d2", "d4"]
+    assert ids(repo.query(DeckQuery(owner_id="u1", target_lang="ru"))) == [
+        "d1",
+        "d4",
+    ]
+    items, total = repo.query(DeckQuery(source_lang="en", target_lang="ru"))
+    assert total == 2
+    assert {deck.id for deck in items} == {"d1", "d3"}
+    assert repo.query(DeckQuery(owner_id="nobody")) == ([], 0)
+
+
+def test_query_title_substring_and_sorting():
+    repo = build_repo()
+
+    assert ids(repo.query(DeckQuery(title_contains="VERB", sort="title"))) == [
+        "d3",
+        "d1",
+    ]
+    assert ids(repo.query(DeckQuery(sort="-created_at"))) == ["d4", "d1", "d3", "d2"]
+    assert ids(repo.query(DeckQuery(owner_id="u1", sort="created_at"))) == [
+        "d2",
+        "d1",
+        "d4",
+    ]
+    assert ids(repo.query(DeckQuery(sort="title", limit=2, offset=1))) == [
+        "d4",
+        "d3",
+    ]
+
+
+def test_query_indexes_follow_updates_and_deletes():
+    repo = build_repo()
+    repo.save(make_deck("d2", "u1", "Animals", "fr", "de", 10))
+    repo.delete("d4")
+
+    assert ids(repo.query(DeckQuery(source_lang="fr"))) == ["d2"]
+    assert ids(repo.query(DeckQuery(owner_id="u1", sort="-updated_at"))) == [
+        "d2",
+        "d1",
+    ]
+    # Порядок добавления не меняется при обновлении.
+    assert ids(repo.query(DeckQuery())) == ["d1", "d2", "d3"]
+
+
+def test_list_decks_endpoint_filters_and_sorts():
+    headers = get_auth_headers()
+    for title, source_lang in [("Beta", "en"), ("alpha", "EN"), ("Gamma", "de")]:
+        response = client.post(
+            "/api/v1/decks",
+            json={"title": title, "source_lang": source_lang, "target_lang": "ru"},
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+    response = client.get(
+        "/api/v1/decks",
+        params={"source_lang": "EN", "sort": "title"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    decks = response.json()["decks"]
+    assert decks["total"] == 2
+    assert [item["title"] for item in decks["items"]] == ["alpha", "Beta"]
+
+    response = client.get("/api/v1/decks", params={"title": "amm"}, headers=headers)
+    assert [item["title"] for item in response.json()["decks"]["items"]] == ["Gamma"]
+
+
+def test_list_decks_endpoint_rejects_unknown_sort():
+    headers = get_auth_headers()
+    response = client.get("/api/v1/decks", params={"sort": "owner_id"}, headers=headers)
+    assert response.status_code == 422
+    assert response.json()["error"]["code"] == "validation_error"
@@ -0,0 +1,104 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.adapters.indexes import SortedKeyIndex
+from app.main import app
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_deck(headers, title):
+    response = client.post(
+        "/api/v1/decks",
+        json={"title": title, "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response.json()["deck"]
+
+
+def test_sorted_key_index_prefix_and_removal():
+    index = SortedKeyIndex(load=2)
+    for i, title in enumerate(["verbs", "vocab a", "vocab b", "animals", "vocab c"]):
+        index.add(title, str(i))
+
+    assert index.prefix("vocab", 10) == ["1", "2", "4"]
+    assert index.prefix("vocab", 2) == ["1", "2"]
+    assert index.prefix("z", 10) == []
+
+    assert index.remove("vocab b", "2")
+    assert not index.remove("vocab b", "2")
+    assert index.prefix("vocab", 10) == ["1", "4"]
+    assert [item_id for _, item_id in index] == ["3", "0", "1", "4"]
+    assert len(index) == 4
+
+
+def test_suggest_matches_normalized_prefix_of_own_decks():
+    headers = get_auth_headers()
+    other_headers = get_auth_headers()
+    create_deck(headers, "Spanish  Verbs")
+    create_deck(headers, "spanish nouns")
+    create_deck(headers, "German")
+    create_deck(other_headers, "Spanish travel")
+
+    response = client.get(
+        "/api/v1/decks/suggest", params={"prefix": "SPANISH "}, headers=headers
+    )
+    assert response.status_code == 200
+    titles = [item["title"] for item in response.json()["suggestions"]]
+    assert titles == ["spanish nouns", "Spanish  Verbs"]
+
+    response = client.get(
+        "/api/v1/decks/suggest",
+        params={"prefix": "spa", "limit": 1},
+        headers=headers,
+    )
+    assert len(response.json()["suggestions"]) == 1
+
+
+def test_suggest_index_follows_update_and_delete():
+    headers = get_auth_headers()
+    deck = create_deck(headers, "Old title")
+
+    client.patch(
+        f"/api/v1/decks/{deck['id']}", json={"title": "New title"}, headers=headers
+    )
+    response = client.get(
+        "/api/v1/decks/suggest", params={"prefix": "old"}, headers=headers
+    )
+    assert response.json()["suggestions"] == []
+    response = client.get(
+        "/api/v1/decks/suggest", params={"prefix": "new"}, headers=headers
+    )
+    assert [item["id"] for item in response.json()["suggestions"]] == [deck["id"]]
+
+    client.delete(f"/api/v1/decks/{deck['id']}", headers=headers)
+    response = client.get(
+        "/api/v1/decks/suggest", params={"prefix": "new"}, headers=headers
+    )
+    assert response.json()["suggestions"] == []
+
+
+def test_suggest_requires_auth():
+    response = client.get("/api/v1/decks/suggest", params={"prefix": "a"})
+    assert response.status_code == 401
@@ -0,0 +1,175 @@
+from dataclasses import replace
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import Deck
+from app.main import app
+from app.serialization import dump_deck_envelope
+from app.shared.errors import ApiError
+from app.shared.etag import deck_etag, if_match, if_none_match
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_deck(headers):
+    response = client.post(
+        "/api/v1/decks",
+        json={"title": "Deck", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response
+
+
+def test_etag_header_matching_rules():
+    assert if_none_match('"a", W/"b"', '"b"')
+    assert if_none_match("*", '"a"')
+    assert not if_none_match(None, '"a"')
+    assert if_match(None, '"a"')
+    assert if_match('"a"', '"a"')
+    assert if_none_match('"a-gzip"', '"a"') and if_match('"a-gzip"', '"a"')
+    assert not if_none_match('"ab-gzip"', '"a"')
+    assert not if_match('W/"a"', '"a"')
+
+
+def test_get_deck_returns_304_for_matching_etag():
+    headers = get_auth_headers()
+    created = create_deck(headers)
+    deck_id = created.json()["deck"]["id"]
+
+    response = client.get(f"/api/v1/decks/{deck_id}", headers=headers)
+    etag = response.headers["ETag"]
+    assert etag == created.headers["ETag"]
+
+    response = client.get(
+        f"/api/v1/decks/{deck_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    client.patch(f"/api/v1/decks/{deck_id}", json={"title": "New"}, headers=headers)
+    response = client.get(
+        f"/api/v1/decks/{deck_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_list_etag_changes_only_with_owner_writes():
+    headers = get_auth_headers()
+    other_headers = get_auth_headers()
+    create_deck(headers)
+
+    etag = client.get("/api/v1/decks", headers=headers).headers["ETag"]
+    create_deck(other_headers)
+    response = client.get("/api/v1/decks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get(
+        "/api/v1/decks",
+        params={"limit": 5},
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+
+    create_deck(headers)
+    response = client.get("/api/v1/decks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["decks"]["items"]) == 2
+
+
+def test_patch_with_stale_if_match_is_rejected():
+    headers = get_auth_headers()
+    created = create_deck(headers)
+    deck_id = created.json()["deck"]["id"]
+    etag = created.headers["ETag"]
+
+    response = client.patch(
+        f"/api/v1/decks/{deck_id}",
+        json={"title": "First"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+
+    response = client.patch(
+        f"/api/v1/decks/{deck_id}",
+        json={"title": "Second"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert response.status_code == 412
+    assert response.json()["error"]["code"] == "precondition_failed"
+
+
+def test_deck_etag_and_fragment_follow_revision_not_updated_at():
+    repo = InMemoryDeckRepository()
+    now = datetime(2024, 1, 1)
+    deck = Deck(
+        id="d1",
+        owner_id="u1",
+        title="Old",
+        description=None,
+        source_lang="en",
+        target_lang="ru",
+        created_at=now,
+        updated_at=now,
+    )
+    first = repo.save(deck)
+    # Та же отметка времени: часы не сдвинулись между сохранениями.
+    second = repo.save(replace(first, title="New"))
+    assert (first.revision, second.revision) == (1, 2)
+    assert deck_etag(first) != deck_etag(second)
+    assert b'"title":"New"' in dump_deck_envelope(second)
+
+
+def test_save_checks_expected_revision_under_the_deck_lock():
+    repo = InMemoryDeckRepository()
+    now = datetime(2024, 1, 1)
+    deck = repo.save(
+        Deck(
+            id="d1",
+            owner_id="u1",
+            title="Old",
+            description=None,
+            source_lang="en",
+            target_lang="ru",
+            created_at=now,
+            updated_at=now,
+        )
+    )
+    # Параллельная запись после того, как клиент проверил If-Match.
+    repo.save(replace(deck, title="Concurrent"))
+    with pytest.raises(ApiError) as error:
+        repo.save(replace(deck, title="Mine"), expected_revision=deck.revision)
+    assert error.value.status == 412
+    assert repo.get("d1").title == "Concurrent"
+
+    other = repo.save(replace(deck, id="d2"))
+    saved = repo.save_many(
+        [replace(deck, title="Mine"), replace(other, title="Fine")],
+        {"d1": deck.revision, "d2": other.revision},
+    )
+    assert [d.title for d in saved] == ["Fine"]
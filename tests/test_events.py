@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import anyio
+from fastapi.testclient import TestClient
+
+from app import main
+from app.domain.models import UserCardState
+from app.main import app
+from app.schemas import DeckCreatePayload
+from app.services.notifications import ReviewNotifier, sse_stream
+from app.shared.pubsub import PubSub
+from app.shared.timer_wheel import TimerWheel
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_timer_wheel_fires_on_time_across_rounds():
+    wheel = TimerWheel(tick=1.0, slots=8, start=100.0)
+    wheel.schedule("soon", 102.5)
+    wheel.schedule("next-round", 111.0, payload="p")
+    wheel.schedule("overdue", 50.0)
+    wheel.schedule("cancelled", 103.0)
+    assert wheel.cancel("cancelled") and not wheel.cancel("cancelled")
+
+    assert wheel.advance(101.0) == [("overdue", None)]
+    assert wheel.advance(102.9) == []
+    assert wheel.advance(103.0) == [("soon", None)]
+    # Та же ячейка колеса, но следующий оборот — ещё рано.
+    assert wheel.advance(110.0) == []
+    assert wheel.advance(500.0) == [("next-round", "p")]
+    assert len(wheel) == 0
+
+
+def test_review_notifier_groups_due_cards_by_user():
+    async def scenario():
+        events = PubSub()
+        notifier = ReviewNotifier(events, clock=lambda: 0.0)
+        subscription = events.subscribe("u1")
+        base = datetime(1970, 1, 1)
+        for card, seconds in (("c1", 10), ("c2", 12), ("c3", 100)):
+            notifier.schedule(_state("u1", card, base + timedelta(seconds=seconds)))
+        notifier.schedule(_state("u1", "c3", None))
+        assert len(notifier) == 2
+
+        assert notifier.fire_due(now=20.0) == 2
+        event = await subscription.get(timeout=1)
+        assert event == ("review_due", {"card_ids": ["c1", "c2"]})
+        assert await subscription.get(timeout=0.01) is None
+
+    anyio.run(scenario)
+
+
+def test_sse_stream_unsubscribes_and_flags_overflow():
+    async def scenario():
+        events = PubSub(queue_size=2)
+        stream = sse_stream(events, "u1", heartbeat=0.01)
+        assert await stream.__anext__() == "retry: 5000\n\n"
+        assert await stream.__anext__() == ": ping\n\n"
+        for seq in range(3):
+            events.publish("u1", "deck", {"seq": seq})
+        assert await stream.__anext__() == "event: resync\ndata: {}\n\n"
+        assert await stream.__anext__() == 'id: 1\nevent: deck\ndata: {"seq":1}\n\n'
+        await stream.aclose()
+        assert events.stats() == {"topics": 0, "subscriptions": 0}
+
+    anyio.run(scenario)
+
+
+def test_events_endpoint_pushes_deck_changes():
+    headers = get_auth_headers()
+    token = headers["Authorization"].split()[1]
+
+    async def scenario():
+        received = []
+        got_event = anyio.Event()
+        disconnected = anyio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            received.append(message)
+            if b"event: deck" in message.get("body", b""):
+                got_event.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("test", 80),
+            "client": ("test", 1234),
+            "root_path": "",
+            "path": "/api/v1/events",
+            "raw_path": b"/api/v1/events",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(app, scope, receive, send)
+            while main.events.stats()["subscriptions"] == 0:
+                await anyio.sleep(0.01)
+            user = await main.auth_service.get_user_by_token(token)
+            payload = DeckCreatePayload(
+                title="Pushed", source_lang="en", target_lang="ru"
+            )
+            deck = await main.deck_service.create_deck(owner=user, payload=payload)
+            with anyio.fail_after(5):
+                await got_event.wait()
+            disconnected.set()
+
+        start = received[0]
+        assert start["status"] == 200
+        assert (b"content-type", b"text/event-stream; charset=utf-8") in start[
+            "headers"
+        ]
+        body = b"".join(message.get("body", b"") for message in received[1:])
+        assert f'"id":"{deck.id}","op":"upsert"'.encode() in body
+        assert main.events.stats()["subscriptions"] == 0
+
+    anyio.run(scenario)
+
+
+def _state(user_id, card_id, next_review_at):
+    return UserCardState(
+        id=str(uuid4()),
+        user_id=user_id,
+        card_id=card_id,
+        status="review",
+        stability=1.0,
+        retrievability=0.9,
+        ease_factor=2.5,
+        interval=1,
+        next_review_at=next_review_at,
+        last_review_at=None,
+        review_count=1,
+        success_count=1,
+        lapses_count=0,
+    )
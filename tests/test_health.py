@@ -9,3 +9,12 @@ def test_health_ok():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_responses_carry_request_id_and_security_headers():
+    r = client.get("/health", headers={"X-Request-Id": "req-1"})
+    assert r.headers["X-Request-Id"] == "req-1"
+    assert r.headers["X-Content-Type-Options"] == "nosniff"
+    assert r.headers["X-Frame-Options"] == "DENY"
+    assert r.headers["Referrer-Policy"] == "no-referrer"
+    assert client.get("/health").headers["X-Request-Id"]
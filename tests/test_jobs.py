@@ -0,0 +1,232 @@
+import threading
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.adapters.jobs import SQLiteJobStore
+from app.domain.models import Job
+from app.main import app, job_runner
+from app.services.jobs import JobKind, JobRunner, TooManyJobs
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def wait_job(headers, location):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = client.get(location, headers=headers).json()["job"]
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job did not finish: {job}")
+
+
+def wait_runner(runner, job_id, status):
+    deadline = time.monotonic() + 5
+    while runner.get(job_id).status != status:
+        assert time.monotonic() < deadline, runner.get(job_id)
+        time.sleep(0.005)
+    return runner.get(job_id)
+
+
+def test_import_and_export_jobs_run_in_background():
+    headers = get_auth_headers()
+    items = [
+        {"title": f"Imported {i}", "source_lang": "en", "target_lang": "ru"}
+        for i in range(3)
+    ]
+    response = client.post(
+        "/api/v1/jobs",
+        json={"kind": "deck_import", "params": {"items": items}},
+        headers=headers,
+    )
+    assert response.status_code == 202
+    assert response.json()["job"]["status"] == "queued"
+    job = wait_job(headers, response.headers["Location"])
+    assert job["status"] == "succeeded" and job["progress"] == 1.0
+    assert job["result"]["created"] == 3
+
+    decks = client.get("/api/v1/decks", headers=headers).json()["decks"]
+    assert decks["total"] == 3
+    # Импорт идёт через те же слушатели, что и API: изменения видны в /sync.
+    sync = client.get("/api/v1/sync", headers=headers).json()
+    assert len(sync["changes"]) == 3
+
+    response = client.post(
+        "/api/v1/jobs", json={"kind": "deck_export"}, headers=headers
+    )
+    job = wait_job(headers, response.headers["Location"])
+    exported = job["result"]["decks"]
+    assert sorted(d["title"] for d in exported) == [i["title"] for i in items]
+
+    other = get_auth_headers()
+    assert client.get(response.headers["Location"], headers=other).status_code == 403
+    assert client.get("/api/v1/jobs/missing", headers=headers).status_code == 404
+
+    for body in ({"kind": "mine_bitcoin"}, {"kind": "deck_import", "params": {}}):
+        response = client.post("/api/v1/jobs", json=body, headers=headers)
+        assert response.status_code == 422
+        assert response.json()["error"]["code"] == "invalid_job"
+
+
+def test_runner_orders_by_priority_and_caps_jobs_per_user():
+    order = []
+    gate = threading.Event()
+
+    def record(ctx, params):
+        order.append(params["name"])
+        if params["name"] == "blocker":
+            gate.wait(5)
+
+    runner = JobRunner(
+        SQLiteJobStore(), {"record": JobKind(record)}, workers=2, per_user=1
+    )
+    blocker = runner.submit("u1", "record", {"name": "blocker"})
+    wait_runner(runner, blocker.id, "running")
+    # Второй воркер свободен, но у u1 уже выполняется задача.
+    capped = runner.submit("u1", "record", {"name": "u1-second"}, priority=10)
+    time.sleep(0.05)
+    assert runner.get(capped.id).status == "queued"
+    gate.set()
+    wait_runner(runner, capped.id, "succeeded")
+
+    gate.clear()
+    blocker = runner.submit("u2", "record", {"name": "blocker"})
+    wait_runner(runner, blocker.id, "running")
+    low = runner.submit("u2", "record", {"name": "low"}, priority=-5)
+    high = runner.submit("u2", "record", {"name": "high"}, priority=5)
+    gate.set()
+    wait_runner(runner, low.id, "succeeded")
+    assert runner.get(high.id).status == "succeeded"
+    assert order == ["blocker", "u1-second", "blocker", "high", "low"]
+    runner.stop()
+
+
+def test_unfinished_jobs_per_user_are_capped(monkeypatch):
+    gate = threading.Event()
+    runner = JobRunner(
+        SQLiteJobStore(),
+        {"wait": JobKind(lambda ctx, params: gate.wait(5))},
+        max_unfinished=2,
+    )
+    first = runner.submit("u1", "wait", {})
+    runner.submit("u1", "wait", {})
+    try:
+        runner.submit("u1", "wait", {})
+    except TooManyJobs:
+        pass
+    else:
+        raise AssertionError("third unfinished job was accepted")
+    # Лимит у каждого владельца свой, отменённая задача освобождает место.
+    runner.submit("u2", "wait", {})
+    runner.cancel(runner.submit("u2", "wait", {}).id)
+    runner.submit("u2", "wait", {})
+    gate.set()
+    wait_runner(runner, first.id, "succeeded")
+    runner.stop()
+
+    monkeypatch.setattr(job_runner, "_max_unfinished", 0)
+    response = client.post(
+        "/api/v1/jobs", json={"kind": "deck_export"}, headers=get_auth_headers()
+    )
+    assert response.status_code == 429
+    assert response.json()["error"]["code"] == "too_many_jobs"
+
+
+def test_finished_jobs_are_pruned_per_owner_and_by_age():
+    store = SQLiteJobStore()
+    runner = JobRunner(
+        store, {"noop": JobKind(lambda ctx, params: {"ok": True})}, max_finished=2
+    )
+    jobs = [runner.submit("u1", "noop", {}) for _ in range(4)]
+    other = runner.submit("u2", "noop", {})
+    deadline = time.monotonic() + 5
+    while runner.stats() != {"queued": 0, "running": 0}:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    # Остаются две последние задачи u1; задачи u2 лимит u1 не трогает.
+    assert [store.get(job.id) is not None for job in jobs] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert store.get(other.id) is not None
+    runner.stop()
+
+    assert store.prune("u1", before=datetime(2100, 1, 1)) == 3
+    assert store.get(other.id) is None
+
+
+def test_runner_retries_cancels_and_recovers_after_restart(tmp_path):
+    attempts = []
+
+    def flaky(ctx, params):
+        attempts.append(ctx.job.attempts)
+        if len(attempts) < 3:
+            raise RuntimeError("transient")
+        return {"ok": True}
+
+    def endless(ctx, params):
+        while True:
+            ctx.progress(0.5)
+            time.sleep(0.005)
+
+    kinds = {"flaky": JobKind(flaky), "endless": JobKind(endless)}
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    runner = JobRunner(store, kinds, retry_delay=0.01)
+    job = wait_runner(runner, runner.submit("u1", "flaky", {}).id, "succeeded")
+    assert attempts == [1, 2, 3] and job.result == {"ok": True}
+
+    endless_job = runner.submit("u1", "endless", {})
+    wait_runner(runner, endless_job.id, "running")
+    runner.cancel(endless_job.id)
+    job = wait_runner(runner, endless_job.id, "cancelled")
+    assert job.progress == 0.5
+    runner.stop()
+
+    # Задача, прерванная падением процесса, после рестарта выполняется заново.
+    now = datetime(2024, 1, 1)
+    store.save(
+        Job(
+            id="interrupted",
+            owner_id="u1",
+            kind="flaky",
+            params={},
+            priority=0,
+            status="running",
+            progress=0.3,
+            attempts=1,
+            max_attempts=3,
+            result=None,
+            error=None,
+            created_at=now,
+            updated_at=now,
+        )
+    )
+    store.close()
+    restarted = JobRunner(SQLiteJobStore(str(tmp_path / "jobs.sqlite3")), kinds)
+    restarted.start()
+    assert wait_runner(restarted, "interrupted", "succeeded").attempts == 2
+    restarted.stop()
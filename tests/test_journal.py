@@ -0,0 +1,138 @@
+import os
+import threading
+
+import pytest
+
+from app.adapters.journal import SNAPSHOT_FILE, Journal, session_key
+from app.adapters.repositories import SessionStore, UserRepository
+
+
+def open_repos(directory, **kwargs):
+    journal = Journal(str(directory), **kwargs)
+    users = UserRepository(journal=journal)
+    sessions = SessionStore(journal=journal)
+    stats = journal.recover(users, sessions)
+    return journal, users, sessions, stats
+
+
+def register(users, sessions, email, locale="ru"):
+    record = users.create_user(
+        email=email,
+        password="Password123",
+        role="user",
+        locale=locale,
+        proficiency_level="b1",
+    )
+    return record, sessions.create(record.id)
+
+
+def test_state_survives_restart_through_wal_and_snapshot(tmp_path):
+    journal, users, sessions, stats = open_repos(tmp_path)
+    assert (stats.users, stats.sessions, stats.wal_records) == (0, 0, 0)
+    alice, alice_token = register(users, sessions, "alice@example.com")
+    journal.snapshot()
+    # Ноль-байт в строке уводит колонку снимка в формат с длинами.
+    bob, bob_token = register(users, sessions, "bob@example.com", locale="r\x00u")
+    second_token = sessions.create(alice.id)
+    journal.close()
+
+    journal, users, sessions, stats = open_repos(tmp_path)
+    assert (stats.users, stats.sessions, stats.wal_records) == (1, 1, 3)
+    assert users.get_by_email("alice@example.com") == alice
+    assert users.get_by_id(bob.id) == bob
+    assert sessions.get_user_id(alice_token) == alice.id
+    assert sessions.get_user_id(bob_token) == bob.id
+    assert sessions.get_user_id(second_token) == alice.id
+
+    journal.snapshot()
+    journal.close()
+    assert [name for name in os.listdir(tmp_path) if name.startswith("wal-")] == [
+        "wal-00000002.log"
+    ]
+    journal, users, sessions, stats = open_repos(tmp_path)
+    assert (stats.users, stats.sessions, stats.wal_records) == (2, 3, 0)
+    assert users.get_by_id(bob.id).locale == "r\x00u"
+    # Id сессий из снимка — те же объекты, что и в записях пользователей.
+    assert sessions.get_user_id(bob_token) is users.get_by_id(bob.id).id
+    journal.close()
+
+
+def test_torn_wal_tail_is_dropped(tmp_path):
+    journal, users, sessions, _ = open_repos(tmp_path)
+    alice, token = register(users, sessions, "alice@example.com")
+    journal.close()
+    wal_path = tmp_path / "wal-00000000.log"
+    size = wal_path.stat().st_size
+    with open(wal_path, "ab") as fh:
+        fh.write(b"\x40\x00\x00\x00garbage")
+
+    journal, users, sessions, stats = open_repos(tmp_path)
+    assert stats.wal_records == 2
+    assert sessions.get_user_id(token) == alice.id
+    assert wal_path.stat().st_size == size
+    register(users, sessions, "bob@example.com")
+    journal.close()
+    _, users, _, stats = open_repos(tmp_path)
+    assert stats.wal_records == 4
+    assert users.get_by_email("bob@example.com") is not None
+
+
+def test_corrupted_snapshot_is_rejected(tmp_path):
+    journal, users, sessions, _ = open_repos(tmp_path)
+    register(users, sessions, "alice@example.com")
+    journal.snapshot()
+    journal.close()
+    path = tmp_path / SNAPSHOT_FILE
+    data = bytearray(path.read_bytes())
+    data[30] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        open_repos(tmp_path)
+
+
+def test_snapshot_is_taken_in_background_after_threshold(tmp_path):
+    journal, users, sessions, _ = open_repos(tmp_path, snapshot_every=4)
+    for i in range(3):
+        register(users, sessions, f"user{i}@example.com")
+    for thread in threading.enumerate():
+        if thread.name == "journal-snapshot":
+            thread.join()
+    journal.close()
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    _, users, sessions, stats = open_repos(tmp_path)
+    assert stats.users + stats.wal_records >= 3
+    assert len(users.records()) == 3 and len(sessions) == 3
+
+
+def test_snapshot_merges_new_sessions_into_mapped_table(tmp_path):
+    journal, users, sessions, _ = open_repos(tmp_path)
+    alice, first = register(users, sessions, "alice@example.com")
+    journal.snapshot()
+    assert sessions.tokens() == {} and len(sessions) == 1
+    sessions.restore({session_key("z" * 80): alice.id, session_key("a"): alice.id})
+    journal.snapshot()
+    later = sessions.create(alice.id)
+    journal.snapshot()
+    journal.close()
+
+    _, _, sessions, stats = open_repos(tmp_path)
+    assert stats.sessions == len(sessions) == 4
+    for token in (first, "z" * 80, "a", later):
+        assert sessions.get_user_id(token) == alice.id
+    assert sessions.get_user_id("b") is None
+    assert sessions.get_user_id("z" * 81) is None
+
+
+def test_journal_files_hold_no_tokens_and_are_private(tmp_path):
+    journal, users, sessions, _ = open_repos(tmp_path)
+    alice, first = register(users, sessions, "alice@example.com")
+    journal.snapshot()
+    second = sessions.create(alice.id)
+    journal.close()
+
+    for path in tmp_path.iterdir():
+        assert path.stat().st_mode & 0o777 == 0o600
+        data = path.read_bytes()
+        assert first.encode() not in data and second.encode() not in data
+    _, _, sessions, _ = open_repos(tmp_path)
+    assert sessions.get_user_id(first) == sessions.get_user_id(second) == alice.id
@@ -0,0 +1,136 @@
+import sys
+from dataclasses import dataclass
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.memory import deep_sizeof, store_report
+
+client = TestClient(app)
+
+
+def get_auth_headers(email=None):
+    email = email or f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@dataclass
+class Record:
+    name: str
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    shared = "x" * 1000
+    assert deep_sizeof([shared, shared]) == sys.getsizeof([shared, shared]) + (
+        sys.getsizeof(shared)
+    )
+    assert deep_sizeof({"a": Record(shared)}) > sys.getsizeof(shared)
+
+    report = store_report({"records": {"a": Record("a"), "b": Record("b")}})
+    assert report["records"]["objects"] == 2
+    assert report["records"]["bytes"] > 0
+
+
+def test_memory_report_lists_repository_stores(monkeypatch):
+    response = client.get("/api/v1/admin/memory", headers=get_auth_headers())
+    assert response.status_code == 403
+
+    admin_email = f"admin-{uuid4()}@example.com"
+    monkeypatch.setattr(settings, "admin_email", admin_email)
+    response = client.get("/api/v1/admin/memory", headers=get_auth_headers(admin_email))
+    assert response.status_code == 200
+    stores = response.json()["stores"]
+    for name in ("users.by_id", "users.by_email", "sessions.tokens", "decks.storage"):
+        assert name in stores
+    assert stores["sessions.tokens"]["objects"] >= 1
+    assert stores["users.by_id"]["bytes"] > 0
+
+
+def test_tracemalloc_snapshots_and_diff(monkeypatch):
+    admin_email = f"admin-{uuid4()}@example.com"
+    monkeypatch.setattr(settings, "admin_email", admin_email)
+    headers = get_auth_headers(admin_email)
+
+    response = client.post("/api/v1/admin/memory/snapshots", headers=headers)
+    assert response.status_code == 409
+
+    response = client.post("/api/v1/admin/memory/tracemalloc/start", headers=headers)
+    assert response.json()["tracing"] is True
+    try:
+        base = client.post("/api/v1/admin/memory/snapshots", headers=headers).json()
+        for _ in range(20):
+            get_auth_headers()
+        current = client.post(
+            "/api/v1/admin/memory/snapshots", params={"limit": 5}, headers=headers
+        ).json()
+        assert len(current["top"]) <= 5
+
+        response = client.get(
+            "/api/v1/admin/memory/diff",
+            params={"base": base["id"], "current": current["id"]},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert {"site", "size_diff", "count_diff"} <= set(response.json()["diff"][0])
+
+        response = client.get(
+            "/api/v1/admin/memory/diff",
+            params={"base": 999999, "current": current["id"]},
+            headers=headers,
+        )
+        assert response.status_code == 404
+    finally:
+        response = client.post("/api/v1/admin/memory/tracemalloc/stop", headers=headers)
+    assert response.json()["tracing"] is False
+
+
+def test_domain_records_use_slots_and_interned_fields():
+    from datetime import datetime
+
+    from app.domain.models import Deck
+
+    now = datetime(2024, 1, 1)
+    decks = [
+        Deck(
+            id=str(uuid4()),
+            owner_id="owner",
+            title="t",
+            description=None,
+            source_lang="".join(["e", "n"]),
+            target_lang="ru",
+            created_at=now,
+            updated_at=now,
+        )
+        for _ in range(2)
+    ]
+    assert not hasattr(decks[0], "__dict__")
+    assert decks[0].source_lang is decks[1].source_lang
+
+
+def test_interning_table_is_bounded(monkeypatch):
+    from app.domain import models
+
+    monkeypatch.setattr(models, "_INTERNED", {})
+    monkeypatch.setattr(models, "INTERNED_MAX", 2)
+    assert models.intern_value("".join(["e", "n"])) is models.intern_value("en")
+    models.intern_value("ru")
+    # Таблица полна: произвольные значения клиентов в ней не оседают.
+    value = "".join(["x", "x"])
+    assert models.intern_value(value) is value
+    assert len(models._INTERNED) == 2
@@ -0,0 +1,83 @@
+import threading
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import MetricsRegistry
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_registry_merges_per_thread_values():
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits.", labels=("kind",))
+    latency = registry.histogram("op_seconds", "Op.", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(100):
+            hits.inc(("a",))
+        latency.observe((), 0.05)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.observe((), 0.5)
+    latency.observe((), 5.0)
+
+    text = registry.render()
+    assert "# TYPE hits_total counter" in text
+    assert 'hits_total{kind="a"} 400' in text
+    assert 'op_seconds_bucket{le="0.1"} 4' in text
+    assert 'op_seconds_bucket{le="1.0"} 5' in text
+    assert 'op_seconds_bucket{le="+Inf"} 6' in text
+    assert "op_seconds_count 6" in text
+
+
+def test_metrics_endpoint_reports_routes_and_repositories():
+    headers = get_auth_headers()
+    response = client.post(
+        "/api/v1/decks",
+        json={"title": "Metrics", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+    client.get(f"/api/v1/decks/{response.json()['deck']['id']}", headers=headers)
+    client.get("/api/v1/decks/missing", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/decks/{deck_id}",status="2xx"}'
+        in text
+    )
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/decks/{deck_id}",status="4xx"}'
+        in text
+    )
+    assert 'repository_operation_duration_seconds_count{repository="decks"' in text
+    assert 'repository_operation_duration_seconds_count{repository="sessions"' in text
+    assert "threadpool_tokens_total 40" in text
+    assert "http_requests_in_flight" in text
@@ -0,0 +1,122 @@
+import threading
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.config import settings
+from app.main import app
+from app.profiling import SamplingProfiler, collapse
+
+client = TestClient(app)
+
+
+def get_auth_headers(email=None):
+    email = email or f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def get_admin_headers(monkeypatch):
+    admin_email = f"admin-{uuid4()}@example.com"
+    monkeypatch.setattr(settings, "admin_email", admin_email)
+    return get_auth_headers(admin_email)
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler()
+    profiler.start(rate_hz=200)
+    time.sleep(0.2)
+    samples = profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert not profiler.running
+    text = collapse(samples)
+    line = next(line for line in text.splitlines() if "busy_loop" in line)
+    stack, count = line.rsplit(" ", 1)
+    assert stack.startswith("busy-worker;")
+    assert int(count) > 0
+
+
+def test_profile_endpoint_is_admin_only(monkeypatch):
+    response = client.post(
+        "/api/v1/admin/profile", params={"seconds": 0.05}, headers=get_auth_headers()
+    )
+    assert response.status_code == 403
+
+    response = client.post(
+        "/api/v1/admin/profile",
+        params={"seconds": 0.05, "rate_hz": 200},
+        headers=get_admin_headers(monkeypatch),
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def profiled_get(headers, profile_header):
+    request_id = str(uuid4())
+    response = client.get(
+        "/api/v1/decks",
+        headers={**headers, "X-Profile": profile_header, "X-Request-Id": request_id},
+    )
+    assert response.status_code == 200
+    return request_id
+
+
+def test_request_tagged_with_header_is_profiled(monkeypatch):
+    monkeypatch.setattr(settings, "request_profiling_enabled", True)
+    monkeypatch.setattr(settings, "request_profiling_secret", "s3cret")
+    headers = get_auth_headers()
+    request_id = profiled_get(headers, "s3cret")
+    wrong_secret = profiled_get(headers, "1")
+    # Пока профилируется другой запрос, этот выполняется без профиля.
+    with profiling._profile_lock:
+        busy = profiled_get(headers, "s3cret")
+
+    admin_headers = get_admin_headers(monkeypatch)
+    response = client.get("/api/v1/admin/profile/requests", headers=admin_headers)
+    profiled = [item["request_id"] for item in response.json()["profiles"]]
+    assert request_id in profiled
+    assert wrong_secret not in profiled and busy not in profiled
+
+    response = client.get(
+        f"/api/v1/admin/profile/requests/{request_id}", headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert "list_decks_endpoint" in response.text
+
+
+def test_profile_header_is_ignored_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "request_profiling_enabled", False)
+    monkeypatch.setattr(settings, "request_profiling_secret", "1")
+    request_id = str(uuid4())
+    client.get("/health", headers={"X-Profile": "1", "X-Request-Id": request_id})
+
+    response = client.get(
+        f"/api/v1/admin/profile/requests/{request_id}",
+        headers=get_admin_headers(monkeypatch),
+    )
+    assert response.status_code == 404
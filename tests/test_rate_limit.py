@@ -0,0 +1,66 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+from app.shared.ratelimit import TokenBucketLimiter, parse_rate
+
+client = TestClient(app)
+
+
+def test_token_bucket_refills_lazily_and_evicts_idle_keys():
+    now = [0.0]
+    limiter = TokenBucketLimiter(3, 3.0, max_keys=4, shards=1, clock=lambda: now[0])
+    assert [limiter.acquire("ip") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("ip") == pytest.approx(1.0)
+    now[0] += 1.5
+    assert limiter.acquire("ip") == 0.0
+    assert limiter.acquire("ip") == pytest.approx(0.5)
+    now[0] += 100
+    assert [limiter.acquire("ip") for _ in range(4)][-1] > 0
+
+    for key in ("a", "b", "c", "d"):
+        limiter.acquire(key)
+    assert len(limiter) == 4
+    # "ip" вытеснен как самый давний — вернулся с полной корзиной.
+    assert limiter.acquire("ip") == 0.0
+
+
+def test_parse_rate():
+    assert parse_rate("30/60") == (30, 60.0)
+    assert parse_rate("5") == (5, 1.0)
+    with pytest.raises(ValueError):
+        parse_rate("0/60")
+
+
+def test_login_is_limited_per_email(monkeypatch):
+    monkeypatch.setattr(main, "login_email_limiter", TokenBucketLimiter(2, 60))
+    email = f"user-{uuid4()}@example.com"
+    credentials = {"email": email, "password": "Password123"}
+    assert client.post("/api/v1/auth/register", json=credentials).status_code == 201
+
+    for _ in range(2):
+        response = client.post("/api/v1/auth/login", json=credentials)
+        assert response.status_code == 200
+    response = client.post(
+        "/api/v1/auth/login", json={**credentials, "email": email.upper()}
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert response.json()["error"]["code"] == "rate_limited"
+
+    other = {"email": f"user-{uuid4()}@example.com", "password": "Password123"}
+    client.post("/api/v1/auth/register", json=other)
+    assert client.post("/api/v1/auth/login", json=other).status_code == 200
+
+
+def test_register_is_limited_per_ip(monkeypatch):
+    monkeypatch.setattr(main, "register_ip_limiter", TokenBucketLimiter(1, 3600))
+    first = {"email": f"user-{uuid4()}@example.com", "password": "Password123"}
+    second = {"email": f"user-{uuid4()}@example.com", "password": "Password123"}
+    assert client.post("/api/v1/auth/register", json=first).status_code == 201
+    response = client.post("/api/v1/auth/register", json=second)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3600"
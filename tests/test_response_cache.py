@@ -0,0 +1,93 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app, deck_list_cache
+from app.shared.cache import ResponseCache
+
+client = TestClient(app)
+
+
+def get_auth_headers(email=None):
+    email = email or f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_response_cache_evicts_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", "u1", b"aaaa")
+    cache.put("b", "u1", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", "u2", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    cache.put("d", "u2", b"dddddddd")
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get("d") == b"dddddddd"
+    assert cache.get("a") is None
+
+    cache.put("big", "u1", b"x" * 11)
+    assert cache.get("big") is None
+
+
+def test_response_cache_invalidates_scope_only():
+    cache = ResponseCache()
+    cache.put("a", "u1", b"1")
+    cache.put("b", "u2", b"2")
+    cache.invalidate("u1")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == b"2"
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_deck_list_is_served_from_cache_until_owner_writes():
+    headers = get_auth_headers()
+    client.post(
+        "/api/v1/decks",
+        json={"title": "Cached", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    )
+
+    first = client.get("/api/v1/decks", headers=headers)
+    hits = deck_list_cache.stats()["hits"]
+    second = client.get("/api/v1/decks", headers=headers)
+    assert deck_list_cache.stats()["hits"] == hits + 1
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+    deck_id = first.json()["decks"]["items"][0]["id"]
+    client.patch(f"/api/v1/decks/{deck_id}", json={"title": "Fresh"}, headers=headers)
+    response = client.get("/api/v1/decks", headers=headers)
+    assert response.json()["decks"]["items"][0]["title"] == "Fresh"
+
+
+def test_cache_stats_are_admin_only(monkeypatch):
+    response = client.get("/api/v1/admin/cache", headers=get_auth_headers())
+    assert response.status_code == 403
+
+    admin_email = f"admin-{uuid4()}@example.com"
+    monkeypatch.setattr(settings, "admin_email", admin_email)
+    response = client.get("/api/v1/admin/cache", headers=get_auth_headers(admin_email))
+    assert response.status_code == 200
+    assert "hit_ratio" in response.json()["deck_lists"]
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.domain.models import Deck
+from app.main import app
+from app.schemas import (
+    DeckEnvelope,
+    DeckListEnvelope,
+    DeckListResponse,
+    deck_to_response,
+)
+from app.serialization import (
+    compile_encoder,
+    dump_deck_envelope,
+    dump_deck_list_envelope,
+)
+
+
+def make_deck(deck_id, description, created_at):
+    return Deck(
+        id=deck_id,
+        owner_id="user-1",
+        title="Ёлка «тест»",
+        description=description,
+        source_lang="en",
+        target_lang="ru",
+        created_at=created_at,
+        updated_at=datetime(2024, 5, 1, 12, 30),
+    )
+
+
+@pytest.mark.parametrize(
+    "deck",
+    [
+        make_deck("deck-1", None, datetime(2024, 1, 2, 3, 4, 5, 678901)),
+        make_deck(
+            "deck-2", "Basics", datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        ),
+    ],
+)
+def test_fast_path_matches_pydantic_output(deck):
+    expected = DeckEnvelope(deck=deck_to_response(deck)).model_dump_json()
+    assert dump_deck_envelope(deck) == expected.encode("utf-8")
+
+    expected = DeckListEnvelope(
+        decks=DeckListResponse(
+            items=[deck_to_response(deck)] * 2, limit=20, offset=0, total=2
+        )
+    ).model_dump_json()
+    body = dump_deck_list_envelope([deck, deck], limit=20, offset=0, total=2)
+    assert body == expected.encode("utf-8")
+
+
+def test_compile_encoder_rejects_missing_fields():
+    with pytest.raises(TypeError):
+        compile_encoder(Deck, DeckListResponse)
+
+
+def test_openapi_still_describes_response_models():
+    schema = app.openapi()
+    get_deck = schema["paths"]["/api/v1/decks/{deck_id}"]["get"]
+    ref = get_deck["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ref["$ref"].endswith("/DeckEnvelope")
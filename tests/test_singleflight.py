@@ -0,0 +1,173 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import anyio
+import pytest
+
+from app.adapters.async_repositories import AsyncDeckRepository
+from app.adapters.repositories import InMemoryDeckRepository
+from app.domain.models import Deck
+from app.schemas import DeckUpdatePayload
+from app.services.decks import AsyncDeckService, DeckService
+from app.shared.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class SlowDeckRepository(InMemoryDeckRepository):
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+
+    def get(self, deck_id):
+        self.gets += 1
+        time.sleep(0.05)
+        return super().get(deck_id)
+
+
+def make_deck(title="Verbs"):
+    return Deck(
+        id="deck-1",
+        owner_id="owner-1",
+        title=title,
+        description=None,
+        source_lang="en",
+        target_lang="ru",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+
+
+def test_threads_share_one_call_result_and_error():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flights.do, "k", compute) for _ in range(8)]
+        while flights.stats()["shared"] < 7:
+            time.sleep(0.001)
+        release.set()
+        results = {id(f.result()) for f in futures}
+    assert len(calls) == 1 and len(results) == 1
+
+    def fail():
+        release.wait(1)
+        raise ValueError("boom")
+
+    release.clear()
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(flights.do, "k", fail) for _ in range(2)]
+        time.sleep(0.05)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_thread_waiter_runs_itself_after_timeout():
+    flights = SingleFlight(timeout=0.01)
+    stuck = threading.Event()
+    leader = threading.Thread(target=flights.do, args=("k", lambda: stuck.wait(1)))
+    leader.start()
+    while not flights.stats()["in_flight"]:
+        time.sleep(0.001)
+    assert flights.do("k", lambda: "own") == "own"
+    stuck.set()
+    leader.join()
+
+
+def test_async_cancelled_caller_does_not_cancel_shared_call():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await anyio.sleep(0.05)
+        return "deck"
+
+    async def scenario():
+        results = []
+
+        async def call():
+            results.append(await flights.do("k", compute))
+
+        scopes = []
+
+        async def cancelled_call():
+            with anyio.CancelScope() as scope:
+                scopes.append(scope)
+                await flights.do("k", compute)
+            results.append("cancelled")
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(cancelled_call)
+            await anyio.sleep(0)
+            for _ in range(9):
+                tasks.start_soon(call)
+            await anyio.sleep(0.01)
+            scopes[0].cancel()
+        assert results == ["cancelled"] + ["deck"] * 9 and calls == [1]
+
+        # Зависшее вычисление: ожидающий по таймауту считает сам.
+        slow = anyio.Event()
+
+        async def hang():
+            await slow.wait()
+
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(flights.do, "h", hang)
+            await anyio.sleep(0)
+            assert await flights.do("h", compute, timeout=0.01) == "deck"
+            slow.set()
+
+        # Первый вызов таймаут не прерывает: он не запускает вычисление снова.
+        calls.clear()
+
+        async def slow_compute():
+            calls.append(1)
+            await anyio.sleep(0.05)
+            return "slow"
+
+        assert await flights.do("s", slow_compute, timeout=0.01) == "slow"
+        assert calls == [1]
+
+    anyio.run(scenario)
+
+
+def test_deck_services_coalesce_blocking_reads_and_see_writes():
+    repo = SlowDeckRepository()
+    repo.save(make_deck())
+    service = AsyncDeckService(AsyncDeckRepository(repo))
+
+    async def scenario():
+        decks = []
+
+        async def read():
+            decks.append(await service.get_deck("deck-1"))
+
+        async with anyio.create_task_group() as tasks:
+            for _ in range(20):
+                tasks.start_soon(read)
+        assert repo.gets == 1 and {d.title for d in decks} == {"Verbs"}
+
+        await service.update_deck(decks[0], DeckUpdatePayload(title="Nouns"))
+        assert (await service.get_deck("deck-1")).title == "Nouns"
+
+    anyio.run(scenario)
+
+    repo.gets = 0
+    sync_service = DeckService(repo)
+    with ThreadPoolExecutor(8) as pool:
+        titles = set(
+            pool.map(lambda _: sync_service.get_deck("deck-1").title, range(8))
+        )
+    assert titles == {"Nouns"} and repo.gets < 8
@@ -0,0 +1,139 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.adapters.changelog import ChangeLog, SyncExpiredError
+from app.main import app
+
+client = TestClient(app)
+
+
+def get_auth_headers():
+    email = f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def sync(headers, since, limit=500):
+    response = client.get(
+        "/api/v1/sync", params={"since": since, "limit": limit}, headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def create_deck(headers, title):
+    payload = {"title": title, "source_lang": "en", "target_lang": "ru"}
+    response = client.post("/api/v1/decks", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()["deck"]
+
+
+def test_sync_returns_only_changes_since_position():
+    headers = get_auth_headers()
+    other = get_auth_headers()
+    assert sync(headers, 0) == {"changes": [], "next": 0, "has_more": False}
+
+    first = create_deck(headers, "First")
+    second = create_deck(headers, "Second")
+    create_deck(other, "Not mine")
+    feed = sync(headers, 0)
+    assert [(c["id"], c["op"]) for c in feed["changes"]] == [
+        (first["id"], "upsert"),
+        (second["id"], "upsert"),
+    ]
+    assert feed["changes"][0]["data"] == first
+    position = feed["next"]
+
+    assert sync(headers, position)["changes"] == []
+    client.patch(
+        f"/api/v1/decks/{first['id']}", json={"title": "Renamed"}, headers=headers
+    )
+    client.delete(f"/api/v1/decks/{second['id']}", headers=headers)
+    feed = sync(headers, position)
+    assert [(c["id"], c["op"]) for c in feed["changes"]] == [
+        (first["id"], "upsert"),
+        (second["id"], "delete"),
+    ]
+    assert feed["changes"][0]["data"]["title"] == "Renamed"
+    assert feed["changes"][1]["data"] is None
+
+    # Полная синхронизация видит только последнее состояние каждой колоды.
+    feed = sync(headers, 0, limit=1)
+    assert feed["has_more"] is True and len(feed["changes"]) == 1
+    rest = sync(headers, feed["next"])
+    assert [c["id"] for c in feed["changes"] + rest["changes"]] == [
+        first["id"],
+        second["id"],
+    ]
+
+
+def test_changelog_compacts_superseded_entries_and_old_tombstones():
+    now = [1000.0]
+    log = ChangeLog(tombstone_ttl=60, max_tombstones=100, clock=lambda: now[0])
+    for version in range(200):
+        log.record("u1", "deck", "d1", {"version": version})
+    changes, position, has_more = log.since("u1", 0, 10)
+    assert [c.data for c in changes] == [{"version": 199}] and not has_more
+    assert len(log._logs["u1"].entries) < 100
+
+    log.record("u1", "deck", "d2", {"version": 0})
+    log.record("u1", "deck", "d2", None)
+    changes, _, _ = log.since("u1", position, 10)
+    assert [(c.entity_id, c.op) for c in changes] == [("d2", "delete")]
+
+    now[0] += 61
+    log.record("u1", "deck", "d3", {"version": 0})
+    with pytest.raises(SyncExpiredError):
+        log.since("u1", position, 10)
+    # С нуля клиент получает текущее состояние — без удалённой d2.
+    changes, _, _ = log.since("u1", 0, 10)
+    assert [c.entity_id for c in changes] == ["d1", "d3"]
+
+
+def test_sync_expired_position_returns_410(monkeypatch):
+    headers = get_auth_headers()
+    deck = create_deck(headers, "Gone")
+    position = sync(headers, 0)["next"]
+    client.delete(f"/api/v1/decks/{deck['id']}", headers=headers)
+    monkeypatch.setattr(main.changelog, "_max_tombstones", 0)
+    create_deck(headers, "Next")
+
+    response = client.get("/api/v1/sync", params={"since": position}, headers=headers)
+    assert response.status_code == 410
+    assert response.json()["error"]["code"] == "sync_expired"
+    assert [c["data"]["title"] for c in sync(headers, 0)["changes"]] == ["Next"]
+
+
+def test_sync_position_ahead_of_log_returns_410():
+    # Позиция, выданная до перезапуска процесса, впереди нового журнала.
+    log = ChangeLog(tombstone_ttl=60, max_tombstones=10)
+    with pytest.raises(SyncExpiredError):
+        log.since("u1", 5, 10)
+    log.record("u1", "deck", "d1", {"version": 0})
+    with pytest.raises(SyncExpiredError):
+        log.since("u1", 5, 10)
+
+    headers = get_auth_headers()
+    position = sync(headers, 0)["next"]
+    create_deck(headers, "Deck")
+    response = client.get(
+        "/api/v1/sync", params={"since": position + 10**9}, headers=headers
+    )
+    assert response.status_code == 410
+    assert response.json()["error"]["code"] == "sync_expired"
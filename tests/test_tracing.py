@@ -0,0 +1,136 @@
+import json
+from uuid import uuid4
+
+import anyio
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.middleware import RequestLoggingMiddleware
+from app.tracing import Tracer, span, traced, tracer
+
+client = TestClient(app)
+
+
+def get_auth_headers(email=None):
+    email = email or f"user-{uuid4()}@example.com"
+    password = "Password123"
+    register_payload = {
+        "email": email,
+        "password": password,
+        "locale": "ru",
+        "proficiency_level": "b1",
+    }
+    response = client.post("/api/v1/auth/register", json=register_payload)
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def names(node):
+    return [child["name"] for child in node["children"]]
+
+
+@traced("inner")
+def inner():
+    return 42
+
+
+def test_spans_nest_and_are_noop_outside_trace(tmp_path):
+    assert inner() == 42
+    with span("orphan") as orphan:
+        assert orphan is None
+
+    path = tmp_path / "traces.jsonl"
+    local = Tracer(slow_ms=0, path=str(path))
+    root, token = local.start("root")
+    with span("outer"):
+        inner()
+    local.finish(root, token, request_id="r-1")
+    local.flush()
+
+    trace = local.recent()[0]
+    assert trace["request_id"] == "r-1"
+    assert names(trace["root"]) == ["outer"]
+    assert names(trace["root"]["children"][0]) == ["inner"]
+    assert json.loads(path.read_text().splitlines()[0])["request_id"] == "r-1"
+
+
+def test_fast_traces_are_dropped():
+    local = Tracer(slow_ms=10_000)
+    root, token = local.start("root")
+    local.finish(root, token)
+    assert local.recent() == []
+
+
+def test_stream_trace_ends_at_first_byte(monkeypatch):
+    async def slow_body():
+        yield b"data: 1\n\n"
+        await anyio.sleep(0.1)
+        yield b"data: 2\n\n"
+
+    inner = FastAPI()
+
+    @inner.get("/stream")
+    def stream():
+        return StreamingResponse(slow_body(), media_type="text/event-stream")
+
+    @inner.get("/download")
+    def download():
+        return StreamingResponse(slow_body(), media_type="text/plain")
+
+    inner.add_middleware(RequestLoggingMiddleware)
+    local = TestClient(inner)
+    monkeypatch.setattr(tracer, "slow_ms", 50)
+    request_ids = {path: str(uuid4()) for path in ("/stream", "/download")}
+    for path, request_id in request_ids.items():
+        local.get(path, headers={"X-Request-Id": request_id})
+    slow = {trace["request_id"] for trace in tracer.recent()}
+    # Долгое SSE-соединение — не медленный запрос; медленная выгрузка — да.
+    assert request_ids["/stream"] not in slow
+    assert request_ids["/download"] in slow
+
+
+def test_slow_request_trace_crosses_layers(monkeypatch):
+    headers = get_auth_headers()
+    deck = client.post(
+        "/api/v1/decks",
+        json={"title": "Traced", "source_lang": "en", "target_lang": "ru"},
+        headers=headers,
+    ).json()["deck"]
+    monkeypatch.setattr(tracer, "slow_ms", 0)
+    request_id = str(uuid4())
+    client.get(
+        f"/api/v1/decks/{deck['id']}", headers={**headers, "X-Request-Id": request_id}
+    )
+
+    admin_email = f"admin-{uuid4()}@example.com"
+    monkeypatch.setattr(settings, "admin_email", admin_email)
+    response = client.get(
+        "/debug/traces", params={"limit": 100}, headers=get_auth_headers(admin_email)
+    )
+    assert response.status_code == 200
+    trace = next(
+        item for item in response.json()["traces"] if item["request_id"] == request_id
+    )
+    root = trace["root"]
+    assert root["name"] == f"GET /api/v1/decks/{deck['id']}"
+    assert names(root) == ["get_current_user", "decks.get_deck"]
+    auth_span = root["children"][0]
+    assert names(auth_span) == ["auth.get_user_by_token"]
+    assert names(auth_span["children"][0]) == [
+        "sessions.get_user_id",
+        "users.get_by_id",
+    ]
+    assert names(root["children"][1]) == ["decks.get"]
+
+
+def test_debug_traces_is_admin_only():
+    response = client.get("/debug/traces", headers=get_auth_headers())
+    assert response.status_code == 403